@@ -1,9 +1,24 @@
 import streamlit as st
-import pandas as pd
 import datetime as dt
 import calendar
+import importlib
+import os
+import sys
+import threading
 import uuid
-from io import BytesIO
+
+from planner import allocation, export
+from planner.audit import AuditLog
+from planner.availability import AvailabilityTotals
+from planner.calendar_view import calendar_month
+from planner.counters import OrderCounters
+from planner.editor import editor_changes
+from planner.index import OrderIndex
+from planner.metrics import METRICS, timed
+from planner.pubsub import ChangeFeed, open_broker
+from planner.search import SearchIndex
+from planner.store import ACCEPT_CODES, CapacityError, open_store
+from planner.viewcache import ViewCache
 
 # =============================
 # Konfigurasi Halaman
@@ -18,6 +33,9 @@ st.set_page_config(
 # =============================
 # Konstanta & Akun Demo
 # =============================
+# VENDORS_DEFAULT & ACCOUNTS hanya isi awal: disalin ke store saat store masih
+# kosong (lihat get_store). Setelah itu app membaca vendor/akun dari store,
+# jadi semua worker yang memakai DB yang sama melihat konfigurasi yang sama.
 STATUS_TRUCKING = [
     "Pending",
     "Confirm Order",
@@ -51,11 +69,22 @@ def gen_id(prefix="ORD"):
 def to_date(s: str) -> dt.date:
     return dt.datetime.strptime(s, DATE_FMT).date()
 
+def fragment(key: str, **kwargs):
+    # st.fragment + @timed(): rerun fragment (interaksi & tick live) tidak lewat main()/halaman,
+    # jadi dicatat sendiri (nama fungsi fragment) di Diagnostics & export Prometheus
+    def deco(fn):
+        return st.fragment(timed()(fn), key=key, **kwargs)
+    return deco
+
 # =============================
 # Styling
 # =============================
-st.markdown(
-    """
+# Satu stylesheet untuk seluruh app (termasuk tabel detail Admin Home, dulu
+# di-inject ulang tiap render panel). Harus dikirim di setiap run penuh —
+# elemen yang tidak dikirim ulang dihapus Streamlit di akhir run — tapi rerun
+# fragment tidak melewati bagian ini. Kalender punya CSS sendiri di
+# planner/calendar_frontend.
+APP_CSS = """
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
     .main > div {font-family: 'Poppins', sans-serif;}
@@ -64,15 +93,7 @@ st.markdown(
     .small {font-size:.85rem;color:#6b7280}
     .muted {color:#6b7280}
     .stButton>button {border-radius:10px; font-weight:600}
-    /* Kalender */
-    .cal-grid {display:grid; grid-template-columns: repeat(7, 1fr); gap:.65rem;}
-    .cal-head {text-align:center;font-weight:600;color:#374151;margin-bottom:.25rem}
-    .cal-cell {border:2px solid #e11d48;border-radius:12px; padding:.5rem; min-height:72px; display:flex; flex-direction:column; justify-content:space-between}
-    .cal-cell.ok {border-color:#16a34a}
-    .cal-cell.today {box-shadow:inset 0 0 0 2px #2563eb}
-    .cal-top {display:flex; align-items:center; justify-content:space-between; font-weight:600}
-    .cal-num {background:#f3f4f6;border-radius:8px;padding:.1rem .45rem}
-    .cal-total {font-size:.8rem; color:#111}
+    /* Legend kalender */
     .legend {display:flex; gap:1rem; align-items:center}
     .dot {width:10px;height:10px;border-radius:999px;display:inline-block}
     .dot.green{background:#16a34a}.dot.red{background:#e11d48}.dot.blue{background:#2563eb}
@@ -88,38 +109,34 @@ st.markdown(
     .grid-row {display:grid;grid-template-columns:1.2fr 1fr 1fr 1fr .8fr .8fr .8fr;gap:.5rem;padding:.6rem .75rem;align-items:center;border-bottom:1px dashed #e5e7eb}
     .detail-head {display:grid;grid-template-columns:.5fr 1fr 1fr 1fr 1fr 1fr 1fr 1fr .8fr;gap:.4rem;padding:.5rem .75rem;font-weight:600;background:#eef5ff;color:#1f2937;border-top-left-radius:12px;border-top-right-radius:12px;border:1px solid #dbeafe;border-bottom:none}
     .detail-row {display:grid;grid-template-columns:.5fr 1fr 1fr 1fr 1fr 1fr 1fr 1fr .8fr;gap:.4rem;padding:.45rem .75rem;border:1px solid #dbeafe;border-top:none}
-    
-        /* Injected: show dynamic labels inside each calendar box */
-        .cal-cell { position: relative; }
-        .cal-cell::after {
-            content: var(--lbl20) "\A" var(--lbl40);
-            white-space: pre;
-            position: absolute;
-            left: .55rem;
-            bottom: .5rem;
-            font-size: .9rem;
-            color: #111827;
-            font-variant-numeric: tabular-nums;
-        }
-    
-        
-        /* Injected: show dynamic labels inside each calendar box */
-        .cal-cell { position: relative; }
-        .cal-cell::after {
-            content: var(--lbl20) "\A" var(--lbl40);
-            white-space: pre;
-            position: absolute;
-            left: .55rem;
-            bottom: .5rem;
-            font-size: .9rem;
-            color: #111827;
-            font-variant-numeric: tabular-nums;
-        }
-    
-        </style>
-    """,
-    unsafe_allow_html=True,
-)
+    /* Tabel rekap orderan */
+    .rekap {width:100%; border-collapse:collapse; font-size:.95rem; margin:.4rem 0}
+    .rekap th, .rekap td {border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left}
+    .rekap thead tr {background:#f9fafb; color:#374151}
+    .rekap .num {text-align:right}
+    .rekap .acc {border-color:#93d1a3; background:#e6f4ea; text-align:center}
+    .rekap .rej {border-color:#e7a19d; background:#fde2e1; text-align:center}
+    /* Tabel detail ketersediaan (Admin Home) */
+    .table-wrap { margin:.25rem 0 .5rem 0; }
+    .tbl { width:100%; border-collapse:separate; border-spacing:0; font-size:0.95rem; }
+    .tbl thead th {
+        background: linear-gradient(180deg,#f8fafc,#eef2f7);
+        color:#111827; text-align:center; padding:.6rem .75rem;
+        border-top:1px solid #e5e7eb; border-bottom:1px solid #e5e7eb;
+    }
+    .tbl thead th:first-child { text-align:left; border-top-left-radius:12px; }
+    .tbl thead th:last-child  { border-top-right-radius:12px; }
+    .tbl tbody td { padding:.55rem .75rem; border-bottom:1px solid #f0f2f5; }
+    .tbl tbody tr:nth-child(even) td { background:#fbfbfd; }
+    .tbl tbody tr:nth-child(odd)  td { background:#ffffff; }
+    .tbl tbody td:first-child { font-weight:600; }
+    .badge {
+        display:inline-block; background:#eef2ff; border:1px solid #e5e7eb;
+        padding:.15rem .55rem; border-radius:10px; font-variant-numeric: tabular-nums;
+    }
+    </style>
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # =============================
 # Inisialisasi Session State
@@ -131,21 +148,174 @@ def init_state():
     ss.setdefault("username", None)
     ss.setdefault("vendor_name", None)
     ss.setdefault("order_vendor_prefill", None)
-
-    if "availability" not in ss:
-        ss.availability = {}
-
-    ss.setdefault("orders", [])
-    ss.setdefault("containers", {})
     ss.setdefault("selected_date_admin", today_str())
     ss.setdefault("selected_date_vendor", today_str())
     ss.setdefault("active_order_for_detail", None)
 
 init_state()
 
+# =============================
+# Storage (dipakai bersama oleh semua session)
+# =============================
+@st.cache_resource
+def get_store():
+    # TRUCK_STORE=memory untuk test; default SQLite file (persist setelah restart)
+    store = open_store(os.environ.get("TRUCK_STORE"))
+    store.seed_config(ACCOUNTS, VENDORS_DEFAULT)  # no-op bila DB sudah punya vendor/akun
+    return store
+
+@st.cache_resource
+def get_order_index():
+    # di-update incremental lewat event store; rebuild hanya jika ada tulis dari proses lain
+    return get_store().subscribe(OrderIndex())
+
+def order_index() -> OrderIndex:
+    return get_order_index().sync(get_store())
+
+@st.cache_resource
+def get_order_counters():
+    return get_store().subscribe(OrderCounters())
+
+def order_counters() -> OrderCounters:
+    return get_order_counters().sync(get_store())
+
+@st.cache_resource
+def get_availability_totals():
+    return get_store().subscribe(AvailabilityTotals())
+
+def availability_totals() -> AvailabilityTotals:
+    return get_availability_totals().sync(get_store())
+
+@st.cache_resource
+def get_container_registry():
+    # no. container / seal yang sedang dipakai container aktif (semua order & vendor); numpy
+    # (check digit) baru dimuat saat simpan detail pertama
+    from planner.registry import ContainerRegistry
+
+    return get_store().subscribe(ContainerRegistry(done_status=STATUS_TRUCKING[-1]))
+
+def container_registry() -> "ContainerRegistry":
+    return get_container_registry().sync(get_store())
+
+@st.cache_resource
+def get_search_index():
+    # inverted + prefix + trigram index DN/order/container/truk/supir, di-update per event store
+    return get_store().subscribe(SearchIndex())
+
+def search_index() -> SearchIndex:
+    return get_search_index().sync(get_store())
+
+@st.cache_resource
+def get_broker():
+    # Notifikasi perubahan per topik; TRUCK_BROKER=sqlite:///file.db bila ada beberapa proses/node
+    broker = open_broker(os.environ.get("TRUCK_BROKER"))
+    get_store().subscribe(ChangeFeed(broker, get_store()))
+    return broker
+
+@st.cache_resource
+def get_audit():
+    # Riwayat accept/reject/status/detail per container (append-only). TRUCK_AUDIT=path file log;
+    # default di samping file SQLite store, atau di memori untuk TRUCK_STORE=memory
+    store = get_store()
+    path = os.environ.get("TRUCK_AUDIT") or (store.path + ".audit" if hasattr(store, "path") else None)
+    log = AuditLog(path, store, user=lambda: st.session_state.get("username"))
+    return store.subscribe(log).catch_up()
+
+@st.cache_resource
+def get_notifier():
+    # Email / WhatsApp: order baru → vendor, container gate in port → admin. Aktif bila
+    # TRUCK_NOTIFY_SMTP (smtp://host:port?from=…) dan/atau TRUCK_NOTIFY_WEBHOOK (gateway WhatsApp;
+    # nomor di TRUCK_NOTIFY_WA_TO="admin=+62…;VENDOR=+62…") di-set. Tombol hanya menulis ke outbox
+    # (TRUCK_OUTBOX; default di samping file SQLite store), pengiriman di thread background.
+    if not (os.environ.get("TRUCK_NOTIFY_SMTP") or os.environ.get("TRUCK_NOTIFY_WEBHOOK")):
+        return None
+    from planner import notify
+
+    senders = {}
+    if os.environ.get("TRUCK_NOTIFY_SMTP"):
+        senders["email"] = notify.SmtpSender(os.environ["TRUCK_NOTIFY_SMTP"])
+    if os.environ.get("TRUCK_NOTIFY_WEBHOOK"):
+        senders["whatsapp"] = notify.WebhookSender(os.environ["TRUCK_NOTIFY_WEBHOOK"],
+                                                   token=os.environ.get("TRUCK_NOTIFY_WEBHOOK_TOKEN"))
+    store = get_store()
+    outbox = notify.open_outbox(os.environ.get("TRUCK_OUTBOX") or (store.path + ".outbox" if hasattr(store, "path") else None))
+    pool = notify.DeliveryPool(outbox, senders, workers=int(os.environ.get("TRUCK_NOTIFY_WORKERS", "2"))).start()
+    recipients = notify.AccountRecipients(store, notify.parse_numbers(os.environ.get("TRUCK_NOTIFY_WA_TO")))
+    store.subscribe(notify.Notifier(outbox, store, senders, recipients, STATUS_TRUCKING[-1], pool))
+    return pool
+
+# Modul berat yang tidak dibutuhkan halaman login; halaman setelah login memakainya
+# (DataFrame, dan komponen kalender — components v1 Streamlit selalu import pyarrow)
+WARM_IMPORTS = ("pandas", "pyarrow")
+
+@st.cache_resource
+def warm_imports():
+    # sekali per proses: import di thread background selagi user mengisi form login
+    t = threading.Thread(target=lambda: [importlib.import_module(m) for m in WARM_IMPORTS],
+                         name="warm-imports", daemon=True)
+    t.start()
+    return t
+
+@st.cache_resource
+def get_view_cache():
+    return ViewCache(maxsize=256)
+
+def cached_view(view: str, key, build, topic: str = None):
+    # DataFrame/list turunan di-memo per (view, filter, versi). Dengan `topic`, versi = versi topik
+    # (tulis ke vendor/order lain tidak membatalkan cache); tanpa topic = versi store global.
+    version = get_broker().version(topic) if topic else get_store().version()
+    return get_view_cache().get(view, key, version, build)
+
+def vendors() -> list:
+    # daftar vendor dari store (bisa ditambah dari proses lain → topik "config")
+    return cached_view("vendors", None, get_store().list_vendors, topic="config")
+
+# Halaman "live": fragment kecil live_poll cek versi topik tiap LIVE_SECONDS (tanpa render apa pun);
+# halaman baru dirender ulang hanya bila versinya bergeser, jadi tab idle hampir tidak memakai CPU
+LIVE_SECONDS = float(os.environ.get("TRUCK_LIVE_SECONDS", "5"))
+
+def live_changed(name: str, topics) -> bool:
+    # True bila `topics` berubah sejak halaman `name` terakhir dirender di session ini
+    v = get_broker().versions(topics)
+    seen = st.session_state.get(f"live__{name}")
+    st.session_state[f"live__{name}"] = v
+    return seen is not None and seen != v
+
+def live_watch(name: str, topics, msg: str):
+    # Panggil di awal halaman (sebelum data dibaca): toast bila ada perubahan, lalu pasang poller
+    if live_changed(name, topics):
+        st.toast(msg)
+    live_poll(name, tuple(topics))
+
+@fragment(key="live_poll", run_every=LIVE_SECONDS)
+def live_poll(name: str, topics: tuple):
+    if get_broker().versions(topics) != st.session_state.get(f"live__{name}"):
+        st.rerun()  # rerun penuh; live_changed di halaman menampilkan toast
+
+def paginate(items: list, key: str, page_size: int) -> list:
+    # Potong `items` per halaman (number_input `key`); hanya halaman aktif yang dirender
+    n_pages = max(1, -(-len(items) // page_size))
+    if st.session_state.get(key, 1) > n_pages:
+        st.session_state[key] = n_pages  # filter berubah → halaman terakhir yang masih ada
+    page = st.number_input("Halaman", min_value=1, max_value=n_pages, key=key)
+    lo = (page - 1) * page_size
+    page_items = items[lo:lo + page_size]
+    st.caption(f"Halaman {page}/{n_pages} — menampilkan {lo + 1}–{lo + len(page_items)} dari {len(items)} order")
+    return page_items
+
+# Callback yang memicu rerun fragment tidak boleh merender elemen (termasuk toast);
+# pesannya dititipkan di session lalu ditampilkan oleh fragment tujuan
+def flash(msg: str):
+    st.session_state.setdefault("flash_msgs", []).append(msg)
+
+def show_flash():
+    for msg in st.session_state.pop("flash_msgs", None) or []:
+        st.toast(msg)
+
 # =============================
 # Auth
 # =============================
+@timed()
 def login_page():
     st.markdown(
         """
@@ -160,8 +330,8 @@ def login_page():
         role = st.selectbox("👥 Role", ["", "Admin", "Vendor"], index=0, key="login_role")
         ok = st.form_submit_button("Masuk")
         if ok:
-            if u in ACCOUNTS and ACCOUNTS[u]["password"] == p:
-                acct = ACCOUNTS[u]
+            acct = get_store().check_login(u, p)
+            if acct:
                 if (role.lower() == acct["role"]):
                     st.session_state.authenticated = True
                     st.session_state.username = u
@@ -169,11 +339,12 @@ def login_page():
                     st.session_state.vendor_name = acct.get("vendor") if acct["role"] == "vendor" else None
                     st.rerun()
             st.error("Login gagal. Admin: Almira@app.co.id/1110 | Vendor: kambing@vendor.com/123")
+    warm_imports()
 
 # =============================
 # Order helpers
 # =============================
-def create_order(vendor: str, tgl_stuffing: str, closing_date: str, no_dn: str, shipping_point: str, j20: int, j40: int):
+def build_order(vendor: str, tgl_stuffing: str, closing_date: str, no_dn: str, shipping_point: str, j20: int, j40: int):
     order_id = gen_id("ORD")
     order = {
         "order_id": order_id,
@@ -196,69 +367,155 @@ def create_order(vendor: str, tgl_stuffing: str, closing_date: str, no_dn: str,
         containers.append({"no": len(containers)+1, "size": "40ft/HC", "accept": None,
                            "no_container": "", "no_seal": "", "no_mobil": "",
                            "nama_supir": "", "contact": "", "depo": "", "status": STATUS_TRUCKING[0]})
-    st.session_state.orders.append(order)
-    st.session_state.containers[order_id] = containers
-    return order_id
+    return order, containers
 
+@timed()
+def create_order(vendor: str, tgl_stuffing: str, closing_date: str, no_dn: str, shipping_point: str, j20: int, j40: int):
+    order, containers = build_order(vendor, tgl_stuffing, closing_date, no_dn, shipping_point, j20, j40)
+    get_store().add_order(order, containers)
+    METRICS.rows(len(containers))
+    return order["order_id"]
+
+@timed()
+def create_orders(rows: list) -> list:
+    # rows: dict dengan argumen create_order; disimpan dalam SATU transaksi
+    items = [build_order(**r) for r in rows]
+    get_store().add_orders(items)
+    METRICS.rows(sum(len(c) for _, c in items))
+    return [o["order_id"] for o, _ in items]
+
+def import_orders(data: bytes, filename: str):
+    # Return (DataFrame laporan per baris, jumlah order dibuat)
+    # CapacityError bila sisa kapasitas berubah (session lain) antara validasi & simpan → tidak ada yang dibuat
+    import pandas as pd
+
+    from planner import bulk_import
+
+    reports, valid, used = [], [], {}
+    for chunk in bulk_import.iter_chunks(data, filename):
+        rep = bulk_import.validate_chunk(chunk, vendors(), get_store().get_remaining)
+        rep = bulk_import.claim_capacity(rep, used)
+        ok = rep[rep["error"] == ""]
+        valid += [
+            {"vendor": r.vendor, "tgl_stuffing": r.tgl_stuffing, "closing_date": r.closing_date, "no_dn": r.no_dn,
+             "shipping_point": r.shipping_point, "j20": r.jml_20ft, "j40": r.jml_40ft}
+            for r in ok.itertuples(index=False)
+        ]
+        reports.append(rep)
+    ids = create_orders(valid)
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=["baris", "error"])
+    report["order_id"] = ""
+    report.loc[report["error"] == "", "order_id"] = ids
+    return report, len(ids)
+
+@timed()
 def update_order_summary(order_id: str):
-    items = st.session_state.containers.get(order_id, [])
-    if not items: return
-    acc = sum(1 for r in items if r["accept"] is True)
-    rej = sum(1 for r in items if r["accept"] is False)
-    pen = sum(1 for r in items if r["accept"] is None)
+    c = order_counters().totals(order_id)
+    METRICS.rows(c["total"])
+    if not c["total"]: return
+    acc, rej, pen = c["accept"], c["reject"], c["pending"]
     if pen == 0 and acc > 0 and rej == 0: status = "Accepted"
     elif pen == 0 and rej > 0 and acc == 0: status = "Rejected"
     elif pen == 0 and acc > 0 and rej > 0: status = "Partial"
     else: status = "Pending"
-    for o in st.session_state.orders:
-        if o["order_id"] == order_id:
-            o["summary_status"] = status
-            break
+    get_store().update_order(order_id, summary_status=status)
+
+def _accept_changes(r: dict, accept: bool) -> dict:
+    ch = {"no": r["no"], "accept": accept}
+    if accept and r.get("status", STATUS_TRUCKING[0]) == STATUS_TRUCKING[0]:
+        ch["status"] = STATUS_TRUCKING[1]
+    return ch
+
+def reject_order(order_id: str):
+    items = get_store().get_containers(order_id)
+    get_store().update_containers(order_id, [_accept_changes(r, False) for r in items])
+    update_order_summary(order_id)
+
+def accept_order(order_id: str):
+    items = get_store().get_containers(order_id)
+    get_store().update_containers(order_id, [_accept_changes(r, True) for r in items])
+    update_order_summary(order_id)
+
+def partial_accept_order(order_id: str, take_20: int, take_40: int):
+    # Ambil `take_20`/`take_40` container pertama per ukuran, sisanya ditolak
+    cnt = {"20ft": int(take_20), "40ft/HC": int(take_40)}
+    changes = []
+    for r in get_store().get_containers(order_id):
+        ok = cnt.get(r["size"], 0) > 0
+        if ok:
+            cnt[r["size"]] -= 1
+        changes.append(_accept_changes(r, ok))
+    get_store().update_containers(order_id, changes)
+    update_order_summary(order_id)
+
+def check_container_details(order_id: str, changes: dict) -> dict:
+    # Normalisasi no. container / seal (in-place) lalu {no: [pesan]} untuk baris yang harus ditolak:
+    # check digit ISO 6346 (satu batch, vectorized) + nomor yang sudah aktif di container lain
+    from planner import iso6346
+
+    errors = {}
+    for fields in changes.values():
+        for f in ("no_container", "no_seal"):
+            if f in fields:
+                fields[f] = iso6346.normalize(fields[f])
+    nos = [no for no, fields in changes.items() if fields.get("no_container")]
+    for no, msg in zip(nos, iso6346.errors([changes[no]["no_container"] for no in nos])):
+        if msg:
+            errors.setdefault(no, []).append(f"No. Container {msg}")
+    valid = {no: fields for no, fields in changes.items() if no not in errors}
+    for no, msgs in container_registry().conflicts(order_id, valid).items():
+        errors.setdefault(no, []).extend(msgs)
+    return errors
+
+def save_container_details(order_id: str, changes: dict) -> tuple:
+    # changes: {no: {field: nilai}} (lihat planner.editor.editor_changes)
+    # Return (jumlah baris yang diubah, {no: [pesan]} baris yang ditolak — tidak disimpan)
+    if not changes:
+        return 0, {}
+    store, registry = get_store(), container_registry()
+    errors = {}
+
+    def check(_rows: list) -> list:
+        # Dalam transaksi tulis store (BEGIN IMMEDIATE / lock store): registry di-sync ke versi
+        # terbaru (delta changelog, termasuk simpan dari worker lain) lalu dicek — tidak ada
+        # worker yang bisa menyimpan nomor yang sama di antara cek dan tulis.
+        # Baris dibangun setelah cek karena no. container / seal dinormalisasi di `changes`.
+        registry.sync(store)
+        errors.update(check_container_details(order_id, changes))
+        return [{"no": no, **fields} for no, fields in changes.items() if no not in errors]
+
+    with registry.lock:  # urutan lock sama dengan Projection.sync (registry → store)
+        n = store.update_containers(order_id, [{"no": no, **fields} for no, fields in changes.items()], check=check)
+    METRICS.rows(len(changes))
+    return n, errors
+
+def save_availability(date: str, vendor: str, a20: int, a40: int):
+    get_store().set_availability(date, vendor, int(a20), int(a40))
+
+def save_availability_many(vendor: str, rows: list):
+    # rows: (date, a20, a40) — SATU transaksi; CapacityError → tidak ada yang disimpan
+    get_store().set_availability_many([(d, vendor, int(a20), int(a40)) for d, a20, a40 in rows])
 
 # =============================
 # ADMIN — Home (sesuai mockup)
 # =============================
+@timed()
 def admin_home():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">🏠 Admin — Home</h3>
         <div class="small">Pilih tanggal pada kalender untuk melihat ketersediaan vendor per jenis container.</div></div>
     """, unsafe_allow_html=True)
+    # Tiap bagian = fragment: ganti bulan / klik tanggal tidak merender ulang seluruh halaman
+    admin_home_calendar()
+    admin_home_detail()
 
+def _pick_admin_date(date: str):
+    st.session_state.selected_date_admin = date
+    st.session_state["show_vendor_detail_admin"] = True
+    st.rerun(["admin_calendar", "admin_detail"])  # highlight kalender + panel detail saja
 
-    # --- Override: Kalender full-fill colors ---
-    st.markdown(
-        """
-        <style>
-        /* FULL FILL for calendar cells (red/green) */
-        .cal-cell { 
-            border: 2px solid #e11d48; 
-            border-radius: 12px; 
-            padding: .5rem; 
-            min-height: 110px; 
-            background: #fee2e2; /* default: ≤50% */
-            display: flex; 
-            flex-direction: column; 
-            justify-content: space-between;
-        }
-        .cal-cell.ok { 
-            border-color: #16a34a; 
-            background: #dcfce7; /* >50% */
-        }
-        .cal-cell.today { 
-            box-shadow: inset 0 0 0 3px #2563eb; /* ring for today */
-        }
-        .cal-num { 
-            background: rgba(255,255,255,.8);
-            border-radius: 8px;
-            padding: .1rem .45rem;
-        }
-        </style>
-        """, unsafe_allow_html=True
-    )
-
-
-
-
+@fragment(key="admin_calendar")
+def admin_home_calendar():
     # Dropdown Bulan/Tahun
     today = to_date(st.session_state.selected_date_admin)
     colm, coly = st.columns(2)
@@ -272,47 +529,19 @@ def admin_home():
     # Kalender
     st.markdown("<div class='card'>", unsafe_allow_html=True)
     st.subheader(f"{calendar.month_name[month]} {year}")
-    # header day names
-    cols = st.columns(7)
-    for i, name in enumerate(["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"]):
-        cols[i].markdown(f"<div class='cal-head'>{name}</div>", unsafe_allow_html=True)
-
-    cal = calendar.monthcalendar(year, month)
     kapasitas_total = 156  # asumsi kapasitas untuk pewarnaan
-    for week in cal:
-        cols = st.columns(7)
-        for i, d in enumerate(week):
-            with cols[i]:
-                if d == 0:
-                    st.write("")
-                    continue
-                the_date = dt.date(year, month, d)
-                s = the_date.strftime(DATE_FMT)
-                data = st.session_state.availability.get(s, {})
-                total_20 = sum(v.get("20ft", 0) for v in data.values()) if data else 0
-                total_40 = sum(v.get("40ft/HC", 0) for v in data.values()) if data else 0
-                total_all = total_20 + total_40
-                ok = total_all > kapasitas_total * 0.5
-                is_today = (the_date == dt.date.today())
-
-                classes = "cal-cell " + ("ok " if ok else "") + ("today" if is_today else "")
-                st.markdown(
-    f"<div class='{classes}' style=\"--lbl20:'20ft : {total_20}'; --lbl40:'40ft/HC: {total_40}';\">",
-    unsafe_allow_html=True
-)
-                top = st.columns([1,1])
-                with top[0]:
-                    st.markdown(f"<div class='cal-num'>{d}</div>", unsafe_allow_html=True)
-                with top[1]:
-                    st.markdown("<div style='display:none'></div>", unsafe_allow_html=True)
-
-                if st.button("Pilih", key=f"pick_admin_{s}"):
-                    st.session_state.selected_date_admin = s
-                    st.session_state["show_vendor_detail_admin"] = True
-                    st.rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
+    month_av = availability_totals().month(year, month)  # total semua vendor per tanggal
+    calendar_month(
+        year, month,
+        totals=lambda s: month_av["days"].get(s, (0, 0)),
+        is_ok=lambda t20, t40: t20 + t40 > kapasitas_total * 0.5,
+        selected=st.session_state.selected_date_admin if st.session_state.get("show_vendor_detail_admin") else None,
+        key="cal_admin",
+        on_pick=_pick_admin_date,
+    )
 
     # legend
+    st.caption(f"Total bulan ini — 20ft: {month_av['20ft']} | 40ft/HC: {month_av['40ft/HC']}")
     st.markdown(
         "<div class='legend small' style='margin-top:.5rem'>"
         "<span class='dot green'></span> Tersedia Banyak (>50% truck) "
@@ -323,45 +552,20 @@ def admin_home():
     )
     st.markdown("</div>", unsafe_allow_html=True)
 
+@fragment(key="admin_detail")
+def admin_home_detail():
     # Panel detail vendor utk tanggal terpilih
     target_date = st.session_state.selected_date_admin
     if st.session_state.get("show_vendor_detail_admin", False):
-        
-
         st.markdown(f"#### Detail Ketersediaan — {target_date}")
-        avail = st.session_state.availability.get(target_date, {})
+        avail = get_store().get_availability(target_date)
 
         # Rekap tabel: tampilkan SEMUA vendor (0 jika belum mengisi)
         rows = []
-        for v in VENDORS_DEFAULT:
+        for v in vendors():
             r = avail.get(v, {"20ft": 0, "40ft/HC": 0})
             rows.append((v, int(r.get("20ft", 0)), int(r.get("40ft/HC", 0))))
 
-        # CSS tabel yang bersih & ergonomis
-        st.markdown(
-            """
-            <style>
-            .table-wrap { margin:.25rem 0 .5rem 0; }
-            .tbl { width:100%; border-collapse:separate; border-spacing:0; font-size:0.95rem; }
-            .tbl thead th {
-                background: linear-gradient(180deg,#f8fafc,#eef2f7);
-                color:#111827; text-align:center; padding:.6rem .75rem;
-                border-top:1px solid #e5e7eb; border-bottom:1px solid #e5e7eb;
-            }
-            .tbl thead th:first-child { text-align:left; border-top-left-radius:12px; }
-            .tbl thead th:last-child  { border-top-right-radius:12px; }
-            .tbl tbody td { padding:.55rem .75rem; border-bottom:1px solid #f0f2f5; }
-            .tbl tbody tr:nth-child(even) td { background:#fbfbfd; }
-            .tbl tbody tr:nth-child(odd)  td { background:#ffffff; }
-            .tbl tbody td:first-child { font-weight:600; }
-            .badge {
-                display:inline-block; background:#eef2ff; border:1px solid #e5e7eb;
-                padding:.15rem .55rem; border-radius:10px; font-variant-numeric: tabular-nums;
-            }
-            </style>
-            """, unsafe_allow_html=True
-        )
-
         # Render HTML tabel
         html = "<div class='table-wrap'><table class='tbl'><thead><tr><th>VENDOR</th><th>20ft</th><th>40ft/HC</th></tr></thead><tbody>"
         for v,a20,a40 in rows:
@@ -372,48 +576,94 @@ def admin_home():
 # =============================
 # ADMIN — Order to Vendor (sinkron tanggal)
 # =============================
+REKAP_SORT = {"Tgl Stuffing": "tgl_stuffing", "Closing Date": "closing_date", "No DN": "no_dn", "Vendor": "vendor"}
+
+def rekap_table_html(orders: list, counters) -> str:
+    # Style di class .rekap (CSS global) — ukuran HTML sebanding jumlah baris halaman
+    rows = []
+    for o in orders:
+        # Accept/reject per ukuran (counter per order)
+        cnt = counters.get(o["order_id"])
+        # Dua baris per order, dengan rowspan pada kolom info
+        rows.append(
+            f"<tr><td rowspan='2'>{o['no_dn']}</td><td rowspan='2'>{o['vendor']}</td>"
+            f"<td rowspan='2'>{o['tgl_stuffing']}</td><td rowspan='2'>{o['closing_date']}</td>"
+            f"<td rowspan='2'>{o['shipping_point']}</td>"
+            f"<td>20ft</td><td class='num'>{int(o.get('jml_20ft', 0))}</td>"
+            f"<td class='acc'>{cnt['20ft']['accept']}</td><td class='rej'>{cnt['20ft']['reject']}</td></tr>"
+            f"<tr><td>40ft/HC</td><td class='num'>{int(o.get('jml_40ft', 0))}</td>"
+            f"<td class='acc'>{cnt['40ft/HC']['accept']}</td><td class='rej'>{cnt['40ft/HC']['reject']}</td></tr>"
+        )
+    return (
+        "<table class='rekap'><thead><tr>"
+        "<th>No DN</th><th>Vendor</th><th>Tanggal Stuffing</th><th>Closing Date</th><th>Shipping Point</th>"
+        "<th>Container</th><th class='num'>Jumlah Container</th><th class='acc'>Accept</th><th class='rej'>Reject</th>"
+        "</tr></thead><tbody>" + "".join(rows) + "</tbody></table>"
+    )
+
+@timed()
 def admin_order_to_vendor():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">📦 Admin — Order to Vendor</h3>
         <div class="small">Pilih vendor dari tabel ketersediaan, tanggalnya sinkron dengan Home.</div></div>
     """, unsafe_allow_html=True)
+    # Bagian-bagian halaman = fragment terpisah; interaksi (ganti tanggal, filter/halaman rekap,
+    # validasi form) hanya merender ulang bagiannya. Tulis data (order baru/import) → rerun penuh.
+    order_availability()
+    st.markdown("#### Buat Order Baru")
+    order_form()
+    order_import()
+    order_allocate()
+    st.divider()
+    order_rekap()
+
+def _prefill_order_vendor(vendor: str):
+    st.session_state.order_vendor_prefill = vendor
+    st.session_state.order_vendor = vendor  # selectbox form ikut berubah
+    flash(f"Prefill vendor: {vendor}")
+    st.rerun("order_form")
 
+def _link_admin_date():
+    st.session_state.selected_date_admin = st.session_state.admin_date_link.strftime(DATE_FMT)
+    st.rerun(["order_availability", "order_form"])  # tanggal form ikut berubah
+
+@fragment(key="order_availability")
+def order_availability():
     # Tanggal sinkron Home
     cdate = to_date(st.session_state.selected_date_admin)
-    new_date = st.date_input("Tanggal (sinkron Home)", value=cdate, key="admin_date_link")
-    if new_date != cdate:
-        st.session_state.selected_date_admin = new_date.strftime(DATE_FMT)
+    st.date_input("Tanggal (sinkron Home)", value=cdate, key="admin_date_link", on_change=_link_admin_date)
 
-    # Tabel ketersediaan per vendor (tanggal terpilih)
+    # Tabel ketersediaan per vendor (tanggal terpilih): sisa / total
     show_date_str = st.session_state.selected_date_admin
-    avail = st.session_state.availability.get(show_date_str, {})
-    st.caption(f"Menampilkan ketersediaan untuk tanggal: **{show_date_str}**")
+    avail = get_store().get_availability(show_date_str)
+    remaining = get_store().get_remaining(show_date_str)
+    st.caption(f"Menampilkan ketersediaan untuk tanggal: **{show_date_str}** (sisa / total)")
     st.markdown("<div class='card'>", unsafe_allow_html=True)
     st.markdown("<div style='display:grid;grid-template-columns:1.8fr .8fr .8fr .8fr;gap:.75rem;padding:.5rem .75rem;border-bottom:1px solid #eee;font-weight:600;color:#374151;background:#f9fafb;border-top-left-radius:10px;border-top-right-radius:10px'>"
                 "<div>Vendor</div><div>20ft</div><div>40ft/HC</div><div>Aksi</div></div>", unsafe_allow_html=True)
-    for v in VENDORS_DEFAULT:
+    for v in vendors():
         row = avail.get(v, {"20ft": 0, "40ft/HC": 0})
+        left = remaining.get(v, {"20ft": 0, "40ft/HC": 0})
         c1, c2, c3, c4 = st.columns([1.8, .8, .8, .8])
         with c1: st.write(v)
-        with c2: st.write(row.get("20ft", 0))
-        with c3: st.write(row.get("40ft/HC", 0))
+        with c2: st.write(f"{left['20ft']} / {row.get('20ft', 0)}")
+        with c3: st.write(f"{left['40ft/HC']} / {row.get('40ft/HC', 0)}")
         with c4:
-            if st.button("Order", key=f"orderbtn_{v}"):
-                st.session_state.order_vendor_prefill = v
-                st.toast(f"Prefill vendor: {v}")
+            st.button("Order", key=f"orderbtn_{v}", on_click=_prefill_order_vendor, args=(v,))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+@fragment(key="order_form")
+def order_form():
+    show_flash()
     # Form Order (prefill vendor & tanggal dari atas)
-    st.markdown("#### Buat Order Baru")
-    default_vendor_idx = 0
-    if st.session_state.order_vendor_prefill in VENDORS_DEFAULT:
-        default_vendor_idx = VENDORS_DEFAULT.index(st.session_state.order_vendor_prefill)
+    # (prefill vendor di-set langsung ke session_state.order_vendor oleh tombol "Order")
+    show_date_str = st.session_state.selected_date_admin
 
     with st.form("form_order_admin"):
         c1, c2, c3 = st.columns(3)
         with c1:
-            vendor = st.selectbox("Vendor", VENDORS_DEFAULT, index=default_vendor_idx, key="order_vendor")
+            vendor = st.selectbox("Vendor", vendors(), key="order_vendor")
             tgl_stuff = st.date_input("Tgl Stuffing", value=to_date(show_date_str), key="order_tglstuff")
             closing = st.date_input("Closing date", value=to_date(show_date_str) + dt.timedelta(days=2), key="order_closing")
         with c2:
@@ -429,110 +679,174 @@ def admin_order_to_vendor():
             elif j20 + j40 == 0:
                 st.error("Minimal pesan 1 container.")
             else:
-                # Validasi ketersediaan vendor pada tanggal stuffing
+                # Validasi sisa ketersediaan vendor (ketersediaan - sudah dipesan) pada tanggal stuffing
                 date_key = tgl_stuff.strftime(DATE_FMT)
-                av_for_date = st.session_state.availability.get(date_key, {})
-                vendor_av = av_for_date.get(vendor, {"20ft": 0, "40ft/HC": 0})
-                has_any = int(vendor_av.get("20ft", 0)) + int(vendor_av.get("40ft/HC", 0)) > 0
+                vendor_av = get_store().get_remaining(date_key).get(vendor)
 
-                if not has_any:
+                if vendor_av is None:
                     st.error(f"Vendor {vendor} belum mengisi ketersediaan untuk {date_key}. Order tidak dapat dibuat.")
                 else:
                     avail20 = int(vendor_av.get("20ft", 0))
                     avail40 = int(vendor_av.get("40ft/HC", 0))
 
-                    # Cek per-size: tidak boleh melebihi ketersediaan vendor
+                    # Cek per-size: tidak boleh melebihi sisa ketersediaan vendor
                     if j20 > avail20:
-                        st.error(f"Jumlah 20ft yang dipesan ({int(j20)}) melebihi ketersediaan vendor ({avail20}).")
+                        st.error(f"Jumlah 20ft yang dipesan ({int(j20)}) melebihi sisa ketersediaan vendor ({avail20}).")
                     elif j40 > avail40:
-                        st.error(f"Jumlah 40ft/HC yang dipesan ({int(j40)}) melebihi ketersediaan vendor ({avail40}).")
+                        st.error(f"Jumlah 40ft/HC yang dipesan ({int(j40)}) melebihi sisa ketersediaan vendor ({avail40}).")
                     else:
-                        oid = create_order(
-                            vendor, tgl_stuff.strftime(DATE_FMT), closing.strftime(DATE_FMT), no_dn, ship_point, j20, j40
-                        )
-                        st.success(f"Order dibuat: {oid}")
-                        st.session_state.order_vendor_prefill = None
-                        st.rerun()
-
-    st.divider()
+                        # cek final & reservasi atomik di store (submit lain bisa masuk lebih dulu)
+                        try:
+                            oid = create_order(
+                                vendor, tgl_stuff.strftime(DATE_FMT), closing.strftime(DATE_FMT), no_dn, ship_point, j20, j40
+                            )
+                        except CapacityError as e:
+                            st.error(f"{e} Order tidak dapat dibuat.")
+                        else:
+                            st.success(f"Order dibuat: {oid}")
+                            st.session_state.order_vendor_prefill = None
+                            st.rerun()
+
+@fragment(key="order_import")
+def order_import():
+    # Import massal (Excel/CSV) — validasi sama dengan form di atas
+    from planner import bulk_import
+
+    with st.expander("📥 Import Order Massal (Excel/CSV)"):
+        st.caption("Kolom: " + ", ".join(bulk_import.COLUMNS) + ". Closing date kosong = Tgl Stuffing + 2 hari.")
+        up = st.file_uploader("File order", type=["xlsx", "csv"], key="order_import_file")
+        if up is not None and st.button("Proses Import", key="order_import_btn"):
+            try:
+                report, n_ok = import_orders(up.getvalue(), up.name)
+            except CapacityError as e:
+                st.error(f"{e} Ketersediaan berubah saat import; tidak ada order yang dibuat, silakan ulangi.")
+            else:
+                st.session_state.order_import_result = (report, n_ok)
+                if n_ok:
+                    st.rerun()  # tabel ketersediaan & rekap ikut diperbarui
+        if st.session_state.get("order_import_result"):
+            report, n_ok = st.session_state.order_import_result
+            n_err = int((report["error"] != "").sum())
+            if n_ok:
+                st.success(f"{n_ok} order dibuat.")
+            if n_err:
+                st.error(f"{n_err} baris ditolak.")
+            st.dataframe(
+                report[["baris", "vendor", "no_dn", "tgl_stuffing", "jml_20ft", "jml_40ft", "order_id", "error"]],
+                use_container_width=True, hide_index=True,
+            )
+
+ALLOC_COLS = {"no_dn": "No.DN", "tgl_stuffing": "Tgl Stuffing", "closing_date": "Closing date",
+              "shipping_point": "Shipping Point", "j20": "20ft", "j40": "40ft/HC"}
+
+def vendor_scores() -> dict:
+    # accept ratio historis per vendor, di-smooth (vendor baru / sedikit data ≈ 0.5)
+    from planner import analytics
+
+    k = analytics.kpis(analytics_base(), ["vendor"])
+    return dict(zip(k["vendor"], (k["accepted"] + 1) / (k["n"] + 2)))
+
+def _alloc_demands(df: "pd.DataFrame") -> list:
+    import pandas as pd
+
+    df = df.dropna(subset=["no_dn", "tgl_stuffing"])
+    return [
+        {"no_dn": str(r.no_dn).strip(), "tgl_stuffing": r.tgl_stuffing.strftime(DATE_FMT),
+         "closing_date": (r.closing_date if pd.notna(r.closing_date) else r.tgl_stuffing + dt.timedelta(days=2)).strftime(DATE_FMT),
+         "shipping_point": "" if pd.isna(r.shipping_point) else str(r.shipping_point).strip(),
+         "j20": 0 if pd.isna(r.j20) else int(r.j20), "j40": 0 if pd.isna(r.j40) else int(r.j40)}
+        for r in df.itertuples(index=False) if str(r.no_dn).strip()
+    ]
+
+@fragment(key="order_allocate")
+def order_allocate():
+    # DN tanpa vendor → dibagi otomatis ke vendor sesuai sisa ketersediaan per ukuran
+    import pandas as pd
+
+    with st.expander("🤖 Alokasi Otomatis ke Vendor"):
+        st.caption("Isi / tempel daftar DN (tanpa vendor). Tiap DN diberikan ke satu vendor bila cukup, "
+                   "kalau tidak dipecah ke beberapa vendor dengan No.DN yang sama.")
+        day = to_date(st.session_state.selected_date_admin)
+        blank = pd.DataFrame([{"no_dn": None, "tgl_stuffing": day, "closing_date": None, "shipping_point": None,
+                               "j20": 0, "j40": 0}])
+        df = st.data_editor(
+            blank, num_rows="dynamic", use_container_width=True, hide_index=True, key="alloc_input",
+            column_config={
+                "no_dn": st.column_config.TextColumn(ALLOC_COLS["no_dn"], required=True),
+                "tgl_stuffing": st.column_config.DateColumn(ALLOC_COLS["tgl_stuffing"], required=True),
+                "closing_date": st.column_config.DateColumn(ALLOC_COLS["closing_date"], help="Kosong = Tgl Stuffing + 2 hari"),
+                "shipping_point": st.column_config.TextColumn(ALLOC_COLS["shipping_point"]),
+                "j20": st.column_config.NumberColumn(ALLOC_COLS["j20"], min_value=0, step=1),
+                "j40": st.column_config.NumberColumn(ALLOC_COLS["j40"], min_value=0, step=1),
+            },
+        )
+        prefer = st.toggle("Utamakan vendor dengan accept ratio tinggi", value=True, key="alloc_prefer")
+        if st.button("Hitung Alokasi", key="alloc_plan_btn"):
+            demands = _alloc_demands(df)
+            if not demands:
+                st.error("No.DN wajib diisi.")
+            else:
+                st.session_state.alloc_plan = allocation.allocate(
+                    demands, get_store().get_remaining, vendor_scores() if prefer else None)
+
+        plan = st.session_state.get("alloc_plan")
+        if not plan:
+            return
+        rows, rejected = plan
+        if rejected:
+            st.error(f"{len(rejected)} DN tidak dapat dialokasikan.")
+            st.dataframe(pd.DataFrame([{"No.DN": d["no_dn"], "Tgl Stuffing": d["tgl_stuffing"], "20ft": d["j20"],
+                                        "40ft/HC": d["j40"], "Alasan": why} for d, why in rejected]),
+                         use_container_width=True, hide_index=True)
+        if not rows:
+            return
+        st.dataframe(pd.DataFrame(rows)[["vendor", *ALLOC_COLS]].rename(columns={"vendor": "Vendor", **ALLOC_COLS}),
+                     use_container_width=True, hide_index=True)
+        if st.button(f"✅ Buat {len(rows)} Order", key="alloc_create_btn"):
+            try:
+                ids = create_orders(rows)
+            except CapacityError as e:
+                st.error(f"{e} Ketersediaan berubah sejak alokasi dihitung; tidak ada order yang dibuat, hitung ulang.")
+            else:
+                st.session_state.alloc_plan = None
+                flash(f"{len(ids)} order dibuat dari alokasi otomatis.")
+                st.rerun()  # tabel ketersediaan & rekap ikut diperbarui
 
-    
+@fragment(key="order_rekap")
+def order_rekap():
     # Rekap List Orderan + filter
     st.markdown("#### Rekap List Orderan")
     f1, f2, f3 = st.columns(3)
     with f1:
-        vendor_filter = st.selectbox("Filter Vendor", ["-- Semua --"] + VENDORS_DEFAULT, index=0, key="rekap_vendor")
+        vendor_filter = st.selectbox("Filter Vendor", ["-- Semua --"] + vendors(), index=0, key="rekap_vendor")
     with f2:
         tgl_start = st.date_input("Tgl Stuffing (start)", value=dt.date.today() - dt.timedelta(days=7), key="rekap_start")
     with f3:
         tgl_end = st.date_input("Tgl Stuffing (end)", value=dt.date.today(), key="rekap_end")
 
-    # Kumpulkan dan render sebagai SATU tabel gabungan
-    rows_html = []
-
-    for o in st.session_state.orders:
-        d = to_date(o["tgl_stuffing"])
-        if not (tgl_start <= d <= tgl_end):
-            continue
-        if vendor_filter != "-- Semua --" and o["vendor"] != vendor_filter:
-            continue
-
-        items = st.session_state.containers.get(o["order_id"], [])
-
-        # Hitung accept/reject per ukuran
-        acc20 = sum(1 for r in items if r.get("size") == "20ft" and r.get("accept") is True)
-        rej20 = sum(1 for r in items if r.get("size") == "20ft" and r.get("accept") is False)
-        acc40 = sum(1 for r in items if r.get("size") == "40ft/HC" and r.get("accept") is True)
-        rej40 = sum(1 for r in items if r.get("size") == "40ft/HC" and r.get("accept") is False)
-
-        t20 = o.get("jml_20ft", 0)
-        t40 = o.get("jml_40ft", 0)
+    f4, f5, f6 = st.columns(3)
+    with f4:
+        sort_by = st.selectbox("Urutkan", list(REKAP_SORT), index=0, key="rekap_sort")
+    with f5:
+        sort_desc = st.toggle("Terbaru dulu", value=False, key="rekap_desc")
+    with f6:
+        page_size = st.selectbox("Baris per halaman", [10, 25, 50, 100], index=1, key="rekap_page_size")
+
+    # Filter di index (range tanggal + vendor), urut & potong per halaman; hanya halaman aktif yang dirender
+    rekap_orders = order_index().between(
+        tgl_start.strftime(DATE_FMT), tgl_end.strftime(DATE_FMT),
+        vendor=None if vendor_filter == "-- Semua --" else vendor_filter,
+    )
+    if REKAP_SORT[sort_by] == "tgl_stuffing":
+        if sort_desc:
+            rekap_orders = rekap_orders[::-1]  # index sudah urut tanggal
+    else:
+        rekap_orders = sorted(rekap_orders, key=lambda o: o[REKAP_SORT[sort_by]], reverse=sort_desc)
 
-        # Dua baris per order, dengan rowspan pada kolom info
-        rows_html.append(f"""
-            <tr>
-              <td rowspan='2' style='border:1px solid #e5e7eb; padding:.5rem .6rem'>{o['no_dn']}</td>
-              <td rowspan='2' style='border:1px solid #e5e7eb; padding:.5rem .6rem'>{o['vendor']}</td>
-              <td rowspan='2' style='border:1px solid #e5e7eb; padding:.5rem .6rem'>{o['tgl_stuffing']}</td>
-              <td rowspan='2' style='border:1px solid #e5e7eb; padding:.5rem .6rem'>{o['closing_date']}</td>
-              <td rowspan='2' style='border:1px solid #e5e7eb; padding:.5rem .6rem'>{o['shipping_point']}</td>
-              <td style='border:1px solid #e5e7eb; padding:.5rem .6rem'>20ft</td>
-              <td style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:right'>{int(t20)}</td>
-              <td style='border:1px solid #93d1a3; background:#e6f4ea; padding:.5rem .6rem; text-align:center'>{int(acc20)}</td>
-              <td style='border:1px solid #e7a19d; background:#fde2e1; padding:.5rem .6rem; text-align:center'>{int(rej20)}</td>
-            </tr>
-            <tr>
-              <td style='border:1px solid #e5e7eb; padding:.5rem .6rem'>40ft/HC</td>
-              <td style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:right'>{int(t40)}</td>
-              <td style='border:1px solid #93d1a3; background:#e6f4ea; padding:.5rem .6rem; text-align:center'>{int(acc40)}</td>
-              <td style='border:1px solid #e7a19d; background:#fde2e1; padding:.5rem .6rem; text-align:center'>{int(rej40)}</td>
-            </tr>
-        """)
-
-    if rows_html:
-
-        # Hilangkan spasi awal di setiap baris agar tidak dianggap code-block Markdown
-        tbody_rows = "\n".join(rows_html)
-        tbody_rows = "\n".join(line.lstrip() for line in tbody_rows.splitlines())
-        table_html = f"""<table style='width:100%; border-collapse:collapse; font-size:.95rem; margin:.4rem 0'>
-  <thead>
-    <tr style='background:#f9fafb;color:#374151'>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>No DN</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Vendor</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Tanggal Stuffing</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Closing Date</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Shipping Point</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Container</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:right'>Jumlah Container</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:center; background:#e6f4ea'>Accept</th>
-      <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:center; background:#fde2e1'>Reject</th>
-    </tr>
-  </thead>
-  <tbody>
-{tbody_rows}
-  </tbody>
-</table>"""
-        st.markdown(table_html, unsafe_allow_html=True)
+    METRICS.rows(len(rekap_orders))
+    if rekap_orders:
+        page_orders = paginate(rekap_orders, "rekap_page", page_size)
+        st.markdown(rekap_table_html(page_orders, order_counters()), unsafe_allow_html=True)
     else:
         st.info("Tidak ada data pada filter ini.")
 
@@ -544,6 +858,13 @@ def admin_order_to_vendor():
 # =============================
 # ADMIN — Status Truck
 # =============================
+# kolom store → judul kolom tabel Status Truck
+STATUS_TRUCK_COLS = {
+    "no": "no.", "size": "jenis container", "no_container": "no. container", "no_seal": "no.seal",
+    "no_mobil": "no.mobil", "nama_supir": "nama supir", "contact": "contact", "depo": "depo", "status": "status",
+}
+
+@timed()
 def admin_status_truck():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">🚛 Admin — Status Truck</h3>
@@ -561,13 +882,45 @@ def admin_status_truck():
         with c1: start = st.date_input("Start", value=anchor - dt.timedelta(days=7), key="status_start")
         with c2: end = st.date_input("End", value=anchor, key="status_end")
 
-    orders = [o for o in st.session_state.orders if start <= to_date(o["tgl_stuffing"]) <= end]
+    # Export (xlsx/CSV) — file dibuat saat tombol diklik, di-stream ke file sementara
+    with st.expander("⬇️ Export Order & Detail Container"):
+        e1, e2, e3 = st.columns(3)
+        with e1: ex_vendor = st.selectbox("Vendor", ["-- Semua --"] + vendors(), key="export_vendor")
+        with e2: ex_start = st.date_input("Dari", value=start, key="export_start")
+        with e3: ex_end = st.date_input("Sampai", value=end, key="export_end")
+        ex_orders = order_index().between(
+            ex_start.strftime(DATE_FMT), ex_end.strftime(DATE_FMT),
+            vendor=None if ex_vendor == "-- Semua --" else ex_vendor,
+        )
+        st.caption(f"{len(ex_orders)} order pada filter ini.")
+        fname = f"orders_{ex_start.strftime('%Y%m%d')}_{ex_end.strftime('%Y%m%d')}"
+        d1, d2 = st.columns(2)
+        d1.download_button(
+            "Excel (.xlsx)", data=lambda: export.to_bytes(export.write_xlsx, export.iter_rows(ex_orders, get_store())),
+            file_name=f"{fname}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="export_xlsx", on_click="ignore", disabled=not ex_orders,
+        )
+        d2.download_button(
+            "CSV", data=lambda: export.to_bytes(export.write_csv, export.iter_rows(ex_orders, get_store())),
+            file_name=f"{fname}.csv", mime="text/csv", key="export_csv", on_click="ignore", disabled=not ex_orders,
+        )
+
+    live_watch("status_truck", ("orders",), "🔄 Data order diperbarui.")
+    status_truck_list(start.strftime(DATE_FMT), end.strftime(DATE_FMT))
+
+@fragment(key="status_truck_list")
+def status_truck_list(start: str, end: str):
+    # Daftar DN + tabel container; ikut berubah saat vendor update status/detail (lewat live_watch)
+    orders = order_index().between(start, end)
+    METRICS.rows(len(orders))
     if not orders:
         st.info("Tidak ada order pada periode ini."); return
 
-    dn_map = {o["no_dn"]: o for o in orders}
-    dn_selected = st.selectbox("Pilih No.DN", list(dn_map.keys()), key="status_dn")
-    order = dn_map[dn_selected]
+    # key = order_id: satu DN bisa dipecah ke beberapa vendor (alokasi otomatis) dengan No.DN yang sama
+    by_id = {o["order_id"]: o for o in orders}
+    oid = st.selectbox("Pilih No.DN", list(by_id), key="status_dn",
+                       format_func=lambda k: f"{by_id[k]['no_dn']} — {by_id[k]['vendor']} ({k})")
+    order = by_id[oid]
 
     st.markdown("---")
     st.write(
@@ -575,69 +928,199 @@ def admin_status_truck():
         f"**20ft:** {order['jml_20ft']} | **40ft/HC:** {order['jml_40ft']} | **Status Order:** {order['summary_status']}"
     )
 
-    items = st.session_state.containers.get(order["order_id"], [])
-    # Hanya baris yang di-OK (accept=True)
-    items = [r for r in items if r.get("accept") is True]
-    tbl = [{
-        "no.": r["no"], "jenis container": r["size"], "no. container": r["no_container"],
-        "no.seal": r["no_seal"], "no.mobil": r["no_mobil"], "nama supir": r["nama_supir"],
-        "contact": r["contact"], "depo": r["depo"], "status": r["status"],
-    } for r in items]
-    st.dataframe(pd.DataFrame(tbl), use_container_width=True)
+    def build():
+        # Frame kolumnar dari store; hanya baris yang di-OK (accept=True)
+        df = get_store().containers_frame(order["order_id"])
+        df = df[df["accept"] == ACCEPT_CODES[True]].rename(columns=STATUS_TRUCK_COLS)
+        return df[list(STATUS_TRUCK_COLS.values())]
+    st.dataframe(cached_view("status_truck", order["order_id"], build, topic=f"order:{order['order_id']}"),
+                 use_container_width=True, hide_index=True)
+
+    if st.toggle("⏱️ Durasi per status & riwayat", key="status_audit"):
+        status_audit(order)
+
+def status_audit(order: dict):
+    import pandas as pd
+
+    log = get_audit()
+    oid = order["order_id"]
+    # durasi (jam) per container, total order, dan total vendor
+    rows = []
+    for r in get_store().get_containers(oid):
+        if r["accept"] is True:
+            rows.append({"No.": str(r["no"]), **log.time_in_status(oid, r["no"])})
+    rows.append({"No.": "Order", **log.time_in_status(oid)})
+    rows.append({"No.": f"Vendor {order['vendor']}", **log.time_in_status(vendor=order["vendor"])})
+    df = pd.DataFrame(rows).set_index("No.")
+    df = (df[[s for s in STATUS_TRUCKING if s in df.columns]] / 3600).round(1)
+    st.caption("Lama di tiap status (jam)")
+    st.dataframe(df, use_container_width=True)
+
+    # posisi container pada jam tertentu
+    c1, c2 = st.columns(2)
+    with c1: day = st.date_input("Tanggal", value=dt.date.today(), key="audit_day")
+    with c2: at = st.time_input("Jam", value=dt.time(14, 0), key="audit_time")
+    # scan log hanya saat order ini berubah (fragment status truck rerun tiap LIVE_SECONDS)
+    hist = cached_view("audit_history", oid, lambda: log.history(oid), topic=f"order:{oid}")
+    state = log.state_at(oid, dt.datetime.combine(day, at).timestamp(), events=hist)
+    if state:
+        st.dataframe(pd.DataFrame([{"No.": no, **f} for no, f in sorted(state.items())]).rename(columns=STATUS_TRUCK_COLS),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.caption("Belum ada riwayat sebelum waktu tsb.")
+    with st.expander("Riwayat perubahan"):
+        df_hist = pd.DataFrame(hist, columns=["ts", "user", "no", "field", "value"])
+        df_hist["ts"] = [dt.datetime.fromtimestamp(t).strftime("%d/%m/%Y %H:%M:%S") for t in df_hist["ts"]]
+        st.dataframe(df_hist, use_container_width=True, hide_index=True)
 
 # =============================
-# VENDOR — Home
+# ADMIN — Analitik Vendor
 # =============================
+KPI_COLS = {
+    "vendor": "Vendor", "week": "Minggu", "shipping_point": "Shipping Point", "orders": "Order",
+    "n": "Container", "accept_ratio": "Accept ratio", "partial_rate": "Partial rate",
+    "lead_h": "Order → gate in port (jam)", "declared": "Ketersediaan diisi", "booked": "Dipesan",
+    "utilization": "Terpakai",
+}
 
+def analytics_base():
+    # jumlah mentah per (vendor, minggu, shipping point) seluruh histori; dibangun ulang per versi data
+    from planner import analytics
 
-# --- Helper to ensure calendar cells are full-filled with colors ---
-def inject_calendar_css():
-    st.markdown(
-        """
-        <style>
-        .cal-head { font-weight: 600; text-align:center; padding:.25rem 0 .5rem 0; }
-        .cal-cell { 
-            border: 2px solid #e11d48; 
-            border-radius: 12px; 
-            padding: .5rem; 
-            min-height: 110px; 
-            background: #fee2e2; /* default: ≤50% */
-            display: flex; 
-            flex-direction: column; 
-            justify-content: space-between;
-        }
-        .cal-cell.ok { 
-            border-color: #16a34a; 
-            background: #dcfce7; /* >0 for vendor; >50% for admin if sudah */
-        }
-        .cal-cell.today { 
-            box-shadow: inset 0 0 0 3px #2563eb; /* ring for today */
-        }
-        .cal-num { 
-            background: rgba(255,255,255,.8);
-            border-radius: 8px;
-            padding: .1rem .45rem;
-            display:inline-block;
-        }
-        .cal-total {
-            background: rgba(255,255,255,.8);
-            border-radius: 8px;
-            padding: .1rem .45rem;
-            font-variant-numeric: tabular-nums;
-        }
-        </style>
-        """, unsafe_allow_html=True
+    return cached_view("analytics_base", None, lambda: analytics.base_frame(
+        order_index().all(), order_counters().counts(), get_audit().entered(STATUS_TRUCKING[-1])))
+
+@timed()
+def admin_vendor_analytics():
+    import pandas as pd
+
+    from planner import analytics
+
+    st.markdown("""
+        <div class="main-header"><h3 style="margin:0">📊 Admin — Analitik Vendor</h3>
+        <div class="small">Accept ratio, partial, ketersediaan vs dipesan, dan lama order sampai gate in port</div></div>
+    """, unsafe_allow_html=True)
+
+    anchor = to_date(st.session_state.selected_date_admin)
+    c1, c2, c3, c4 = st.columns([1, 1, 1.5, 1.5])
+    with c1: start = st.date_input("Dari", value=anchor - dt.timedelta(weeks=12), key="kpi_start")
+    with c2: end = st.date_input("Sampai", value=anchor, key="kpi_end")
+    with c3: sel_vendors = st.multiselect("Vendor", vendors(), key="kpi_vendors", placeholder="Semua vendor")
+    with c4: dims = st.multiselect("Kelompokkan per", list(analytics.DIMS), default=["Vendor"], key="kpi_dims")
+    by = [analytics.DIMS[d] for d in dims]
+
+    base = analytics_base()
+    week_lo = pd.Timestamp(start - dt.timedelta(days=start.weekday()))
+    mask = base["week"].between(week_lo, pd.Timestamp(end))
+    if sel_vendors:
+        mask &= base["vendor"].isin(sel_vendors)
+    base = base[mask]
+    if base.empty:
+        st.info("Belum ada order pada periode ini."); return
+
+    pct = st.column_config.NumberColumn(format="percent")
+    kpi = analytics.kpis(base, by)
+    kpi["lead_h"] = kpi["lead_h"].round(1)
+    st.dataframe(
+        kpi[by + ["orders", "n", "accept_ratio", "partial_rate", "lead_h"]].rename(columns=KPI_COLS),
+        use_container_width=True, hide_index=True,
+        column_config={KPI_COLS["accept_ratio"]: pct, KPI_COLS["partial_rate"]: pct,
+                       KPI_COLS["week"]: st.column_config.DateColumn(format="DD/MM/YYYY")},
     )
 
+    if "week" in by:
+        trend = analytics.kpis(base, ["week", "vendor"])[["week", "vendor", "accept_ratio"]]
+        st.caption("Accept ratio per minggu")
+        # spec vega-lite langsung (st.line_chart lewat Altair + validasi schema ±0.2 s per rerun)
+        st.vega_lite_chart(trend, {
+            "mark": {"type": "line", "point": True},
+            "encoding": {
+                "x": {"field": "week", "type": "temporal", "title": None},
+                "y": {"field": "accept_ratio", "type": "quantitative", "axis": {"format": "%"}, "title": None},
+                "color": {"field": "vendor", "type": "nominal", "title": "Vendor"},
+            },
+        }, use_container_width=True)
+
+    st.markdown("#### Ketersediaan diisi vs dipesan")
+    avail = cached_view("analytics_avail", (start, end), lambda: analytics.availability_frame(
+        get_store().availability_rows(week_lo.strftime(DATE_FMT), end.strftime(DATE_FMT))), topic="availability")
+    if sel_vendors:
+        avail = avail[avail["vendor"].isin(sel_vendors)]
+    util = analytics.utilization(base, avail, by_week="week" in by)
+    st.dataframe(util.rename(columns=KPI_COLS), use_container_width=True, hide_index=True,
+                 column_config={KPI_COLS["utilization"]: pct,
+                                KPI_COLS["week"]: st.column_config.DateColumn(format="DD/MM/YYYY")})
+
+# =============================
+# ADMIN — Diagnostics
+# =============================
+# kolom METRICS.summary() → judul kolom
+DIAG_COLS = {
+    "fn": "Fungsi", "calls": "Panggilan", "errors": "Error", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+    "p99_ms": "p99 (ms)", "max_ms": "Max (ms)", "rows_per_call": "Baris/panggilan", "state_bytes": "Session state (byte)",
+    "window": "Sampel",
+}
+
+@timed()
+def admin_diagnostics():
+    import pandas as pd
+
+    st.markdown("""
+        <div class="main-header"><h3 style="margin:0">🩺 Admin — Diagnostics</h3>
+        <div class="small">Waktu eksekusi per fungsi di worker ini (ring buffer sampel terakhir).</div></div>
+    """, unsafe_allow_html=True)
+    show_flash()
+    rows = METRICS.summary()
+    if rows:
+        df = pd.DataFrame(rows).sort_values("p95_ms", ascending=False)[list(DIAG_COLS)].rename(columns=DIAG_COLS)
+        num = st.column_config.NumberColumn(format="%.1f")
+        st.dataframe(df, use_container_width=True, hide_index=True,
+                     column_config={DIAG_COLS[k]: num for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms", "rows_per_call")})
+    else:
+        st.info("Belum ada sampel.")
+    st.caption(f"PID worker {os.getpid()} · maks {METRICS.size} sampel per fungsi · "
+               + (f"export Prometheus ke {os.environ['TRUCK_METRICS_FILE']}" if os.environ.get("TRUCK_METRICS_FILE")
+                  else "set TRUCK_METRICS_FILE untuk export berkala"))
+    c1, c2 = st.columns(2)
+    c1.download_button("⬇️ Prometheus (.prom)", data=METRICS.prometheus(), file_name="truckfinal.prom",
+                       mime="text/plain", key="diag_prom", on_click="ignore")
+    if c2.button("Reset sampel", key="diag_reset"):
+        METRICS.reset()
+        st.rerun()
+
+    st.markdown("#### 📨 Notifikasi (outbox)")
+    pool = get_notifier()
+    if pool is None:
+        st.caption("Tidak aktif — set TRUCK_NOTIFY_SMTP dan/atau TRUCK_NOTIFY_WEBHOOK.")
+        return
+    stats = pool.outbox.stats()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Antri", stats["pending"])
+    m2.metric("Jatuh tempo", stats["due"])
+    m3.metric("Terkirim", stats["sent"])
+    m4.metric("Gagal permanen", stats["dead"])
+    st.caption(f"Channel: {', '.join(pool.senders)} · {pool.workers} thread pengirim · batch {pool.batch}")
+    failures = pool.outbox.failures()
+    if failures:
+        st.dataframe(pd.DataFrame(failures)[["id", "channel", "recipient", "subject", "status", "attempts", "error"]],
+                     use_container_width=True, hide_index=True)
+    if stats["dead"] and st.button("🔁 Kirim ulang yang gagal permanen", key="diag_requeue"):
+        flash(f"{pool.outbox.requeue_dead()} notifikasi dijadwalkan ulang.")
+        pool.wake()
+        st.rerun()
+
+# =============================
+# VENDOR — Home
+# =============================
 
 
+@timed()
 def vendor_home():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">🏠 Vendor — Home</h3>
         <div class="small">Kalender & update ketersediaan container</div></div>
     """, unsafe_allow_html=True)
-
-    inject_calendar_css()
+    show_flash()
 
     vendor_name = st.session_state.get("vendor_name") or "UNKNOWN"
     # Pilihan bulan & tahun sederhana (default: bulan ini)
@@ -655,55 +1138,30 @@ def vendor_home():
             year = today.year
         year  = st.selectbox("Pilih Tahun", years, index=years.index(year), key="v_home_year")
 
-    # --- Render Kalender (7 kolom)
+    # --- Render Kalender (satu komponen, klik tanggal = pilih)
     st.markdown("<div class='card'>", unsafe_allow_html=True)
-    cols = st.columns(7)
-    for i, name in enumerate(["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"]):
-        cols[i].markdown(f"<div class='cal-head'>{name}</div>", unsafe_allow_html=True)
-
-    cal = calendar.monthcalendar(year, month)
-    for week in cal:
-        cols = st.columns(7)
-        for i, d in enumerate(week):
-            with cols[i]:
-                if d == 0:
-                    st.write("")
-                    continue
-                the_date = dt.date(year, month, d)
-                s = the_date.strftime(DATE_FMT)
-
-                data = st.session_state.availability.get(s, {})
-                row = data.get(vendor_name, {"20ft": 0, "40ft/HC": 0})
-                total_20 = int(row.get("20ft", 0))
-                total_40 = int(row.get("40ft/HC", 0))
-                total_all = total_20 + total_40
-
-                # Vendor: hijau bila ada stok (>0), merah bila 0
-                ok = total_all > 0
-                is_today = (the_date == dt.date.today())
-
-                classes = "cal-cell " + ("ok " if ok else "") + ("today" if is_today else "")
-                st.markdown(
-    f"<div class='{classes}' style=\"--lbl20:'20ft : {total_20}'; --lbl40:'40ft/HC: {total_40}';\">",
-    unsafe_allow_html=True
-)
-                top = st.columns([1,1])
-                with top[0]:
-                    st.markdown(f"<div class='cal-num'>{d}</div>", unsafe_allow_html=True)
-                with top[1]:
-                    st.markdown("<div style='display:none'></div>", unsafe_allow_html=True)
-
-                if st.button("Pilih", key=f"v_pick_{s}"):
-                    st.session_state.selected_date_vendor = s
-                    st.rerun()
-
-                st.markdown("</div>", unsafe_allow_html=True)
+    # satu query untuk sebulan (bukan get_availability per tanggal)
+    lo = dt.date(year, month, 1).strftime(DATE_FMT)
+    hi = dt.date(year, month, calendar.monthrange(year, month)[1]).strftime(DATE_FMT)
+    mine = cached_view("vendor_month_av", (vendor_name, lo), lambda: {
+        d: (int(a20), int(a40)) for d, v, a20, a40 in get_store().availability_rows(lo, hi) if v == vendor_name
+    }, topic="availability")
+
+    picked = calendar_month(
+        year, month,
+        totals=lambda s: mine.get(s, (0, 0)),
+        is_ok=lambda t20, t40: t20 + t40 > 0,  # Vendor: hijau bila ada stok (>0), merah bila 0
+        selected=st.session_state.get("selected_date_vendor"),
+        key="cal_vendor",
+    )
+    if picked:
+        st.session_state.selected_date_vendor = picked
     st.markdown("</div>", unsafe_allow_html=True)
 
     # --- Panel input untuk tanggal terpilih (khusus vendor yang login)
     selected = st.session_state.get("selected_date_vendor") or dt.date(year, month, 1).strftime(DATE_FMT)
     st.subheader(f"Ketersediaan Container Anda — {selected}")
-    avail = st.session_state.availability.get(selected, {})
+    avail = get_store().get_availability(selected)
     current = avail.get(vendor_name, {"20ft": 0, "40ft/HC": 0})
 
     c1, c2 = st.columns(2)
@@ -712,15 +1170,95 @@ def vendor_home():
     with c2:
         a40 = st.number_input("Jumlah container 40ft/HC", min_value=0, value=int(current.get("40ft/HC", 0)), key=f"v_av40_{selected}")
 
+    left = get_store().get_remaining(selected).get(vendor_name)
+    if left:
+        st.caption(f"Sudah dipesan: 20ft {int(current['20ft']) - left['20ft']}, "
+                   f"40ft/HC {int(current['40ft/HC']) - left['40ft/HC']}")
+
     if st.button("Simpan Ketersediaan", key=f"save_av_{selected}"):
-        st.session_state.availability.setdefault(selected, {})[vendor_name] = {"20ft": int(a20), "40ft/HC": int(a40)}
-        st.success(f"Ketersediaan {vendor_name} diperbarui untuk {selected}.")
-        st.rerun()
+        try:
+            save_availability(selected, vendor_name, a20, a40)
+        except CapacityError as e:
+            st.error(str(e))
+        else:
+            st.success(f"Ketersediaan {vendor_name} diperbarui untuk {selected}.")
+            st.rerun()
+
+    vendor_bulk_availability(vendor_name, year, month)
+
+WEEKDAYS = ["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"]
+
+def _save_bulk_availability(vendor_name: str, rows: list):
+    try:
+        save_availability_many(vendor_name, rows)
+    except CapacityError as e:
+        st.error(f"{e} Tidak ada tanggal yang disimpan.")
+    else:
+        flash(f"Ketersediaan {vendor_name} diperbarui untuk {len(rows)} tanggal.")
+        st.rerun()  # kalender ikut diperbarui
+
+@fragment(key="vendor_bulk_availability")
+def vendor_bulk_availability(vendor_name: str, year: int, month: int):
+    # Banyak tanggal sekaligus (grid sebulan / aturan berulang / upload) → satu kali simpan
+    import pandas as pd
+
+    from planner import bulk_import
+
+    with st.expander("🗓️ Isi Ketersediaan Massal"):
+        t_grid, t_rule, t_file = st.tabs(["Grid Bulan", "Aturan Berulang", "Upload CSV/Excel"])
+
+        with t_grid:
+            days = [dt.date(year, month, d) for d in range(1, calendar.monthrange(year, month)[1] + 1)]
+            lo, hi = days[0].strftime(DATE_FMT), days[-1].strftime(DATE_FMT)
+            mine = {d: (a20, a40) for d, v, a20, a40 in get_store().availability_rows(lo, hi) if v == vendor_name}
+            keys = [d.strftime(DATE_FMT) for d in days]
+            grid = pd.DataFrame({
+                "Tanggal": keys, "Hari": [WEEKDAYS[d.weekday()] for d in days],
+                "20ft": [mine.get(k, (0, 0))[0] for k in keys], "40ft/HC": [mine.get(k, (0, 0))[1] for k in keys],
+            })
+            edited = st.data_editor(
+                grid, hide_index=True, use_container_width=True, disabled=["Tanggal", "Hari"],
+                key=f"bulk_grid_{year}_{month}",
+                column_config={c: st.column_config.NumberColumn(c, min_value=0, step=1, required=True)
+                               for c in ("20ft", "40ft/HC")},
+            )
+            changed = edited[(edited["20ft"] != grid["20ft"]) | (edited["40ft/HC"] != grid["40ft/HC"])]
+            st.caption(f"{len(changed)} tanggal diubah.")
+            if st.button("Simpan Grid", key="bulk_grid_save", disabled=changed.empty):
+                _save_bulk_availability(vendor_name, list(changed[["Tanggal", "20ft", "40ft/HC"]].itertuples(index=False, name=None)))
+
+        with t_rule:
+            c1, c2 = st.columns(2)
+            start = c1.date_input("Dari tanggal", value=dt.date.today(), key="bulk_rule_start")
+            end = c2.date_input("Sampai tanggal", value=dt.date.today() + dt.timedelta(days=30), key="bulk_rule_end")
+            on_days = st.multiselect("Hari", WEEKDAYS, default=WEEKDAYS[:5], key="bulk_rule_days")
+            c3, c4 = st.columns(2)
+            r20 = c3.number_input("Jumlah container 20ft", min_value=0, value=0, key="bulk_rule_20")
+            r40 = c4.number_input("Jumlah container 40ft/HC", min_value=0, value=0, key="bulk_rule_40")
+            dates = [start + dt.timedelta(days=i) for i in range((end - start).days + 1)]
+            dates = [d.strftime(DATE_FMT) for d in dates if WEEKDAYS[d.weekday()] in on_days]
+            st.caption(f"{len(dates)} tanggal akan diisi {r20}×20ft, {r40}×40ft/HC.")
+            if st.button("Terapkan Aturan", key="bulk_rule_save", disabled=not dates):
+                _save_bulk_availability(vendor_name, [(d, r20, r40) for d in dates])
+
+        with t_file:
+            st.caption("Kolom: " + ", ".join(bulk_import.AVAIL_COLUMNS) + ". Satu baris per tanggal.")
+            up = st.file_uploader("File ketersediaan", type=["xlsx", "csv"], key="bulk_av_file")
+            if up is not None:
+                report = bulk_import.read_availability(up.getvalue(), up.name)
+                ok = report[report["error"] == ""]
+                bad = report[report["error"] != ""]
+                if not bad.empty:
+                    st.error(f"{len(bad)} baris dilewati.")
+                    st.dataframe(bad, use_container_width=True, hide_index=True)
+                if st.button(f"Simpan {len(ok)} tanggal", key="bulk_file_save", disabled=ok.empty):
+                    _save_bulk_availability(vendor_name, list(ok[["tanggal", "jml_20ft", "jml_40ft"]].itertuples(index=False, name=None)))
 
 
 # =============================
 # VENDOR — Orderan (accept/reject) — hanya melihat order vendor sendiri
 # =============================
+@timed()
 def vendor_orderan():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">📑 Vendor — Orderan</h3>
@@ -732,84 +1270,90 @@ def vendor_orderan():
         st.error("Akun vendor tidak dikenali.")
         return
 
-    orders = [o for o in st.session_state.orders if o["vendor"] == vendor_name]
+    # order baru dari Admin muncul tanpa klik/refresh
+    live_watch("vendor_orderan", (f"vendor:{vendor_name}",), "📥 Orderan diperbarui.")
+    vendor_orderan_list(vendor_name)
+
+@fragment(key="vendor_orderan_list")
+def vendor_orderan_list(vendor_name: str):
+    # Tabel + aksi per order (expander dipaginasi); ganti halaman hanya merender ulang bagian ini
+    import pandas as pd
+
+    orders = order_index().by_vendor(vendor_name)
+    METRICS.rows(len(orders))
     if not orders:
         st.info("Belum ada order dari Admin untuk vendor Anda.")
         return
 
-    df = pd.DataFrame([{
+    df = cached_view("vendor_orderan", vendor_name, lambda: pd.DataFrame([{
         "Order ID": o["order_id"], "Vendor": o["vendor"], "No.DN": o["no_dn"],
         "Tgl Stuffing": o["tgl_stuffing"], "Closing": o["closing_date"],
         "Shipping Point": o["shipping_point"], "20ft": o["jml_20ft"],
         "40ft/HC": o["jml_40ft"], "Status": o["summary_status"],
-    } for o in orders])
+    } for o in orders]), topic=f"vendor:{vendor_name}")
     st.dataframe(df, use_container_width=True)
 
     st.markdown("---")
     st.subheader("Aksi per Order")
+    page_size = st.selectbox("Order per halaman", [10, 25, 50, 100], index=1, key="orderan_page_size")
+    for o in paginate(orders, "orderan_page", page_size):
+        order_actions(o)
+
+def _hide_partial(order_id: str):
+    st.session_state[f"show_partial_{order_id}"] = False
+
+@fragment(key="vendor_order_actions")
+def order_actions(o: dict):
+    # Satu fragment per order: Others/Cancel/isi jumlah hanya merender ulang expander ini;
+    # Accept/Reject/OK menulis data → rerun penuh (tabel & status ikut berubah)
+    with st.expander(f"{o['order_id']} — DN: {o['no_dn']} — Vendor: {o['vendor']}"):
+        c1, c2, c3 = st.columns(3)
 
-    for o in orders:
-        with st.expander(f"{o['order_id']} — DN: {o['no_dn']} — Vendor: {o['vendor']}"):
-            c1, c2, c3 = st.columns(3)
-
-            if c1.button("Reject", key=f"rej_{o['order_id']}"):
-                for r in st.session_state.containers[o["order_id"]]: r["accept"] = False
-                update_order_summary(o["order_id"]); st.success("Order ditolak."); st.rerun()
-            if c2.button("Accept", key=f"acc_{o['order_id']}"):
-                for r in st.session_state.containers[o["order_id"]]:
-                    r["accept"] = True
-                    if r.get("status", STATUS_TRUCKING[0]) == STATUS_TRUCKING[0]:
-                        r["status"] = STATUS_TRUCKING[1]
-                update_order_summary(o["order_id"]); st.success("Order diterima."); st.rerun()
-            if c3.button("Others", key=f"oth_{o['order_id']}"):
-                st.session_state[f"show_partial_{o['order_id']}"] = True
-
-            if st.session_state.get(f"show_partial_{o['order_id']}", False):
-                total_20, total_40 = o["jml_20ft"], o["jml_40ft"]
-                p1, p2 = st.columns(2)
-                with p1:
-                    take_20 = st.number_input("Ambil 20ft", min_value=0, max_value=total_20, value=min(1, total_20), key=f"p20_{o['order_id']}")
-                with p2:
-                    take_40 = st.number_input("Ambil 40ft/HC", min_value=0, max_value=total_40, value=min(1, total_40), key=f"p40_{o['order_id']}")
-                col_ok, col_cancel = st.columns(2)
-                with col_ok:
-                    if st.button("OK", key=f"ok_{o['order_id']}"):
-                        cnt20, cnt40 = int(take_20), int(take_40)
-                        for r in st.session_state.containers[o["order_id"]]:
-                            if r["size"] == "20ft" and cnt20 > 0:
-                                r["accept"] = True; cnt20 -= 1
-                                if r.get("status", STATUS_TRUCKING[0]) == STATUS_TRUCKING[0]:
-                                    r["status"] = STATUS_TRUCKING[1]
-                            elif r["size"] == "40ft/HC" and cnt40 > 0:
-                                r["accept"] = True; cnt40 -= 1
-                                if r.get("status", STATUS_TRUCKING[0]) == STATUS_TRUCKING[0]:
-                                    r["status"] = STATUS_TRUCKING[1]
-                            else:
-                                r["accept"] = False
-                        update_order_summary(o["order_id"])
+        if c1.button("Reject", key=f"rej_{o['order_id']}"):
+            reject_order(o["order_id"]); st.success("Order ditolak."); st.rerun()
+        if c2.button("Accept", key=f"acc_{o['order_id']}"):
+            try:
+                accept_order(o["order_id"])  # baris yang tadinya Reject memakai kapasitas lagi
+            except CapacityError as e:
+                st.error(str(e))
+            else:
+                st.success("Order diterima."); st.rerun()
+        if c3.button("Others", key=f"oth_{o['order_id']}"):
+            st.session_state[f"show_partial_{o['order_id']}"] = True
+
+        if st.session_state.get(f"show_partial_{o['order_id']}", False):
+            total_20, total_40 = o["jml_20ft"], o["jml_40ft"]
+            p1, p2 = st.columns(2)
+            with p1:
+                take_20 = st.number_input("Ambil 20ft", min_value=0, max_value=total_20, value=min(1, total_20), key=f"p20_{o['order_id']}")
+            with p2:
+                take_40 = st.number_input("Ambil 40ft/HC", min_value=0, max_value=total_40, value=min(1, total_40), key=f"p40_{o['order_id']}")
+            col_ok, col_cancel = st.columns(2)
+            with col_ok:
+                if st.button("OK", key=f"ok_{o['order_id']}"):
+                    try:
+                        partial_accept_order(o["order_id"], take_20, take_40)
+                    except CapacityError as e:
+                        st.error(str(e))
+                    else:
                         st.session_state[f"show_partial_{o['order_id']}"] = False
                         st.success("Partial accept tersimpan."); st.rerun()
-                with col_cancel:
-                    if st.button("Cancel", key=f"cancel_{o['order_id']}"):
-                        st.session_state[f"show_partial_{o['order_id']}"] = False
-                        st.rerun()
-
-                # --- Ringkasan hasil isian (per ukuran) ---
-                items_now = st.session_state.containers.get(o["order_id"], [])
-                sum_rows = []
-                for sz in ["20ft","40ft/HC"]:
-                    total = sum(1 for r in items_now if r["size"] == sz)
-                    acc   = sum(1 for r in items_now if r["size"] == sz and r["accept"] is True)
-                    rej   = sum(1 for r in items_now if r["size"] == sz and r["accept"] is False)
-                    pen   = sum(1 for r in items_now if r["size"] == sz and r["accept"] is None)
-                    sum_rows.append({"Container": sz, "Order": total, "Accept": acc, "Reject": rej, "Pending": pen})
-                
-                st.caption("Ringkasan per ukuran (hasil aksi di atas):")
-                # Tabel mini seperti admin: Container | Jumlah Container | Accept | Reject
-                _map = {r["Container"]: r for r in sum_rows}
-                _r20 = _map.get("20ft", {"Order":0, "Accept":0, "Reject":0})
-                _r40 = _map.get("40ft/HC", {"Order":0, "Accept":0, "Reject":0})
-                table_html = f"""<table style='width:100%; border-collapse:collapse; font-size:.95rem; margin:.4rem 0'>
+            with col_cancel:
+                st.button("Cancel", key=f"cancel_{o['order_id']}", on_click=_hide_partial, args=(o["order_id"],))
+
+            # --- Ringkasan hasil isian (per ukuran) ---
+            cnt = order_counters().get(o["order_id"])
+            sum_rows = []
+            for sz in ["20ft","40ft/HC"]:
+                c = cnt[sz]
+                sum_rows.append({"Container": sz, "Order": c["total"], "Accept": c["accept"], "Reject": c["reject"], "Pending": c["pending"]})
+            
+            st.caption("Ringkasan per ukuran (hasil aksi di atas):")
+            # Tabel mini seperti admin: Container | Jumlah Container | Accept | Reject
+            _map = {r["Container"]: r for r in sum_rows}
+            _r20 = _map.get("20ft", {"Order":0, "Accept":0, "Reject":0})
+            _r40 = _map.get("40ft/HC", {"Order":0, "Accept":0, "Reject":0})
+            table_html = f"""<table style='width:100%; border-collapse:collapse; font-size:.95rem; margin:.4rem 0'>
   <thead>
     <tr style="background:#f9fafb;color:#374151">
       <th style='border:1px solid #e5e7eb; padding:.5rem .6rem; text-align:left'>Container</th>
@@ -833,11 +1377,12 @@ def vendor_orderan():
     </tr>
   </tbody>
 </table>"""
-                st.markdown(table_html, unsafe_allow_html=True)
+            st.markdown(table_html, unsafe_allow_html=True)
 
 # =============================
 # VENDOR — List Orderan (Add Detail) versi tabel + OK di samping status
 # =============================
+@timed()
 def vendor_list_orderan_add_detail():
     st.markdown("""
         <div class="main-header"><h3 style="margin:0">📋 Vendor — List Orderan (Add Detail)</h3>
@@ -850,15 +1395,11 @@ def vendor_list_orderan_add_detail():
         return
 
     # 1) Tabel List Orderan (hanya milik vendor ini)
-    owned_orders = []
-    for __o in st.session_state.orders:
-        if __o["vendor"] != vendor_name:
-            continue
-        if __o.get("summary_status") not in ("Accepted", "Partial"):
-            continue
-        __rows = st.session_state.containers.get(__o["order_id"], [])
-        if any((isinstance(__r, dict) and __r.get("accept") is True) for __r in __rows):
-            owned_orders.append(__o)
+    counters = order_counters()
+    owned_orders = cached_view("vendor_owned", vendor_name, lambda: [
+        o for o in order_index().by_vendor(vendor_name)
+        if o.get("summary_status") in ("Accepted", "Partial") and counters.totals(o["order_id"])["accept"] > 0
+    ], topic=f"vendor:{vendor_name}")
     if not owned_orders:
         st.info("Belum ada order untuk vendor Anda.")
         return
@@ -867,9 +1408,9 @@ def vendor_list_orderan_add_detail():
     st.markdown("<div class='grid-head'><div>No.DN</div><div>Tgl Stuffing</div><div>Closing</div><div>Shipping Point</div><div>20FT</div><div>40FT/HC</div><div>Aksi</div></div>", unsafe_allow_html=True)
     for o in owned_orders:
         c1, c2, c3, c4, c5, c6, c7 = st.columns([1.2, 1, 1, 1, .8, .8, .8])
-        cont = st.session_state.containers.get(o['order_id'], [])
-        acc20 = sum(1 for r in cont if r.get('size') == '20ft' and r.get('accept') is True)
-        acc40 = sum(1 for r in cont if r.get('size') == '40ft/HC' and r.get('accept') is True)
+        cnt = counters.get(o['order_id'])
+        acc20 = cnt['20ft']['accept']
+        acc40 = cnt['40ft/HC']['accept']
         with c1: st.write(o["no_dn"])  
         with c2: st.write(o["tgl_stuffing"])  
         with c3: st.write(o["closing_date"])  
@@ -877,38 +1418,58 @@ def vendor_list_orderan_add_detail():
         with c5: st.write(acc20)  
         with c6: st.write(acc40)  
         with c7:
-            if st.button("Add Detail", key=f"add_{o['order_id']}"):
-                st.session_state.active_order_for_detail = o["order_id"]
-                st.rerun()
+            st.button("Add Detail", key=f"add_{o['order_id']}", on_click=_open_detail, args=(o["order_id"],))
     st.markdown("</div>", unsafe_allow_html=True)
 
     # 2) Satu TABEL (editable) ala mockup biru
+    vendor_detail_editor(vendor_name)
+
+def _open_detail(order_id: str):
+    st.session_state.active_order_for_detail = order_id
+    st.rerun("vendor_detail_editor")  # list di atas tidak berubah → cukup editor
+
+def _close_detail():
+    st.session_state.active_order_for_detail = None
+
+def _save_detail(order_id: str, df_src: "pd.DataFrame", only_ok: bool):
+    # delta editor (posisi baris → sel yang diedit); hanya sel yang berubah yang disimpan
+    edited_rows = st.session_state[f"editor_{order_id}"]["edited_rows"]
+    n, errors = save_container_details(order_id, editor_changes(df_src, edited_rows, STATUS_TRUCKING, only_ok=only_ok))
+    flash(f"{n} baris bertanda OK tersimpan." if only_ok else f"{n} baris tersimpan.")
+    if errors:
+        flash(f"⚠️ {len(errors)} baris ditolak, lihat detail di atas tabel.")
+        st.session_state.detail_errors = {"order_id": order_id, "rows": errors}
+
+@fragment(key="vendor_detail_editor")
+def vendor_detail_editor(vendor_name: str):
+    # Edit sel / simpan / kembali hanya merender ulang fragment ini (list order tidak ikut dibangun ulang)
+    import pandas as pd
+
+    show_flash()
     selected_id = st.session_state.active_order_for_detail
     if not selected_id:
         return
 
-    order = next((x for x in owned_orders if x["order_id"] == selected_id), None)
-    if not order:
+    counters = order_counters()
+    owned_orders = cached_view("vendor_owned", vendor_name, lambda: [
+        o for o in order_index().by_vendor(vendor_name)
+        if o.get("summary_status") in ("Accepted", "Partial") and counters.totals(o["order_id"])["accept"] > 0
+    ], topic=f"vendor:{vendor_name}")
+    order = order_index().get(selected_id)
+    if not order or order not in owned_orders:
         st.warning("Order tidak ditemukan.")
         return
 
     st.markdown("---")
+    rejected = st.session_state.pop("detail_errors", None)
+    if rejected and rejected["order_id"] == selected_id:
+        st.error("Baris berikut tidak disimpan:\n" + "\n".join(
+            f"- Baris {no}: {' '.join(msgs)}" for no, msgs in sorted(rejected["rows"].items())))
     st.markdown(f"**Vendor:** {order['vendor']} | **DN:** {order['no_dn']} | **Stuffing:** {order['tgl_stuffing']} | **Closing:** {order['closing_date']} | **Shipping Point:** {order['shipping_point']}")
 
-    items = st.session_state.containers.get(selected_id, [])
-    # Hanya tampilkan baris yang sudah di-OK (accept=True)
-    items = [r for r in items if r.get('accept') is True]
-    # hanya yang di-ACCEPT yang bisa diisi
-    accepted = [r for r in items if r.get("accept") is True]
-    if not accepted:
-        st.info("Order ini belum di-ACCEPT. Mohon ACCEPT dulu di menu *Orderan*.")
-        if st.button("⬅️ Kembali ke List"):
-            st.session_state.active_order_for_detail = None
-            st.rerun()
-        return
-
-    # siapkan dataframe editor (semua baris tampil dalam SATU tabel)
-    df_src = pd.DataFrame([
+    # siapkan dataframe editor (semua baris tampil dalam SATU tabel);
+    # hanya baris yang sudah di-ACCEPT yang bisa diisi
+    df_src = cached_view("detail_editor", selected_id, lambda: pd.DataFrame([
         {
             "No.": r["no"],
             "Jenis": r["size"],
@@ -921,16 +1482,21 @@ def vendor_list_orderan_add_detail():
             "Status": r.get("status", STATUS_TRUCKING[0]),
             "OK": False,
         }
-        for r in accepted
-    ])
+        for r in get_store().get_containers(selected_id) if r.get("accept") is True
+    ]), topic=f"order:{selected_id}")
+    if df_src.empty:
+        st.info("Order ini belum di-ACCEPT. Mohon ACCEPT dulu di menu *Orderan*.")
+        st.button("⬅️ Kembali ke List", on_click=_close_detail)
+        return
 
-    edited = st.data_editor(
+    st.data_editor(
         df_src,
         key=f"editor_{selected_id}",
         use_container_width=True,
         num_rows="fixed",
         hide_index=True,
         column_config={
+            "No. Container": st.column_config.TextColumn(help="ISO 6346, mis. MSKU1234565 (check digit dicek)"),
             "Status": st.column_config.SelectboxColumn(options=STATUS_TRUCKING),
             "OK": st.column_config.CheckboxColumn(),
         },
@@ -938,48 +1504,64 @@ def vendor_list_orderan_add_detail():
 
     c1, c2, c3 = st.columns([1,1,1])
     with c1:
-        if st.button("💾 Simpan baris bertanda OK", use_container_width=True):
-            rows = edited.to_dict(orient="records")
-            for row in rows:
-                if not row.get("OK"):  # hanya baris yang dicentang OK
-                    continue
-                no = row["No."]
-                for r in items:
-                    if r["no"] == no and r.get("accept") is True:
-                        r["no_container"] = str(row.get("No. Container", ""))
-                        r["no_seal"] = str(row.get("No. Seal", ""))
-                        r["no_mobil"] = str(row.get("No. Mobil", ""))
-                        r["nama_supir"] = str(row.get("Nama Supir", ""))
-                        r["contact"] = str(row.get("Contact", ""))
-                        r["depo"] = str(row.get("Depo", ""))
-                        # validasi Status agar tetap di list
-                        status_val = row.get("Status", STATUS_TRUCKING[0])
-                        r["status"] = status_val if status_val in STATUS_TRUCKING else STATUS_TRUCKING[0]
-                        break
-            st.toast("Baris bertanda OK tersimpan.")
-            st.rerun()
+        # hanya baris yang dicentang OK, dan hanya sel yang berubah
+        st.button("💾 Simpan baris bertanda OK", use_container_width=True,
+                  on_click=_save_detail, args=(selected_id, df_src, True))
     with c2:
-        if st.button("💾 Simpan SEMUA baris", use_container_width=True):
-            rows = edited.to_dict(orient="records")
-            for row in rows:
-                no = row["No."]
-                for r in items:
-                    if r["no"] == no and r.get("accept") is True:
-                        r["no_container"] = str(row.get("No. Container", ""))
-                        r["no_seal"] = str(row.get("No. Seal", ""))
-                        r["no_mobil"] = str(row.get("No. Mobil", ""))
-                        r["nama_supir"] = str(row.get("Nama Supir", ""))
-                        r["contact"] = str(row.get("Contact", ""))
-                        r["depo"] = str(row.get("Depo", ""))
-                        status_val = row.get("Status", STATUS_TRUCKING[0])
-                        r["status"] = status_val if status_val in STATUS_TRUCKING else STATUS_TRUCKING[0]
-                        break
-            st.toast("Semua baris tersimpan.")
-            st.rerun()
+        st.button("💾 Simpan SEMUA baris", use_container_width=True,
+                  on_click=_save_detail, args=(selected_id, df_src, False))
     with c3:
-        if st.button("⬅️ Kembali ke List", use_container_width=True):
-            st.session_state.active_order_for_detail = None
-            st.rerun()
+        st.button("⬅️ Kembali ke List", use_container_width=True, on_click=_close_detail)
+
+# =============================
+# Pencarian global
+# =============================
+SEARCH_FIELDS = {
+    "order_id": "Order ID", "no_dn": "No.DN", "no_container": "no. container", "no_seal": "no.seal",
+    "no_mobil": "no.mobil", "nama_supir": "nama supir", "depo": "depo",
+}
+SEARCH_LIMIT = 50
+
+def _open_search_hit(order_id: str):
+    # vendor: lompat ke editor detail order yang dipilih
+    st.session_state.active_order_for_detail = order_id
+    st.session_state.menu_vendor = "📋 List Orderan (Add Detail)"
+    st.session_state.global_search = ""
+
+@timed()
+def global_search(query: str):
+    import pandas as pd
+
+    vendor = st.session_state.vendor_name if st.session_state.user_role == "vendor" else None
+    idx = order_index()
+    where = (lambda oid: (idx.get(oid) or {}).get("vendor") == vendor) if vendor else None
+    hits = search_index().search(query, limit=SEARCH_LIMIT, where=where)
+    METRICS.rows(len(hits))
+    with st.container(border=True):
+        st.markdown(f"**🔎 Hasil pencarian “{query}”** — {len(hits)}{'+' if len(hits) == SEARCH_LIMIT else ''} hasil")
+        if not hits:
+            st.caption("Tidak ada yang cocok.")
+            return
+        rows = []
+        for h in hits:
+            o = idx.get(h["order_id"]) or {}
+            rows.append({
+                "Order ID": h["order_id"], "No.DN": o.get("no_dn", ""), "Vendor": o.get("vendor", ""),
+                "Tgl Stuffing": o.get("tgl_stuffing", ""), "Container": h["no"] or "",
+                "Cocok di": SEARCH_FIELDS.get(h["field"], h["field"]), "Nilai": h["value"],
+                "Status": o.get("summary_status", ""), "Skor": h["score"],
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True,
+                     column_config={"Skor": st.column_config.ProgressColumn("Skor", min_value=0.0, max_value=1.0,
+                                                                            format="%.2f")})
+        if vendor:
+            order_ids = list(dict.fromkeys(h["order_id"] for h in hits))
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                pick = st.selectbox("Order", order_ids, key="global_search_pick", label_visibility="collapsed")
+            with c2:
+                st.button("📋 Buka Detail", key="global_search_open", use_container_width=True,
+                          on_click=_open_search_hit, args=(pick,))
 
 # =============================
 # Sidebar & Routing
@@ -1001,13 +1583,15 @@ def sidebar():
 
         role = st.session_state.user_role
         if role == "admin":
-            menu = st.radio("Menu", ["🏠 Home", "📦 Order to Vendor", "🚛 Status Truck"], label_visibility="visible", key="menu_admin")
+            menu = st.radio("Menu", ["🏠 Home", "📦 Order to Vendor", "🚛 Status Truck", "📊 Analitik Vendor", "🩺 Diagnostics"], label_visibility="visible", key="menu_admin")
         else:
             menu = st.radio("Menu", ["🏠 Home", "📑 Orderan", "📋 List Orderan (Add Detail)"], label_visibility="visible", key="menu_vendor")
 
+        st.text_input("🔎 Cari", key="global_search", placeholder="DN, order, container, seal, no. mobil, supir, depo")
+
         st.markdown("---")
         if st.button("Logout", use_container_width=True):
-            for k in ["authenticated", "user_role", "username", "vendor_name", "order_vendor_prefill", "show_vendor_detail_admin", "active_order_for_detail"]:
+            for k in ["authenticated", "user_role", "username", "vendor_name", "order_vendor_prefill", "show_vendor_detail_admin", "active_order_for_detail", "global_search"]:
                 st.session_state[k] = None if k not in ["authenticated"] else False
             st.rerun()
 
@@ -1018,13 +1602,23 @@ def sidebar():
 # Entry Point
 # =============================
 
+def session_state_bytes() -> int:
+    # ukuran dangkal per nilai (DataFrame menghitung isinya sendiri lewat __sizeof__)
+    return sum(sys.getsizeof(v) for v in st.session_state.to_dict().values())
+
+@timed(state=session_state_bytes)
 def main():
+    get_broker()  # pasang ChangeFeed, audit log & notifikasi sebelum ada tulis di proses ini
+    get_audit()
+    get_notifier()
     if not st.session_state.authenticated:
         login_page()
         return
 
     menu = sidebar()
     role = st.session_state.user_role
+    if (st.session_state.get("global_search") or "").strip():
+        global_search(st.session_state.global_search.strip())
 
     if role == "admin":
         if menu == "🏠 Home":
@@ -1033,6 +1627,10 @@ def main():
             admin_order_to_vendor()
         elif menu == "🚛 Status Truck":
             admin_status_truck()
+        elif menu == "📊 Analitik Vendor":
+            admin_vendor_analytics()
+        elif menu == "🩺 Diagnostics":
+            admin_diagnostics()
     else:
         if menu == "🏠 Home":
             vendor_home()
@@ -1042,4 +1640,8 @@ def main():
             vendor_list_orderan_add_detail()
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        if os.environ.get("TRUCK_METRICS_FILE"):
+            METRICS.export(os.environ["TRUCK_METRICS_FILE"])
@@ -0,0 +1,91 @@
+"""Kalender: grid lama (st.columns + tombol "Pilih" per hari) vs komponen tunggal.
+
+    python bench/bench_calendar.py [--runs 10]
+
+Membandingkan waktu rerun dan ukuran payload (jumlah elemen & byte proto)
+untuk satu bulan penuh.
+"""
+import argparse
+import json
+
+from common import ROOT, time_runs, tree_stats
+from streamlit.testing.v1 import AppTest
+
+
+def legacy_grid_app(root, year, month):
+    # Salinan render grid lama dari admin_home (sebelum komponen kalender)
+    import calendar
+    import datetime as dt
+    import random
+
+    import streamlit as st
+
+    rnd = random.Random(month)
+    totals = {dt.date(year, month, d).strftime("%Y-%m-%d"): (rnd.randint(0, 120), rnd.randint(0, 60))
+              for d in range(1, calendar.monthrange(year, month)[1] + 1)}
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    cols = st.columns(7)
+    for i, name in enumerate(["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"]):
+        cols[i].markdown(f"<div class='cal-head'>{name}</div>", unsafe_allow_html=True)
+    for week in calendar.monthcalendar(year, month):
+        cols = st.columns(7)
+        for i, d in enumerate(week):
+            with cols[i]:
+                if d == 0:
+                    st.write("")
+                    continue
+                the_date = dt.date(year, month, d)
+                s = the_date.strftime("%Y-%m-%d")
+                total_20, total_40 = totals[s]
+                ok = total_20 + total_40 > 156 * 0.5
+                classes = "cal-cell " + ("ok " if ok else "") + ("today" if the_date == dt.date.today() else "")
+                st.markdown(f"<div class='{classes}' style=\"--lbl20:'20ft : {total_20}'; --lbl40:'40ft/HC: {total_40}';\">",
+                            unsafe_allow_html=True)
+                top = st.columns([1, 1])
+                with top[0]:
+                    st.markdown(f"<div class='cal-num'>{d}</div>", unsafe_allow_html=True)
+                with top[1]:
+                    st.markdown("<div style='display:none'></div>", unsafe_allow_html=True)
+                st.button("Pilih", key=f"pick_admin_{s}")
+                st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def component_app(root, year, month):
+    import calendar
+    import datetime as dt
+    import random
+    import sys
+
+    import streamlit as st
+
+    sys.path.insert(0, root)
+    from planner.calendar_view import calendar_month
+
+    rnd = random.Random(month)
+    totals = {dt.date(year, month, d).strftime("%Y-%m-%d"): (rnd.randint(0, 120), rnd.randint(0, 60))
+              for d in range(1, calendar.monthrange(year, month)[1] + 1)}
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    calendar_month(year, month, totals=totals.__getitem__, is_ok=lambda a, b: a + b > 156 * 0.5, key="cal_admin")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+def bench(app, runs: int) -> dict:
+    at = AppTest.from_function(app, args=(ROOT, 2026, 10), default_timeout=60)
+    at.run()
+    return {**tree_stats(at), **time_runs(at, runs)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+    res = {"legacy_grid": bench(legacy_grid_app, args.runs), "component": bench(component_app, args.runs)}
+    print(json.dumps(res, indent=2))
+    lg, cp = res["legacy_grid"], res["component"]
+    print(f"elemen {lg['elements']} → {cp['elements']} | payload {lg['payload_bytes']} B → {cp['payload_bytes']} B"
+          f" | rerun median {lg['median_ms']} ms → {cp['median_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Latency rerun per interaksi: rerun penuh vs rerun fragment.
+
+    git show <rev>:TruckFinal.py > /tmp/TruckFinal_before.py
+    python bench/bench_fragments.py [--orders 1000] [--runs 5] [--before /tmp/TruckFinal_before.py]
+
+Dataset di-seed seperti bench_pages. Tiap interaksi (pilih tanggal, tombol
+Order, Others/Cancel, Add Detail, simpan detail, ...) diukur dua kali:
+  - full_ms     : `at.run()` penuh setelah interaksi (perilaku sebelum
+                  fragment; pakai `--before` untuk menjalankan versi lama app)
+  - fragment_ms : rerun hanya fragment yang memuat widget tsb, seperti yang
+                  dikirim browser (RerunData.fragment_id_queue)
+AppTest sendiri selalu menjalankan rerun penuh untuk klik widget di dalam
+fragment, jadi rerun fragment di sini disimulasikan lewat RerunData. Bytecode
+script di-cache antar run seperti di server (share_script_cache).
+"""
+import argparse
+import datetime as dt
+import functools
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from common import ROOT, share_script_cache
+from bench_pages import BENCH_VENDOR, _first_key, login, seed
+
+import streamlit as st
+from streamlit.testing.v1 import local_script_runner
+
+APP = os.path.join(ROOT, "TruckFinal.py")
+
+
+@contextmanager
+def fragment_scope(at, key, first: bool = False):
+    """Rerun berikutnya hanya menjalankan fragment `key` (atau call site pertamanya)."""
+    ids = at._fragment_storage.resolve_target(key)
+    orig = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(orig, fragment_id_queue=ids[:1] if first else ids)
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = orig
+
+
+# =============================
+# Interaksi: (nama, menu, prep, act, fragment)
+# =============================
+def _click(key=None, label=None):
+    def act(at):
+        btn = at.button(key=key) if key else next(b for b in at.button if b.label == label)
+        btn.click()
+    return act
+
+
+def _pick_date(at):
+    # sama dengan callback klik kalender (_pick_admin_date)
+    d = dt.date.fromisoformat(at.session_state["selected_date_admin"]) + dt.timedelta(days=1)
+    at.session_state["selected_date_admin"] = d.strftime("%Y-%m-%d")
+    at.session_state["show_vendor_detail_admin"] = True
+
+
+def _shift_date(at):
+    w = at.date_input(key="admin_date_link")
+    w.set_value(w.value + dt.timedelta(days=1))
+
+
+def _next_page(at):
+    w = at.number_input(key="rekap_page")
+    w.set_value(2 if w.value == 1 else 1)
+
+
+def admin_steps():
+    yield "admin_home/pick_date", "🏠 Home", None, _pick_date, ["admin_calendar", "admin_detail"]
+    yield ("admin_order_to_vendor/prefill_vendor", "📦 Order to Vendor", None,
+           _click(key=f"orderbtn_{BENCH_VENDOR}"), "order_form")
+    yield ("admin_order_to_vendor/change_date", "📦 Order to Vendor", None, _shift_date,
+           ["order_availability", "order_form"])
+    yield "admin_order_to_vendor/rekap_page", "📦 Order to Vendor", None, _next_page, "order_rekap"
+
+
+def vendor_steps():
+    def oid(at):
+        return _first_key(at, "oth_")[4:]
+
+    def open_others(at):
+        at.button(key=f"oth_{oid(at)}").click().run()
+
+    yield ("vendor_orderan/others", "📑 Orderan", None,
+           lambda a: a.button(key=f"oth_{oid(a)}").click(), ("vendor_order_actions", True))
+    yield ("vendor_orderan/cancel", "📑 Orderan", open_others,
+           lambda a: a.button(key=f"cancel_{oid(a)}").click(), ("vendor_order_actions", True))
+
+    def add(at):
+        return _first_key(at, "add_")
+
+    def open_detail(at):
+        at.session_state["active_order_for_detail"] = add(at)[4:]
+        at.run()
+
+    def close_detail(at):
+        at.session_state["active_order_for_detail"] = None
+        at.run()
+
+    menu = "📋 List Orderan (Add Detail)"
+    yield "vendor_list_orderan_add_detail/open_detail", menu, close_detail, lambda a: a.button(key=add(a)).click(), "vendor_detail_editor"
+    yield "vendor_list_orderan_add_detail/save_all", menu, open_detail, _click(label="💾 Simpan SEMUA baris"), "vendor_detail_editor"
+    yield "vendor_list_orderan_add_detail/back", menu, open_detail, _click(label="⬅️ Kembali ke List"), "vendor_detail_editor"
+
+
+def _timed(at, runs, prep, act, scope=None) -> float:
+    samples = []
+    for _ in range(runs):
+        if prep:
+            prep(at)
+        act(at)
+        if scope:
+            key, first = scope if isinstance(scope, tuple) else (scope, False)
+            with fragment_scope(at, key, first):
+                t0 = time.perf_counter()
+                at.run()
+        else:
+            t0 = time.perf_counter()
+            at.run()
+        samples.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        at.run()  # tree penuh lagi untuk langkah berikutnya (tidak dihitung)
+    return round(statistics.median(samples), 2)
+
+
+def bench(app_full: str, runs: int) -> dict:
+    res = {}
+    for role, vendor, steps, radio in (("admin", None, admin_steps, "menu_admin"),
+                                       ("vendor", BENCH_VENDOR, vendor_steps, "menu_vendor")):
+        for app, mode in ((app_full, "full_ms"), (APP, "fragment_ms")):
+            at = login(role, vendor, app)
+            for name, menu, prep, act, scope in steps():
+                at.radio(key=radio).set_value(menu).run()
+                ms = _timed(at, runs, prep, act, scope if mode == "fragment_ms" else None)
+                res.setdefault(name, {})[mode] = ms
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--orders", type=int, default=1000)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--before", default=APP, help="versi app untuk kolom full_ms (default: app sekarang)")
+    ap.add_argument("--workdir", default=tempfile.gettempdir())
+    args = ap.parse_args()
+
+    path = os.path.join(args.workdir, f"bench_fragments_{args.orders}.db")
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+    seed(path, args.orders)
+    os.environ["TRUCK_STORE"] = f"sqlite:///{path}"
+    st.cache_resource.clear()
+    share_script_cache()
+
+    res = bench(args.before, args.runs)
+    print(f"{'interaksi':48s} {'full':>10s} {'fragment':>10s}")
+    for name, r in res.items():
+        print(f"{name:48s} {r['full_ms']:>8.1f}ms {r['fragment_ms']:>8.1f}ms  ×{r['full_ms'] / r['fragment_ms']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Benchmark / load test halaman Admin & Vendor (AppTest headless).
+
+    python bench/bench_pages.py [--sizes 1000,10000,100000] [--runs 5]
+                                [--out bench_pages.json] [--compare baseline.json]
+
+Per ukuran dataset: seed SQLite baru (order + container, banyak vendor,
+ketersediaan cukup untuk semua order), lalu jalankan tiap halaman dan tiap
+jalur tombol. Per langkah dicatat:
+  - median_ms / max_ms : wall time satu rerun (`at.run()`)
+  - peak_kb            : puncak alokasi Python (tracemalloc) satu rerun tambahan
+  - elements / widgets / payload_bytes : ukuran tree (≈ delta yang dikirim ke browser)
+Hasil ditulis sebagai JSON; `--compare` mencetak rasio median terhadap file lama.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from common import ROOT, time_runs, tree_stats
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from planner.store import open_store
+
+APP = os.path.join(ROOT, "TruckFinal.py")
+BENCH_VENDOR = "KAMBING"
+VENDORS = ["KAMBING", "BINTANG TIMUR", "CAHAYA LOGISTIK", "MAJU JAYA"] + [f"VENDOR {i:02d}" for i in range(1, 47)]
+STATUS = ["Confirm Order", "otw depo", "muat depo", "otw pabrik", "muat gudang", "gate in port"]
+DAYS = 45  # order tersebar di today ± DAYS
+
+
+# =============================
+# Seed data
+# =============================
+def _container(no, size, accept, status):
+    return {"no": no, "size": size, "accept": accept, "no_container": "", "no_seal": "", "no_mobil": "",
+            "nama_supir": "", "contact": "", "depo": "", "status": status}
+
+
+def seed(path: str, n_orders: int, seed_: int = 7) -> dict:
+    """Isi SQLite `path` dengan `n_orders` order; return ringkasan dataset."""
+    rnd = random.Random(seed_)
+    today = dt.date.today()
+    dates = [(today + dt.timedelta(days=d)).strftime("%Y-%m-%d") for d in range(-DAYS, DAYS + 1)]
+    items, used = [], {}
+    for i in range(n_orders):
+        date = rnd.choice(dates)
+        vendor = BENCH_VENDOR if i % 10 == 0 else rnd.choice(VENDORS)  # vendor uji dapat ±10% order
+        sizes = ["20ft"] * rnd.randint(1, 3) + ["40ft/HC"] * rnd.randint(0, 2)
+        kind = rnd.random()
+        rows = []
+        for no, size in enumerate(sizes, 1):
+            if kind < .4:
+                rows.append(_container(no, size, None, "Pending"))
+            elif kind < .8 or no == 1:
+                rows.append(_container(no, size, True, rnd.choice(STATUS)))
+            else:
+                rows.append(_container(no, size, False, "Pending"))
+        rej = sum(r["accept"] is False for r in rows)
+        summary = "Pending" if kind < .4 else ("Partial" if rej else "Accepted")
+        order = {
+            "order_id": f"ORD-B{i:07d}", "vendor": vendor, "tgl_stuffing": date,
+            "closing_date": (dt.date.fromisoformat(date) + dt.timedelta(days=2)).strftime("%Y-%m-%d"),
+            "no_dn": f"DN{i:07d}", "shipping_point": rnd.choice(["Jakarta", "Surabaya", "Semarang", "Medan"]),
+            "jml_20ft": sizes.count("20ft"), "jml_40ft": sizes.count("40ft/HC"),
+            "created_at": dt.datetime.now(), "summary_status": summary,
+        }
+        u = used.setdefault((date, vendor), [0, 0])
+        for r in rows:
+            if r["accept"] is not False:
+                u[r["size"] != "20ft"] += 1
+        items.append((order, rows))
+
+    store = open_store(f"sqlite:///{path}")
+    # ketersediaan = 2× terpakai + cadangan, jadi order/accept baru di benchmark tidak kena CapacityError
+    for date in dates:
+        for vendor in VENDORS:
+            u = used.get((date, vendor), (0, 0))
+            store.set_availability(date, vendor, 2 * u[0] + 50, 2 * u[1] + 50)
+    for i in range(0, len(items), 5000):
+        store.add_orders(items[i:i + 5000])
+    n_containers = sum(len(rows) for _, rows in items)
+    store.close()
+    return {"orders": n_orders, "containers": n_containers, "vendors": len(VENDORS), "dates": len(dates)}
+
+
+# =============================
+# Skenario: halaman + jalur tombol
+# =============================
+def _today():
+    return dt.date.today().strftime("%Y-%m-%d")
+
+
+def _first_key(at, prefix):
+    keys = [b.key for b in at.button if (b.key or "").startswith(prefix)]
+    return keys[0] if keys else None
+
+
+def _click(key=None, label=None):
+    def act(at):
+        btn = at.button(key=key) if key else next(b for b in at.button if b.label == label)
+        btn.click()
+    return act
+
+
+def _noop(at):
+    pass
+
+
+def _full_run(at):
+    # Callback `st.rerun("<fragment>")` → AppTest hanya menyimpan tree fragment itu;
+    # rerun penuh dulu supaya widget di luar fragment bisa diklik lagi
+    at.run()
+
+
+def admin_steps(at):
+    at.radio(key="menu_admin").set_value("🏠 Home").run()
+    yield "admin_home/rerun", None, _noop
+    yield "admin_home/detail_panel", lambda a: a.session_state.__setitem__("show_vendor_detail_admin", True), _noop
+
+    at.radio(key="menu_admin").set_value("📦 Order to Vendor").run()
+    yield "admin_order_to_vendor/rerun", None, _noop
+    yield "admin_order_to_vendor/prefill_vendor", _full_run, _click(key=f"orderbtn_{BENCH_VENDOR}")
+
+    def fill_form(a):
+        a.selectbox(key="order_vendor").set_value(BENCH_VENDOR)
+        a.text_input(key="order_dn").set_value("DN-BENCH")
+        a.number_input(key="order_j20").set_value(1)
+        a.number_input(key="order_j40").set_value(1)
+    yield "admin_order_to_vendor/create_order", fill_form, _click(label="OK")
+    yield "admin_order_to_vendor/rekap_page_2", None, lambda a: a.number_input(key="rekap_page").set_value(2)
+
+    at.radio(key="menu_admin").set_value("🚛 Status Truck").run()
+    yield "admin_status_truck/rerun", None, _noop
+
+    def other_dn(a):
+        sb = a.selectbox(key="status_dn")
+        sb.select_index(len(sb.options) - 1)
+    yield "admin_status_truck/pick_dn", None, other_dn
+
+
+def vendor_steps(at):
+    at.radio(key="menu_vendor").set_value("🏠 Home").run()
+    yield "vendor_home/rerun", None, _noop
+    today = _today()
+
+    def bump_availability(a):
+        w = a.number_input(key=f"v_av20_{today}")
+        w.set_value(w.value + 1)
+    yield "vendor_home/save_availability", bump_availability, _click(key=f"save_av_{today}")
+
+    at.radio(key="menu_vendor").set_value("📑 Orderan").run()
+    oid = _first_key(at, "acc_")[4:]
+    yield "vendor_orderan/rerun", None, _noop
+    yield "vendor_orderan/accept", None, _click(key=f"acc_{oid}")
+    yield "vendor_orderan/reject", None, _click(key=f"rej_{oid}")
+
+    def open_partial(a):
+        a.button(key=f"oth_{oid}").click().run()
+    yield "vendor_orderan/partial_accept", open_partial, _click(key=f"ok_{oid}")
+
+    at.radio(key="menu_vendor").set_value("📋 List Orderan (Add Detail)").run()
+    add = _first_key(at, "add_")
+    yield "vendor_list_orderan_add_detail/rerun", None, _noop
+
+    def back_to_list(a):
+        a.session_state["active_order_for_detail"] = None
+        a.run()
+    yield "vendor_list_orderan_add_detail/open_detail", back_to_list, _click(key=add)
+
+    def detail_open(a):
+        a.session_state["active_order_for_detail"] = add[4:]
+        a.run()
+    yield "vendor_list_orderan_add_detail/save_all", detail_open, _click(label="💾 Simpan SEMUA baris")
+
+
+def login(role: str, vendor: str = None, app: str = APP) -> AppTest:
+    at = AppTest.from_file(app, default_timeout=600)
+    at.session_state["authenticated"] = True
+    at.session_state["user_role"] = role
+    at.session_state["username"] = "bench"
+    at.session_state["vendor_name"] = vendor
+    at.run()
+    return at
+
+
+def measure(at, prep, act, runs: int) -> dict:
+    def before(a):
+        if prep:
+            prep(a)
+        act(a)
+
+    res = time_runs(at, runs, before)
+    stats = tree_stats(at)
+    before(at)
+    tracemalloc.start()
+    at.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {**res, "peak_kb": peak // 1024, **stats}
+
+
+def bench_size(n_orders: int, runs: int, workdir: str) -> dict:
+    path = os.path.join(workdir, f"bench_{n_orders}.db")
+    for ext in ("", "-wal", "-shm"):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+    t0 = time.perf_counter()
+    info = seed(path, n_orders)
+    info["seed_s"] = round(time.perf_counter() - t0, 2)
+
+    os.environ["TRUCK_STORE"] = f"sqlite:///{path}"
+    st.cache_resource.clear()  # store & projection baru untuk dataset ini
+    steps = {}
+    t0 = time.perf_counter()
+    at = login("admin")
+    info["first_run_s"] = round(time.perf_counter() - t0, 2)  # termasuk rebuild index/counter
+    for name, prep, act in admin_steps(at):
+        steps[name] = measure(at, prep, act, runs)
+        print(f"  {name:45s} {steps[name]['median_ms']:>10.1f} ms")
+    at = login("vendor", BENCH_VENDOR)
+    for name, prep, act in vendor_steps(at):
+        steps[name] = measure(at, prep, act, runs)
+        print(f"  {name:45s} {steps[name]['median_ms']:>10.1f} ms")
+    return {"dataset": info, "steps": steps}
+
+
+def compare(res: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    for size, r in res.items():
+        old = base.get(size, {}).get("steps", {})
+        for name, s in r["steps"].items():
+            if name in old and old[name]["median_ms"]:
+                ratio = s["median_ms"] / old[name]["median_ms"]
+                print(f"{size:>7} {name:45s} {old[name]['median_ms']:>9.1f} → {s['median_ms']:>9.1f} ms  ×{ratio:.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out", default="bench_pages.json")
+    ap.add_argument("--compare", help="JSON hasil sebelumnya")
+    ap.add_argument("--workdir", default=tempfile.gettempdir(), help="lokasi file SQLite hasil seed")
+    args = ap.parse_args()
+
+    results = {}
+    for n in [int(x) for x in args.sizes.split(",")]:
+        print(f"[{n} order]")
+        results[str(n)] = bench_size(n, args.runs, args.workdir)
+    out = {
+        "meta": {"timestamp": dt.datetime.now().isoformat(timespec="seconds"), "runs": args.runs,
+                 "python": platform.python_version(), "streamlit": st.__version__, "machine": platform.machine()},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"hasil → {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Pencarian global: build index & latency query pada data sintetis besar.
+
+    python bench/bench_search.py [--containers 1000000] [--per-order 5] [--runs 200] [--no-check]
+
+Index diisi langsung lewat SearchIndex.load (tanpa store/Streamlit) dengan
+order + container acak yang mirip data asli (no. container ISO, seal, no.
+mobil, supir & depo dari daftar pendek → posting panjang). Query per jenis:
+  - exact   : no. DN / no. container lengkap
+  - prefix  : potongan awal (mis. 5 karakter no. container)
+  - fuzzy   : satu karakter diganti (salah ketik)
+  - multi   : supir + depo / nopol (AND di order yang sama)
+  - common  : satu kata dengan jutaan posting (nama supir)
+Lalu update incremental (set_fields) per container. p50/p99 dibandingkan
+dengan THRESHOLDS; exit code 1 bila lewat batas.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from common import ROOT  # noqa: F401 (sys.path → planner)
+from planner.search import SearchIndex
+
+DRIVERS = ["Budi Santoso", "Agus Salim", "Slamet Riyadi", "Dewi Lestari", "Joko Susilo", "Rudi Hartono",
+           "Sri Wahyuni", "Bambang", "Eko Prasetyo", "Hendra Gunawan"]
+DEPOS = ["Depo Tanjung Priok", "Depo Cakung", "Depo Marunda", "MTI", "Depo Cikarang"]
+THRESHOLDS = {"exact": 20, "prefix": 20, "fuzzy": 50, "multi": 50, "common": 20, "update": 5}  # p99 ms
+
+
+def container_no(rnd) -> str:
+    return "".join(rnd.choices(string.ascii_uppercase, k=3)) + "U" + "".join(rnd.choices(string.digits, k=7))
+
+
+def synth(n_containers: int, per_order: int, seed: int = 1):
+    rnd = random.Random(seed)
+    for i in range(n_containers // per_order):
+        oid = f"ORD-{i:08X}"
+        yield oid, 0, {"order_id": oid, "no_dn": f"DN{i:08d}"}
+        for no in range(1, per_order + 1):
+            yield oid, no, {
+                "no_container": container_no(rnd), "no_seal": f"SL{rnd.randint(0, 99_999_999):08d}",
+                "no_mobil": f"B {rnd.randint(1000, 9999)} {''.join(rnd.choices('ABCDEFGHJK', k=2))}",
+                "nama_supir": rnd.choice(DRIVERS), "depo": rnd.choice(DEPOS),
+            }
+
+
+def typo(value: str, rnd) -> str:
+    i = rnd.randrange(1, len(value) - 1)
+    return value[:i] + rnd.choice(string.ascii_uppercase + string.digits) + value[i + 1:]
+
+
+def time_ms(fn, args_list) -> list:
+    out = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        out.append((time.perf_counter() - t0) * 1000)
+    return sorted(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--containers", type=int, default=1_000_000)
+    ap.add_argument("--per-order", type=int, default=5)
+    ap.add_argument("--runs", type=int, default=200, help="query per jenis")
+    ap.add_argument("--no-check", action="store_true", help="hanya cetak angka, tanpa cek threshold")
+    args = ap.parse_args()
+
+    docs = list(synth(args.containers, args.per_order))
+    idx = SearchIndex()
+    t0 = time.perf_counter()
+    idx.load(docs)
+    print(f"build: {len(docs):,} dokumen, {len(idx._post):,} term, {time.perf_counter() - t0:.1f}s")
+
+    rnd = random.Random(2)
+    sample = [d for d in rnd.sample(docs, args.runs * 2) if d[1]][:args.runs]
+    orders = [d for d in rnd.sample(docs, args.runs * 10) if not d[1]][:args.runs]
+    queries = {
+        "exact": [(d[2]["no_container"],) for d in sample[: args.runs // 2]] + [(o[2]["no_dn"],) for o in orders[: args.runs // 2]],
+        "prefix": [(d[2]["no_container"][:5],) for d in sample],
+        "fuzzy": [(typo(d[2]["no_container"], rnd),) for d in sample],
+        "multi": [(f"{d[2]['nama_supir'].split()[0]} {d[2]['depo'].split()[-1]}",) for d in sample[: args.runs // 2]]
+                 + [(f"{d[2]['nama_supir'].split()[0]} {d[2]['no_mobil'].split()[1]}",) for d in sample[args.runs // 2:]],
+        "common": [(rnd.choice(DRIVERS).split()[0],) for _ in range(args.runs)],
+    }
+    failed = []
+    for kind, qs in queries.items():
+        ms = time_ms(idx.search, qs)
+        failed += report(kind, ms)
+
+    # update incremental: ganti no. container & supir (event containers_updated)
+    updates = [(oid, no, {"no_container": container_no(rnd), "nama_supir": rnd.choice(DRIVERS)})
+               for oid, no, _ in sample]
+    failed += report("update", time_ms(idx.set_fields, updates))
+    if failed and not args.no_check:
+        raise SystemExit(1)
+
+
+def report(kind: str, ms: list) -> list:
+    p50, p99 = statistics.median(ms), ms[max(0, round(0.99 * len(ms)) - 1)]
+    ok = p99 <= THRESHOLDS[kind]
+    print(f"{kind:7s} p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  max {ms[-1]:7.2f}ms  batas p99 {THRESHOLDS[kind]}ms"
+          f"  {'OK' if ok else 'LEWAT BATAS'}")
+    return [] if ok else [kind]
+
+
+if __name__ == "__main__":
+    main()
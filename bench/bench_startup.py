@@ -0,0 +1,128 @@
+"""Cold start: waktu import & first paint halaman login di proses baru.
+
+    python bench/bench_startup.py [--runs 5] [--store sqlite|memory] [--think-ms 1500] [--no-check]
+
+Tiap sampel = proses Python baru (tidak ada modul / cache_resource sisa):
+  - import_ms      : eksekusi semua import top-level TruckFinal.py (diambil
+                     dari AST script, jadi ikut berubah bila import berubah)
+  - first_paint_ms : run pertama script sampai halaman login selesai dirender
+                     (set_page_config, CSS, store, form login)
+  - admin_home_ms  : run berikutnya setelah login admin (Home), setelah jeda
+                     `--think-ms` (user mengisi form; warm_imports() memuat
+                     pandas/pyarrow di background selama jeda ini)
+  - heavy_login    : modul berat yang di-import thread script sampai halaman
+                     login selesai (import oleh thread warm-imports tidak dihitung)
+  - heavy_home     : modul berat yang termuat setelah Home
+Median dibandingkan dengan THRESHOLDS; exit code 1 bila ada yang lewat batas
+atau modul yang dilarang (LOGIN_FORBIDDEN) termuat saat halaman login.
+Import harness AppTest (termasuk streamlit sendiri) tidak dihitung.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT
+
+APP = os.path.join(ROOT, "TruckFinal.py")
+HEAVY = ["pandas", "numpy", "pyarrow", "openpyxl", "altair"]
+LOGIN_FORBIDDEN = ["pandas", "pyarrow", "openpyxl", "altair"]
+THRESHOLDS = {"import_ms": 250, "first_paint_ms": 900, "admin_home_ms": 300}
+
+
+def _header_imports() -> str:
+    with open(APP, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+
+def sample(think_ms: float) -> dict:
+    """Dijalankan di proses anak (`--child`)."""
+    from streamlit.testing.v1 import AppTest
+
+    loaded = []  # (modul, nama thread) — event audit "import" hanya muncul saat modul benar-benar dimuat
+
+    def audit(event, args):
+        if event == "import" and args[0] in HEAVY:
+            loaded.append((args[0], threading.current_thread().name))
+
+    sys.addaudithook(audit)
+    sys.path.insert(0, ROOT)
+    t0 = time.perf_counter()
+    exec(compile(_header_imports(), APP, "exec"), {})
+    import_ms = (time.perf_counter() - t0) * 1000
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    t0 = time.perf_counter()
+    at.run()
+    first_paint_ms = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    heavy_login = [m for m, thread in loaded if thread != "warm-imports"]
+
+    time.sleep(think_ms / 1000)
+    at.session_state["authenticated"] = True
+    at.session_state["user_role"] = "admin"
+    at.session_state["username"] = "bench"
+    t0 = time.perf_counter()
+    at.run()
+    admin_home_ms = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return {"import_ms": import_ms, "first_paint_ms": first_paint_ms, "admin_home_ms": admin_home_ms,
+            "heavy_login": heavy_login, "heavy_home": [m for m in HEAVY if m in sys.modules]}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--store", choices=["sqlite", "memory"], default="sqlite")
+    ap.add_argument("--think-ms", type=float, default=1500, help="jeda login page → submit login")
+    ap.add_argument("--workdir", default=tempfile.gettempdir())
+    ap.add_argument("--no-check", action="store_true", help="hanya cetak angka, tanpa cek threshold")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(sample(args.think_ms)))
+        return
+
+    env = dict(os.environ)
+    if args.store == "sqlite":
+        env["TRUCK_STORE"] = f"sqlite:///{os.path.join(args.workdir, 'bench_startup.db')}"
+    else:
+        env["TRUCK_STORE"] = "memory"
+    env.pop("TRUCK_BROKER", None)
+    samples = []
+    for _ in range(args.runs):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", "--think-ms", str(args.think_ms)]
+        out = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    failed = []
+    for k, limit in THRESHOLDS.items():
+        med = statistics.median(s[k] for s in samples)
+        ok = med <= limit
+        print(f"{k:16s} median {med:8.1f}ms  max {max(s[k] for s in samples):8.1f}ms  batas {limit}ms"
+              f"  {'OK' if ok else 'LEWAT BATAS'}")
+        if not ok:
+            failed.append(k)
+    heavy_login = sorted({m for s in samples for m in s["heavy_login"]})
+    heavy_home = sorted({m for s in samples for m in s["heavy_home"]})
+    print(f"modul berat di-import saat login page: {heavy_login or '-'}; setelah Home: {heavy_home or '-'}")
+    bad = [m for m in heavy_login if m in LOGIN_FORBIDDEN]
+    if bad:
+        print(f"GAGAL: halaman login memuat {bad}")
+        failed.append("heavy_login")
+    if failed and not args.no_check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
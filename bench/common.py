@@ -0,0 +1,53 @@
+import os
+import statistics
+import sys
+import time
+
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import app_test, local_script_runner
+from streamlit.testing.v1.element_tree import Widget
+
+# =============================
+# Utilitas benchmark (AppTest headless)
+# =============================
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def share_script_cache():
+    """AppTest meng-compile ulang script di setiap run; server memakai satu ScriptCache
+    untuk semua rerun. Samakan supaya waktu rerun tidak didominasi compile."""
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+def tree_stats(at) -> dict:
+    """Jumlah elemen, widget, dan ukuran proto (≈ payload delta ke browser) satu run."""
+    elements = widgets = size = 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        children = getattr(node, "children", None) or {}
+        if proto is not None:
+            size += proto.ByteSize()
+            if not children:
+                elements += 1
+                widgets += isinstance(node, Widget)
+        stack.extend(children.values())
+    return {"elements": elements, "widgets": widgets, "payload_bytes": size}
+
+
+def time_runs(at, n: int = 5, before=None) -> dict:
+    """Wall time per rerun (ms): median & max dari `n` rerun."""
+    samples = []
+    for _ in range(n):
+        if before:
+            before(at)
+        t0 = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return {"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
@@ -0,0 +1,115 @@
+"""Cek lokal notifikasi email / WhatsApp lewat stand-in SMTP & webhook.
+
+    python deploy/check_notify.py [--db /tmp/truck_notify_check.db] [--delay 0.5]
+
+Menjalankan fungsi tulis TruckFinal.py (create_order = tombol OK di Order to
+Vendor, save_container_details = simpan detail vendor) dengan
+TRUCK_NOTIFY_SMTP / TRUCK_NOTIFY_WEBHOOK ke planner.notify_local:
+  1. stand-in lambat (`--delay` per pesan) dan menolak pesan pertama →
+     fungsi tulis harus tetap cepat (kirim di background) dan pesan yang
+     ditolak harus terkirim lewat retry
+  2. order baru → email + WA vendor; container gate in port → email + WA admin
+  3. pool pengirim dihentikan, order dibuat lagi, lalu pool baru di atas file
+     outbox yang sama → pesan yang tertunda tetap terkirim (outbox persist)
+Exit code 0 bila lolos.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from planner import notify  # noqa: E402
+from planner.notify_local import LocalSmtpServer, LocalWebhookServer  # noqa: E402
+
+VENDOR = "KAMBING"
+MAX_HANDLER_S = 0.25
+
+
+def fail(msg: str):
+    print(f"GAGAL: {msg}")
+    sys.exit(1)
+
+
+def timed(label: str, fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    dt_s = time.perf_counter() - t0
+    print(f"{label}: {dt_s * 1000:.1f}ms")
+    if dt_s > MAX_HANDLER_S:
+        fail(f"{label} {dt_s:.2f}s — pengiriman tidak boleh menahan handler tombol")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "truck_notify_check.db"))
+    ap.add_argument("--delay", type=float, default=0.5, help="jeda stand-in per pesan (detik)")
+    args = ap.parse_args()
+    for ext in ("", "-wal", "-shm", ".outbox", ".outbox-wal", ".outbox-shm", ".audit"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(args.db + ext)
+
+    smtp = LocalSmtpServer(fail_first=1, delay=args.delay)
+    hook = LocalWebhookServer(fail_first=1, delay=args.delay)
+    notify.BACKOFF = 0.5  # retry cepat untuk cek ini
+    os.environ.update({
+        "TRUCK_STORE": f"sqlite:///{os.path.abspath(args.db)}",
+        "TRUCK_NOTIFY_SMTP": smtp.url,
+        "TRUCK_NOTIFY_WEBHOOK": hook.url,
+        "TRUCK_NOTIFY_WEBHOOK_TOKEN": "check-token",
+        "TRUCK_NOTIFY_WA_TO": f"admin=+620000;{VENDOR}=+620001",
+    })
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import TruckFinal as app  # bare mode: tanpa server, cache_resource tetap per proses
+
+    store = app.get_store()
+    pool = app.get_notifier()
+    if pool is None:
+        fail("get_notifier() tidak aktif")
+    today = app.today_str()
+    store.set_availability(today, VENDOR, 5, 5)
+
+    oid = timed("create_order", app.create_order, VENDOR, today, today, "DN-NOTIFY-1", "Cikarang", 1, 0)
+    store.update_containers(oid, [{"no": 1, "accept": True}])
+    timed("save_container_details (gate in port)", app.save_container_details, oid,
+          {1: {"no_container": "CSQU3054383", "status": app.STATUS_TRUCKING[-1]}})
+
+    if not (smtp.wait(2, 30) and hook.wait(2, 30)):
+        fail(f"pesan tidak sampai: email {len(smtp.received)}, WA {len(hook.received)}; outbox {pool.outbox.stats()}")
+    print(f"email: {[(m['to'][0], m['subject']) for m in smtp.received]}")
+    print(f"WA   : {[(m['to'], m['text'].splitlines()[0]) for m in hook.received]}")
+    if smtp.capture.rejected != 1 or hook.capture.rejected != 1:
+        fail("stand-in seharusnya menolak tepat satu pesan per channel")
+    if not any(m["to"] == ["kambing@vendor.com"] and "DN-NOTIFY-1" in m["subject"] for m in smtp.received):
+        fail("email order baru ke vendor tidak ada")
+    if not any(m["to"] == "+620000" and "CSQU3054383" in m["text"] for m in hook.received):
+        fail("WA gate in port ke admin tidak ada")
+    if any(m["auth"] != "Bearer check-token" for m in hook.received):
+        fail("token webhook tidak terkirim")
+
+    # outbox persist: pengirim mati → pesan menunggu di file, pool baru mengirimnya
+    pool.stop()
+    n_mail, n_wa = len(smtp.received), len(hook.received)
+    timed("create_order (pengirim berhenti)", app.create_order, VENDOR, today, today, "DN-NOTIFY-2", "Cikarang", 1, 0)
+    time.sleep(args.delay * 2)
+    if len(smtp.received) != n_mail or pool.outbox.stats()["pending"] != 2:
+        fail(f"pesan seharusnya tertahan di outbox: {pool.outbox.stats()}")
+    restarted = notify.DeliveryPool(notify.open_outbox(store.path + ".outbox"), pool.senders).start()
+    if not (smtp.wait(n_mail + 1, 30) and hook.wait(n_wa + 1, 30)):
+        fail(f"pesan tertunda tidak terkirim setelah restart: {restarted.outbox.stats()}")
+    restarted.drain(10)
+    restarted.stop()
+    print(f"outbox: {restarted.outbox.stats()}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
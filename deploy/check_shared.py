@@ -0,0 +1,115 @@
+"""Cek lokal: order yang dibuat di satu worker terlihat di worker lain.
+
+    python deploy/check_shared.py [--db /tmp/truck_shared.db]
+
+Dua proses terpisah (seperti dua worker run_workers.py), masing-masing
+menjalankan TruckFinal.py lewat AppTest dengan TRUCK_STORE/TRUCK_BROKER ke
+file SQLite yang sama:
+  1. worker B login sebagai vendor, buka "Orderan" (cache & index B terisi)
+  2. worker A: vendor isi ketersediaan, admin buat order lewat form
+  3. worker B rerun halaman yang sama → order baru harus muncul, dan
+     fragment live harus memberi notifikasi
+Exit code 0 bila lolos.
+"""
+import argparse
+import datetime as dt
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "TruckFinal.py")
+VENDOR = "KAMBING"
+
+
+def _login(role: str, vendor: str = None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["authenticated"] = True
+    at.session_state["user_role"] = role
+    at.session_state["username"] = "check"
+    at.session_state["vendor_name"] = vendor
+    at.run()
+    return at
+
+
+def _ok(at, what: str):
+    if at.exception:
+        raise RuntimeError(f"{what}: {at.exception[0].value}")
+
+
+def _expanders(at) -> list:
+    return [e.label for e in at.expander]
+
+
+def reader(env: dict, conn):
+    os.environ.update(env)
+    at = _login("vendor", VENDOR)
+    at.radio(key="menu_vendor").set_value("📑 Orderan").run()
+    _ok(at, "B: buka Orderan")
+    conn.send(_expanders(at))
+    conn.recv()  # tunggu worker A selesai menulis
+    at.run()
+    _ok(at, "B: rerun Orderan")
+    conn.send((_expanders(at), [t.value for t in at.toast]))
+
+
+def writer(env: dict, no_dn: str, conn):
+    os.environ.update(env)
+    today = dt.date.today().strftime("%Y-%m-%d")
+    v = _login("vendor", VENDOR)
+    v.number_input(key=f"v_av20_{today}").set_value(v.number_input(key=f"v_av20_{today}").value + 2)
+    v.button(key=f"save_av_{today}").click().run()
+    _ok(v, "A: simpan ketersediaan")
+
+    a = _login("admin")
+    a.radio(key="menu_admin").set_value("📦 Order to Vendor").run()
+    a.selectbox(key="order_vendor").set_value(VENDOR)
+    a.text_input(key="order_dn").set_value(no_dn)
+    a.number_input(key="order_j20").set_value(1)
+    next(b for b in a.button if b.label == "OK").click().run()
+    _ok(a, "A: buat order")
+    conn.send(os.getpid())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "truck_shared_check.db"))
+    args = ap.parse_args()
+
+    url = f"sqlite:///{os.path.abspath(args.db)}"
+    env = {"TRUCK_STORE": url, "TRUCK_BROKER": url}
+    no_dn = f"DN-CHECK-{os.getpid()}"
+    ctx = mp.get_context("spawn")  # proses baru: cache_resource / index / broker tidak berbagi memori
+
+    b_end, b_conn = ctx.Pipe()
+    b = ctx.Process(target=reader, args=(env, b_conn))
+    b.start()
+    before = b_end.recv()
+    print(f"worker B: {len(before)} order sebelum")
+
+    a_end, a_conn = ctx.Pipe()
+    a = ctx.Process(target=writer, args=(env, no_dn, a_conn))
+    a.start()
+    print(f"worker A (pid {a_end.recv()}): order {no_dn} dibuat")
+    a.join()
+
+    b_end.send("go")
+    after, toasts = b_end.recv()
+    b.join()
+
+    seen = [label for label in after if f"DN: {no_dn} " in label]
+    print(f"worker B: {len(after)} order sesudah, notifikasi live: {toasts}")
+    if not seen:
+        print(f"GAGAL: {no_dn} tidak terlihat di worker B")
+        sys.exit(1)
+    if not toasts:
+        print("GAGAL: notifikasi live tidak sampai ke worker B (TRUCK_BROKER tidak bersama?)")
+        sys.exit(1)
+    print(f"OK: {seen[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Jalankan beberapa proses server Streamlit yang berbagi satu DB SQLite.
+
+    python deploy/run_workers.py --workers 4 [--port 8501] [--db truckfinal.db]
+
+Worker ke-i listen di port `--port + i`. Semua worker mendapat
+TRUCK_STORE dan TRUCK_BROKER yang menunjuk file SQLite yang sama, jadi
+order, ketersediaan, vendor/akun dan notifikasi perubahan terlihat di semua
+worker. Yang tetap per-worker hanya st.session_state (login), karena itu
+load balancer di depan harus sticky per browser (contoh: deploy/nginx.conf).
+
+Launcher menunggu /_stcore/health tiap worker, lalu mengawasi: worker yang
+mati di-start ulang; Ctrl+C / SIGTERM menghentikan semuanya.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "TruckFinal.py")
+sys.path.insert(0, ROOT)
+
+from planner.pubsub import open_broker  # noqa: E402
+from planner.store import open_store  # noqa: E402
+
+
+def worker_env(db: str) -> dict:
+    url = f"sqlite:///{os.path.abspath(db)}"
+    return {**os.environ, "TRUCK_STORE": url, "TRUCK_BROKER": url}
+
+
+def start_worker(port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.port", str(port),
+         "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env,
+    )
+
+
+def wait_healthy(port: int, timeout: float = 60) -> bool:
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as r:
+                if r.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(.5)
+    return False
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--port", type=int, default=8501, help="port worker pertama")
+    ap.add_argument("--db", default=os.path.join(ROOT, "truckfinal.db"))
+    args = ap.parse_args()
+
+    env = worker_env(args.db)
+    # schema + mode WAL dibuat sekali di sini, bukan berebut saat semua worker start
+    open_store(env["TRUCK_STORE"]).close()
+    open_broker(env["TRUCK_BROKER"])
+
+    ports = [args.port + i for i in range(args.workers)]
+    procs = {p: start_worker(p, env) for p in ports}
+    for p in ports:
+        print(f"worker :{p} {'siap' if wait_healthy(p) else 'BELUM SIAP (cek log di atas)'}", flush=True)
+    print(f"DB bersama: {env['TRUCK_STORE']}", flush=True)
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    while not stopping:
+        for p, proc in procs.items():
+            if proc.poll() is not None:
+                print(f"worker :{p} berhenti (exit {proc.returncode}), start ulang", flush=True)
+                procs[p] = start_worker(p, env)
+        time.sleep(1)
+
+    for proc in procs.values():
+        proc.terminate()
+    for proc in procs.values():
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# =============================
+# Alokasi otomatis DN → vendor
+# =============================
+# Satu DN (tgl stuffing, jumlah 20ft & 40ft/HC) dibagi ke vendor berdasarkan
+# sisa ketersediaan per ukuran (Store.get_remaining). Greedy per DN, DN besar
+# duluan supaya tidak tersisa potongan kapasitas yang terlalu kecil:
+#   1. satu vendor yang sanggup semua ukuran → best fit (sisa paling sedikit);
+#   2. kalau tidak ada, per ukuran diambil dari vendor dengan sisa terbanyak
+#      (potongan order sesedikit mungkin).
+# `scores` (opsional, mis. accept ratio historis) dipakai sebagai kunci urut
+# pertama di kedua langkah. DN yang total kapasitasnya tidak cukup tidak
+# dialokasikan sama sekali (tidak ada order setengah jadi).
+# Sisa kapasitas disalin sekali per tanggal lalu dikurangi di memori, jadi
+# batch ratusan DN cukup O(DN × vendor).
+
+
+def _capacity(remaining: dict) -> dict:
+    return {v: [int(r.get("20ft", 0)), int(r.get("40ft/HC", 0))] for v, r in remaining.items()}
+
+
+def allocate_one(need: tuple, cap: dict, scores: dict = None) -> list:
+    """need = (j20, j40); cap = {vendor: [sisa20, sisa40]} (di-update in-place bila berhasil).
+    Return [(vendor, j20, j40), ...] atau [] bila kapasitas tidak cukup."""
+    scores = scores or {}
+    j20, j40 = need
+    fit = [(-scores.get(v, 0), r[0] - j20 + r[1] - j40, v) for v, r in cap.items() if r[0] >= j20 and r[1] >= j40]
+    if fit:
+        v = min(fit)[2]
+        cap[v][0] -= j20
+        cap[v][1] -= j40
+        return [(v, j20, j40)]
+
+    parts = {}
+    for i, want in enumerate(need):
+        if sum(r[i] for r in cap.values()) < want:
+            return []
+    for i, want in enumerate(need):
+        for v in sorted(cap, key=lambda v: (-scores.get(v, 0), -cap[v][i], v)):
+            if want <= 0:
+                break
+            take = min(want, cap[v][i])
+            if take > 0:
+                parts.setdefault(v, [0, 0])[i] += take
+                want -= take
+    for v, (a, b) in parts.items():
+        cap[v][0] -= a
+        cap[v][1] -= b
+    return [(v, a, b) for v, (a, b) in parts.items()]
+
+
+def allocate(demands: list, remaining_for, scores: dict = None):
+    """demands = dict argumen create_order tanpa `vendor` (no_dn, tgl_stuffing, closing_date,
+    shipping_point, j20, j40). `remaining_for(date)` → {vendor: {"20ft", "40ft/HC"}}.
+
+    Return (rows, rejected): rows = dict siap create_orders (satu per potongan vendor),
+    rejected = [(demand, alasan)]."""
+    caps, out, rejected = {}, {}, []
+    order = sorted(range(len(demands)), key=lambda i: -(demands[i]["j20"] + demands[i]["j40"]))
+    for i in order:
+        d = demands[i]
+        if d["j20"] < 0 or d["j40"] < 0 or d["j20"] + d["j40"] == 0:
+            rejected.append((d, "Minimal pesan 1 container."))
+            continue
+        cap = caps.get(d["tgl_stuffing"])
+        if cap is None:
+            cap = caps[d["tgl_stuffing"]] = _capacity(remaining_for(d["tgl_stuffing"]))
+        parts = allocate_one((d["j20"], d["j40"]), cap, scores)
+        if not parts:
+            left = [sum(r[k] for r in cap.values()) for k in range(2)]
+            rejected.append((d, f"Sisa ketersediaan {d['tgl_stuffing']} tidak cukup "
+                                f"(20ft: {left[0]}, 40ft/HC: {left[1]})."))
+            continue
+        out[i] = [{**d, "vendor": v, "j20": a, "j40": b} for v, a, b in parts]
+    return [r for i in sorted(out) for r in out[i]], rejected  # urut input
@@ -0,0 +1,85 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# KPI vendor (vectorized)
+# =============================
+# base_frame() meringkas order + container + waktu "gate in port" ke satu
+# baris per (vendor, minggu, shipping_point) berisi JUMLAH mentah saja
+# (order, container, accept, reject, partial, total jam ...). Rasio
+# dihitung belakangan oleh kpis() setelah dijumlah ulang ke dimensi yang
+# dipilih — jumlah bisa dijumlah, rasio tidak. Semua langkah memakai
+# merge/groupby pandas, tanpa loop Python per order.
+
+DIMS = {"Vendor": "vendor", "Minggu": "week", "Shipping Point": "shipping_point"}
+RESPONDED = ["Accepted", "Partial", "Rejected"]
+
+
+def _week(dates: pd.Series) -> pd.Series:
+    # Senin awal minggu (tgl_stuffing)
+    d = pd.to_datetime(dates)
+    return (d - pd.to_timedelta(d.dt.weekday, unit="D")).dt.normalize()
+
+
+def base_frame(orders: list, counts, gate_in) -> pd.DataFrame:
+    """orders = dict order; counts = (order_id, size, accept, n); gate_in = (order_id, epoch detik)
+    per container yang sudah "gate in port"."""
+    o = pd.DataFrame(orders, columns=["order_id", "vendor", "tgl_stuffing", "shipping_point", "summary_status",
+                                      "created_at"])
+    o["week"] = _week(o["tgl_stuffing"])
+    o["responded"] = o["summary_status"].isin(RESPONDED)
+    o["partial"] = o["summary_status"].eq("Partial")
+
+    c = pd.DataFrame(counts, columns=["order_id", "size", "accept", "n"])
+    acc = c["accept"].to_numpy(dtype=object)
+    c["accepted"] = np.where(acc == True, c["n"], 0)   # noqa: E712 (accept bisa None)
+    c["rejected"] = np.where(acc == False, c["n"], 0)  # noqa: E712
+    per_order = c.groupby("order_id")[["n", "accepted", "rejected"]].sum()
+
+    g = pd.DataFrame(gate_in, columns=["order_id", "ts"])
+    g = g.merge(o[["order_id", "created_at"]], on="order_id")
+    # created_at = waktu lokal naive; gate_in = epoch → geser dengan offset zona lokal
+    offset = dt.datetime.now().astimezone().utcoffset().total_seconds()
+    created = (pd.to_datetime(g["created_at"]) - pd.Timestamp(0)).dt.total_seconds() - offset
+    g["lead_h"] = (g["ts"] - created) / 3600
+    lead = g.groupby("order_id")["lead_h"].agg(lead_sum="sum", lead_n="count")
+
+    o = o.join(per_order, on="order_id").join(lead, on="order_id")
+    cols = ["n", "accepted", "rejected", "lead_sum", "lead_n"]
+    o[cols] = o[cols].fillna(0).astype(float)
+    o["orders"] = 1
+    o[["responded", "partial"]] = o[["responded", "partial"]].astype(int)
+    return (o.groupby(["vendor", "week", "shipping_point"], observed=True)
+             [["orders", "responded", "partial", *cols]].sum().reset_index())
+
+
+def availability_frame(rows) -> pd.DataFrame:
+    """(date, vendor, a20, a40) → ketersediaan yang diisi vendor per (vendor, minggu)."""
+    a = pd.DataFrame(rows, columns=["date", "vendor", "a20", "a40"])
+    a["week"] = _week(a["date"])
+    a["declared"] = a["a20"] + a["a40"]
+    return a.groupby(["vendor", "week"])["declared"].sum().reset_index()
+
+
+def kpis(base: pd.DataFrame, by: list) -> pd.DataFrame:
+    """Jumlahkan base ke kolom `by` (subset DIMS values) lalu hitung rasio."""
+    by = by or ["vendor"]
+    t = base.groupby(by, observed=True).sum(numeric_only=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t["accept_ratio"] = t["accepted"] / t["n"]
+        t["partial_rate"] = t["partial"] / t["responded"]
+        t["lead_h"] = t["lead_sum"] / t["lead_n"]
+    return t.reset_index()
+
+
+def utilization(base: pd.DataFrame, avail: pd.DataFrame, by_week: bool) -> pd.DataFrame:
+    """Ketersediaan diisi vs dipesan (container tidak di-reject) per vendor [dan minggu]."""
+    keys = ["vendor", "week"] if by_week else ["vendor"]
+    booked = base.assign(booked=base["n"] - base["rejected"]).groupby(keys)["booked"].sum()
+    declared = avail.groupby(keys)["declared"].sum()
+    t = pd.concat([declared, booked], axis=1).fillna(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t["utilization"] = (t["booked"] / t["declared"]).replace(np.inf, np.nan)  # belum isi ketersediaan
+    return t.reset_index()
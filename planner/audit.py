@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import time
+
+# =============================
+# Audit log container (event-sourced, append-only)
+# =============================
+# Setiap perubahan dicatat sebagai satu baris di file log, tidak pernah
+# ditimpa:
+#
+#   <ts epoch ms> \t <user> \t <order_id> \t <no> \t <field> \t <value> \n
+#
+#   - order baru        : no=0 field "vendor", lalu per container "status"
+#                         dan "accept" awal
+#   - status order      : no=0 field "summary_status"
+#   - accept / reject   : field "accept" (value "1" / "0" / "" = pending)
+#   - status & detail   : field "status", "no_container", "no_mobil", ...
+#
+# Satu baris ±60 byte; ditulis dengan O_APPEND + satu write() per event,
+# jadi beberapa proses (deploy/run_workers.py) aman menulis ke file yang sama.
+#
+# State hasil replay (vendor per order, status sekarang + sejak kapan, dan
+# akumulasi detik per status per container) disimpan berkala sebagai
+# snapshot JSON bersama offset byte log-nya. Start = baca snapshot, lalu
+# replay hanya ekor log setelah offset itu.
+
+_ESC = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n"})
+_ACCEPT = {True: "1", False: "0", None: ""}
+
+
+def _esc(v) -> str:
+    return str(v).translate(_ESC)
+
+
+def _unesc(v: str) -> str:
+    if "\\" not in v:
+        return v
+    out, i = [], 0
+    while i < len(v):
+        c = v[i]
+        if c == "\\" and i + 1 < len(v):
+            i += 1
+            c = {"t": "\t", "n": "\n"}.get(v[i], v[i])
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _parse(line: bytes):
+    ts, user, oid, no, field, value = line.decode("utf-8").split("\t")
+    return int(ts), _unesc(user), oid, int(no), field, _unesc(value)
+
+
+class AuditLog:
+    """Listener Store → baris log; query durasi per status & posisi pada jam tertentu.
+
+    `path=None` → log di memori (untuk store memory / test). `user` = callable
+    yang mengembalikan username pelaku tulis saat ini."""
+
+    def __init__(self, path: str = None, store=None, user=None, snapshot_every: int = 50_000):
+        self.path = path
+        self.store = store
+        self.user = user or (lambda: "")
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._mem = bytearray() if path is None else None
+        self._reset()
+        self._load_snapshot()
+
+    def _reset(self):
+        self._offset = 0       # byte log yang sudah di-replay
+        self._since_snap = 0   # event sejak snapshot terakhir
+        self._vendor = {}      # order_id -> vendor
+        self._cur = {}         # "oid#no" -> [status, sejak (ms)]
+        self._dwell = {}       # "oid#no" -> {status: ms}
+        self._keys = {}        # order_id -> ["oid#no", ...] (turunan _cur, tidak masuk snapshot)
+
+    # ---- tulis ----
+    def _append(self, data: bytes):
+        if self._mem is not None:
+            self._mem += data
+            return
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def _actor(self) -> str:
+        try:
+            return self.user() or ""
+        except Exception:  # di luar session Streamlit (script / seed)
+            return ""
+
+    def record(self, rows, ts: int = None, user: str = None):
+        """Tulis (order_id, no, field, value) sebagai satu batch."""
+        ts = int(time.time() * 1000) if ts is None else ts
+        user = _esc(self._actor() if user is None else user)
+        data = "".join(f"{ts}\t{user}\t{oid}\t{no}\t{field}\t{_esc(value)}\n" for oid, no, field, value in rows)
+        if data:
+            self._append(data.encode("utf-8"))
+
+    def notify(self, version, event, payload):
+        if event == "order_added":
+            o = payload["order"]
+            rows = [(o["order_id"], 0, "vendor", o["vendor"])]
+            for r in self.store.get_containers(o["order_id"]) if self.store else ():
+                rows.append((o["order_id"], r["no"], "status", r["status"]))
+                rows.append((o["order_id"], r["no"], "accept", _ACCEPT[r["accept"]]))
+        elif event == "order_updated":
+            rows = [(payload["order_id"], 0, k, v) for k, v in payload["fields"].items()]
+        elif event == "containers_updated":
+            oid, before = payload["order_id"], payload["before"]
+            rows = []
+            for ch in payload["changes"]:
+                old = before.get(ch["no"], {})
+                for k, v in ch.items():
+                    if k == "no" or (k in old and old[k] == v):
+                        continue  # hanya field yang benar-benar berubah
+                    rows.append((oid, ch["no"], k, _ACCEPT[v] if k == "accept" else v))
+        else:
+            return
+        self.record(rows)
+
+    # ---- replay ----
+    def _read_from(self, offset: int) -> bytes:
+        if self._mem is not None:
+            return bytes(self._mem[offset:])
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def _apply(self, ts, oid, no, field, value):
+        if no == 0:
+            if field == "vendor":
+                self._vendor[oid] = value
+            return
+        if field != "status":
+            return
+        if oid not in self._vendor and self.store is not None:
+            o = self.store.get_order(oid)  # order dari sebelum audit aktif: vendor diambil sekali dari store
+            self._vendor[oid] = o["vendor"] if o else ""
+        key = f"{oid}#{no}"
+        cur = self._cur.get(key)
+        if cur is None:
+            self._keys.setdefault(oid, []).append(key)
+        else:
+            if cur[0] == value:
+                return
+            d = self._dwell.setdefault(key, {})
+            d[cur[0]] = d.get(cur[0], 0) + max(0, ts - cur[1])
+        self._cur[key] = [value, ts]
+
+    def catch_up(self):
+        """Replay baris log yang belum dibaca (termasuk tulisan proses lain)."""
+        with self._lock:
+            data = self._read_from(self._offset)
+            end = data.rfind(b"\n") + 1  # baris terakhir mungkin belum selesai ditulis
+            for line in data[:end].splitlines():
+                ts, _, oid, no, field, value = _parse(line)
+                self._apply(ts, oid, no, field, value)
+                self._since_snap += 1
+            self._offset += end
+            if self._since_snap >= self.snapshot_every:
+                self.save_snapshot()
+        return self
+
+    # ---- snapshot ----
+    def _snap_path(self):
+        return None if self.path is None else self.path + ".snap"
+
+    def _load_snapshot(self):
+        p = self._snap_path()
+        if not p or not os.path.exists(p):
+            return
+        with open(p, encoding="utf-8") as f:
+            snap = json.load(f)
+        self._offset, self._vendor, self._cur, self._dwell = snap["offset"], snap["vendor"], snap["cur"], snap["dwell"]
+        for key in self._cur:
+            self._keys.setdefault(key.rpartition("#")[0], []).append(key)
+
+    def save_snapshot(self):
+        p = self._snap_path()
+        with self._lock:
+            self._since_snap = 0
+            if not p:
+                return
+            tmp = f"{p}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"offset": self._offset, "vendor": self._vendor, "cur": self._cur, "dwell": self._dwell},
+                          f, separators=(",", ":"))
+            os.replace(tmp, p)  # atomik: pembaca tidak pernah melihat snapshot setengah jadi
+
+    # ---- query ----
+    def time_in_status(self, order_id: str = None, no: int = None, vendor: str = None, now: float = None) -> dict:
+        """Total detik per status untuk satu container (order_id + no), satu order, atau satu vendor.
+        Status yang sedang berjalan dihitung sampai `now` (default: sekarang)."""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        self.catch_up()
+        with self._lock:
+            if order_id is not None:
+                keys = [f"{order_id}#{no}"] if no is not None else self._keys.get(order_id, [])
+            else:
+                keys = [k for oid, ks in self._keys.items() if self._vendor.get(oid) == vendor for k in ks]
+            out = {}
+            for k in keys:
+                for status, ms in self._dwell.get(k, {}).items():
+                    out[status] = out.get(status, 0) + ms
+                cur = self._cur.get(k)
+                if cur:
+                    out[cur[0]] = out.get(cur[0], 0) + max(0, now_ms - cur[1])
+        return {s: ms / 1000 for s, ms in out.items()}
+
+    def entered(self, status: str) -> list:
+        """(order_id, waktu masuk epoch detik) tiap container yang status sekarang = `status`."""
+        self.catch_up()
+        with self._lock:
+            return [(k.rpartition("#")[0], since / 1000) for k, (s, since) in self._cur.items() if s == status]
+
+    def history(self, order_id: str) -> list:
+        """Semua event satu order (scan log): dict ts/user/no/field/value, urut waktu tulis."""
+        needle = f"\t{order_id}\t".encode()
+        data = self._read_from(0)
+        out = []
+        i = data.find(needle)
+        while i != -1:  # cari langsung di buffer; hanya baris yang cocok yang di-parse
+            start, end = data.rfind(b"\n", 0, i) + 1, data.find(b"\n", i)
+            if end == -1:
+                break  # baris terakhir belum selesai ditulis
+            ts, user, _, no, field, value = _parse(data[start:end])
+            out.append({"ts": ts / 1000, "user": user, "no": no, "field": field, "value": value})
+            i = data.find(needle, end)
+        return out
+
+    def state_at(self, order_id: str, when: float, events: list = None) -> dict:
+        """Nilai field tiap container order pada waktu `when` (epoch detik): {no: {field: value}}.
+        `events` = hasil history(order_id) bila sudah ada (hindari scan ulang)."""
+        cutoff = int(when * 1000)
+        out = {}
+        for e in self.history(order_id) if events is None else events:
+            if e["ts"] * 1000 > cutoff:
+                continue  # beberapa proses bisa menulis sedikit tidak urut
+            if e["no"]:
+                out.setdefault(e["no"], {})[e["field"]] = e["value"]
+        return out
@@ -0,0 +1,46 @@
+from planner.projection import Projection
+
+# =============================
+# Agregat ketersediaan (semua vendor)
+# =============================
+# - harian : date "YYYY-MM-DD" → [total 20ft, total 40ft/HC]
+# - bulanan: "YYYY-MM" → {"days": {date: [t20, t40]}, "20ft": n, "40ft/HC": n}
+# Di-update incremental dari selisih (baru - lama) saat vendor menyimpan
+# ketersediaan, jadi biaya tidak tergantung jumlah vendor. Kalender Admin
+# cukup satu lookup per bulan.
+
+
+def _empty_month() -> dict:
+    return {"days": {}, "20ft": 0, "40ft/HC": 0}
+
+
+class AvailabilityTotals(Projection):
+    def __init__(self):
+        super().__init__()
+        self._months = {}
+
+    def rebuild(self, store):
+        self._months = {}
+        for date, t20, t40 in store.availability_totals():
+            self._add(date, int(t20 or 0), int(t40 or 0))
+
+    def _add(self, date: str, d20: int, d40: int):
+        m = self._months.setdefault(date[:7], _empty_month())
+        day = m["days"].setdefault(date, [0, 0])
+        day[0] += d20
+        day[1] += d40
+        m["20ft"] += d20
+        m["40ft/HC"] += d40
+
+    # event Store
+    def on_availability_set(self, date, vendor, a20, a40, before):
+        self._add(date, a20 - before[0], a40 - before[1])
+
+    # ---- query ----
+    def month(self, year: int, month: int) -> dict:
+        """Rollup satu bulan; `days` berisi tanggal yang pernah diisi saja."""
+        return self._months.get(f"{year:04d}-{month:02d}") or _empty_month()
+
+    def day(self, date: str) -> tuple:
+        day = self.month(int(date[:4]), int(date[5:7]))["days"].get(date, (0, 0))
+        return day[0], day[1]
@@ -0,0 +1,173 @@
+import io
+
+import pandas as pd
+
+# =============================
+# Import order massal (xlsx / CSV)
+# =============================
+# File dibaca per-chunk (CSV: pandas chunksize, xlsx: openpyxl read_only) dan
+# tiap chunk divalidasi vektor (satu pass pandas): kolom wajib, tanggal,
+# jumlah container, dan sisa ketersediaan vendor per ukuran — aturan sama
+# dengan form "Buat Order Baru". `claim_capacity` lalu membagi sisa itu ke
+# baris-baris valid sesuai urutan file, supaya beberapa baris untuk vendor &
+# tanggal yang sama tidak bersama-sama melebihi kapasitas.
+
+COLUMNS = ["vendor", "tgl_stuffing", "closing_date", "no_dn", "shipping_point", "jml_20ft", "jml_40ft"]
+CHUNK_ROWS = 5000
+DATE_FMT = "%Y-%m-%d"
+
+
+def iter_chunks(data: bytes, filename: str, chunksize: int = CHUNK_ROWS):
+    """Yield DataFrame per chunk; kolom `baris` = nomor baris di file (header = baris 1)."""
+    start = 2
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        chunks = _xlsx_chunks(data, chunksize)
+    else:
+        chunks = pd.read_csv(io.BytesIO(data), chunksize=chunksize, dtype=str, keep_default_na=False,
+                             sep=None, engine="python")
+    for df in chunks:
+        df.columns = [str(c).strip().lower().replace(" ", "_").replace(".", "") for c in df.columns]
+        df.insert(0, "baris", range(start, start + len(df)))
+        start += len(df)
+        yield df
+
+
+def _xlsx_chunks(data: bytes, chunksize: int):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h or "") for h in next(rows, [])]
+        buf = []
+        for r in rows:
+            if not any(v not in (None, "") for v in r):
+                continue
+            buf.append(r)
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def _as_date_str(s: pd.Series) -> pd.Series:
+    # fast path ISO (YYYY-MM-DD / sel tanggal Excel), sisanya format bebas (dd/mm/yyyy dulu)
+    filled = s.notna() & (s.astype(str).str.strip() != "")
+    d = pd.to_datetime(s.where(filled), errors="coerce", format=DATE_FMT)
+    rest = d.isna() & filled
+    if rest.any():
+        d[rest] = pd.to_datetime(s[rest], errors="coerce", format="mixed", dayfirst=True)
+    return d.dt.strftime(DATE_FMT)
+
+
+def validate_chunk(df: pd.DataFrame, vendors: list, availability_for) -> pd.DataFrame:
+    """Normalisasi chunk & isi kolom `error` ("" = valid).
+
+    `availability_for(date_str)` → {vendor: {"20ft": sisa, "40ft/HC": sisa}} (Store.get_remaining);
+    vendor yang tidak ada di hasil dianggap belum mengisi ketersediaan.
+    """
+    df = df.reset_index(drop=True)
+    missing = [c for c in COLUMNS if c not in df.columns]
+    for c in missing:
+        df[c] = ""
+    out = pd.DataFrame({"baris": df["baris"]})
+    out["vendor"] = df["vendor"].fillna("").astype(str).str.strip().str.upper()
+    out["no_dn"] = df["no_dn"].fillna("").astype(str).str.strip()
+    out["shipping_point"] = df["shipping_point"].fillna("").astype(str).str.strip()
+    out["tgl_stuffing"] = _as_date_str(df["tgl_stuffing"])
+    closing = _as_date_str(df["closing_date"])
+    default_closing = (pd.to_datetime(out["tgl_stuffing"], errors="coerce") + pd.Timedelta(days=2)).dt.strftime(DATE_FMT)
+    out["closing_date"] = closing.fillna(default_closing)
+    j20 = pd.to_numeric(df["jml_20ft"].replace("", 0), errors="coerce")
+    j40 = pd.to_numeric(df["jml_40ft"].replace("", 0), errors="coerce")
+    out["jml_20ft"] = j20.fillna(0).astype(int)
+    out["jml_40ft"] = j40.fillna(0).astype(int)
+
+    # ketersediaan vendor per (tanggal, vendor) — lookup hanya untuk tanggal unik di chunk
+    av_rows = [(d, v, int(r.get("20ft", 0)), int(r.get("40ft/HC", 0)))
+               for d in out["tgl_stuffing"].dropna().unique()
+               for v, r in availability_for(d).items()]
+    av = pd.DataFrame(av_rows, columns=["tgl_stuffing", "vendor", "avail20", "avail40"])
+    out = out.merge(av, how="left", on=["tgl_stuffing", "vendor"], indicator=True)
+    declared = out.pop("_merge") == "both"
+    out[["avail20", "avail40"]] = out[["avail20", "avail40"]].fillna(0).astype(int)
+
+    err = pd.Series("", index=out.index, dtype=object)
+
+    def flag(mask, msg):
+        mask = mask & (err == "")
+        err[mask] = msg if isinstance(msg, str) else msg[mask]
+
+    flag(pd.Series(bool(missing), index=out.index), f"Kolom tidak ada: {', '.join(missing)}")
+    flag(~out["vendor"].isin(vendors), "Vendor tidak dikenal: " + out["vendor"])
+    flag(out["no_dn"] == "", "No.DN wajib diisi.")
+    flag(out["tgl_stuffing"].isna(), "Tgl stuffing tidak valid.")
+    flag(j20.isna() | j40.isna() | (out["jml_20ft"] < 0) | (out["jml_40ft"] < 0), "Jumlah container tidak valid.")
+    flag(out["jml_20ft"] + out["jml_40ft"] == 0, "Minimal pesan 1 container.")
+    flag(~declared,
+         "Vendor " + out["vendor"] + " belum mengisi ketersediaan untuk " + out["tgl_stuffing"].fillna("") + ".")
+    flag(out["jml_20ft"] > out["avail20"],
+         "Jumlah 20ft yang dipesan (" + out["jml_20ft"].astype(str) + ") melebihi sisa ketersediaan vendor ("
+         + out["avail20"].astype(str) + ").")
+    flag(out["jml_40ft"] > out["avail40"],
+         "Jumlah 40ft/HC yang dipesan (" + out["jml_40ft"].astype(str) + ") melebihi sisa ketersediaan vendor ("
+         + out["avail40"].astype(str) + ").")
+    out["error"] = err
+    return out
+
+
+def claim_capacity(rep: pd.DataFrame, used: dict) -> pd.DataFrame:
+    """Pakai sisa kapasitas (kolom avail20/avail40) per baris valid, urut file.
+
+    `used` = {(tgl, vendor): [20ft, 40ft]} yang sudah diambil baris sebelumnya
+    (juga dari chunk sebelumnya); di-update in-place.
+    """
+    ok = rep.index[rep["error"] == ""]
+    cols = rep.loc[ok, ["tgl_stuffing", "vendor", "jml_20ft", "jml_40ft", "avail20", "avail40"]]
+    for i, (d, v, j20, j40, a20, a40) in zip(ok, cols.itertuples(index=False, name=None)):
+        u = used.setdefault((d, v), [0, 0])
+        if u[0] + j20 > a20:
+            rep.at[i, "error"] = f"Jumlah 20ft yang dipesan ({j20}) melebihi sisa ketersediaan vendor ({a20 - u[0]})."
+        elif u[1] + j40 > a40:
+            rep.at[i, "error"] = f"Jumlah 40ft/HC yang dipesan ({j40}) melebihi sisa ketersediaan vendor ({a40 - u[1]})."
+        else:
+            u[0] += j20
+            u[1] += j40
+    return rep
+
+
+# =============================
+# Import jadwal ketersediaan vendor (xlsx / CSV)
+# =============================
+AVAIL_COLUMNS = ["tanggal", "jml_20ft", "jml_40ft"]
+
+
+def read_availability(data: bytes, filename: str) -> pd.DataFrame:
+    """Jadwal ketersediaan satu vendor → baris, tanggal, jml_20ft, jml_40ft, error ("" = valid).
+    Tanggal yang muncul lebih dari sekali: baris terakhir yang dipakai."""
+    parts = []
+    for df in iter_chunks(data, filename):
+        df = df.reset_index(drop=True)
+        missing = [c for c in AVAIL_COLUMNS if c not in df.columns]
+        for c in missing:
+            df[c] = ""
+        out = pd.DataFrame({"baris": df["baris"], "tanggal": _as_date_str(df["tanggal"])})
+        err = pd.Series("", index=out.index, dtype=object)
+        for c in AVAIL_COLUMNS[1:]:
+            v = pd.to_numeric(df[c].replace("", 0), errors="coerce")
+            out[c] = v.fillna(0).astype(int)
+            err[v.isna() | (v < 0)] = "Jumlah container tidak valid."
+        err[out["tanggal"].isna()] = "Tanggal tidak valid."
+        if missing:
+            err[:] = f"Kolom tidak ada: {', '.join(missing)}"
+        out["error"] = err
+        parts.append(out)
+    if not parts:
+        return pd.DataFrame(columns=["baris", *AVAIL_COLUMNS, "error"])
+    out = pd.concat(parts, ignore_index=True)
+    dup = out[out["error"] == ""].duplicated("tanggal", keep="last")
+    out.loc[dup.index[dup], "error"] = "Tanggal dobel; dipakai baris terakhir."
+    return out
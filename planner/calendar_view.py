@@ -0,0 +1,63 @@
+import calendar
+import datetime as dt
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# =============================
+# Kalender satu komponen
+# =============================
+# Satu bulan dikirim sebagai SATU elemen (iframe komponen) berisi data sel
+# yang ringkas; HTML/CSS dirender di browser. Klik tanggal dikirim balik
+# sebagai satu nilai. Menggantikan grid st.columns(7) + tombol "Pilih" per hari.
+
+_FRONTEND = os.path.join(os.path.dirname(__file__), "calendar_frontend")
+_calendar = components.declare_component("trucking_calendar", path=_FRONTEND)
+
+
+def month_cells(year: int, month: int, totals, is_ok, selected: str = None, today: dt.date = None) -> list:
+    """Minggu × 7 sel; sel kosong = 0, selain itu [hari, total20, total40, "ok today sel"].
+
+    `totals(date_str)` → (t20, t40); `is_ok(t20, t40)` → warna hijau.
+    """
+    today = today or dt.date.today()
+    weeks = []
+    for week in calendar.monthcalendar(year, month):
+        row = []
+        for d in week:
+            if d == 0:
+                row.append(0)
+                continue
+            the_date = dt.date(year, month, d)
+            s = the_date.strftime("%Y-%m-%d")
+            t20, t40 = totals(s)
+            cls = " ".join(c for c, on in (("ok", is_ok(t20, t40)), ("today", the_date == today), ("sel", s == selected)) if on)
+            row.append([d, int(t20), int(t40), cls])
+        weeks.append(row)
+    return weeks
+
+
+def calendar_month(year: int, month: int, totals, is_ok, selected: str = None, key: str = "calendar", on_pick=None):
+    """Render kalender; return tanggal ("YYYY-MM-DD") yang baru diklik, atau None.
+
+    Dengan `on_pick(date)`, klik ditangani sebagai callback sebelum rerun (boleh
+    memanggil `st.rerun(<key fragment>)` untuk rerun bagian tertentu saja).
+    """
+    def changed():
+        date = _take_click(key, st.session_state.get(key))
+        if date:
+            on_pick(date)
+
+    ev = _calendar(year=year, month=month, weeks=month_cells(year, month, totals, is_ok, selected),
+                   key=key, default=None, on_change=changed if on_pick else None)
+    return _take_click(key, ev)
+
+
+def _take_click(key: str, ev):
+    # nilai komponen tetap sama di rerun berikutnya; nonce `n` membedakan klik baru
+    seen_key = f"{key}__seen"
+    if not ev or st.session_state.get(seen_key) == ev["n"]:
+        return None
+    st.session_state[seen_key] = ev["n"]
+    return ev["date"]
@@ -0,0 +1,171 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from planner.store import ACCEPT_CODES, ACCEPT_VALUES
+
+# =============================
+# Tabel container kolumnar (array-backed)
+# =============================
+# Pengganti list dict per baris di MemoryStore. Satu baris container =
+# satu posisi di beberapa array numpy:
+#   - no, size, accept : integer kecil (uint16 / int8)
+#   - field teks & status : kode uint32 ke kamus nilai unik (string di-intern
+#     sekali; "" yang mendominasi cuma disimpan satu kali)
+# Container satu order selalu bersebelahan (posisi awal + jumlah), jadi
+# lookup (order_id, no) O(1). Array tumbuh 2× saat penuh.
+#
+# `frame()` membangun DataFrame dari slice array tanpa menyalin kolom
+# numerik (teks jadi Categorical); `rows()` memberi view dict-like
+# (ContainerView) supaya kode yang membaca r["size"], r.get(...) tetap jalan.
+
+
+class _Dictionary:
+    """Kamus nilai teks → kode (kategori tidak pernah dihapus)."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value) -> int:
+        value = "" if value is None else str(value)
+        c = self._codes.get(value)
+        if c is None:
+            c = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+
+class ContainerView(Mapping):
+    """Satu baris container sebagai Mapping read-only (nilai dibaca live dari tabel)."""
+
+    __slots__ = ("_table", "_pos")
+
+    def __init__(self, table, pos: int):
+        self._table = table
+        self._pos = pos
+
+    def __getitem__(self, key):
+        return self._table.value(self._pos, key)
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return f"ContainerView({dict(self)!r})"
+
+
+class ContainerTable:
+    def __init__(self, sizes, text_fields, capacity: int = 1024):
+        self.sizes = tuple(sizes)
+        self.text_fields = tuple(text_fields)
+        self.columns = ("no", "size", "accept") + self.text_fields
+        self._n = 0
+        self._order = np.empty(capacity, np.uint32)  # kode order_id per baris
+        self._no = np.empty(capacity, np.uint16)
+        self._size = np.empty(capacity, np.int8)
+        self._accept = np.empty(capacity, np.int8)
+        self._text = {f: np.empty(capacity, np.uint32) for f in self.text_fields}
+        self._dicts = {f: _Dictionary() for f in self.text_fields}
+        self._order_ids = []   # kode → order_id (None = baris yatim)
+        self._ranges = {}      # order_id → (posisi awal, jumlah)
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, extra: int):
+        need = self._n + extra
+        cap = len(self._no)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        for name in ("_order", "_no", "_size", "_accept"):
+            old = getattr(self, name)
+            new = np.empty(cap, old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+        for f, old in self._text.items():
+            new = np.empty(cap, old.dtype)
+            new[:self._n] = old[:self._n]
+            self._text[f] = new
+
+    # ---- tulis ----
+    def append(self, order_id: str, rows: list):
+        """Tambah container satu order (urut `no`)."""
+        k = len(rows)
+        self._reserve(k)
+        if order_id in self._ranges:  # order ditulis ulang: baris lama jadi yatim
+            self._order_ids[self._order[self._ranges[order_id][0]]] = None
+        lo, hi = self._n, self._n + k
+        self._ranges[order_id] = (lo, k)
+        self._order[lo:hi] = len(self._order_ids)
+        self._order_ids.append(order_id)
+        self._no[lo:hi] = [r["no"] for r in rows]
+        self._size[lo:hi] = [self.sizes.index(r["size"]) for r in rows]
+        self._accept[lo:hi] = [ACCEPT_CODES[r.get("accept")] for r in rows]
+        for f in self.text_fields:
+            d = self._dicts[f]
+            self._text[f][lo:hi] = [d.code(r.get(f, "")) for r in rows]
+        self._n = hi
+
+    def locate(self, order_id: str, no: int):
+        """Posisi baris (order_id, no) atau None."""
+        lo, k = self._ranges.get(order_id, (0, 0))
+        pos = lo + int(no) - 1  # `no` = 1..k berurutan (build_order)
+        if 0 <= pos - lo < k and self._no[pos] == no:
+            return pos
+        hit = np.flatnonzero(self._no[lo:lo + k] == no)  # fallback bila nomor tidak berurutan
+        return lo + int(hit[0]) if len(hit) else None
+
+    def set(self, pos: int, field: str, value):
+        if field == "accept":
+            self._accept[pos] = ACCEPT_CODES[value]
+        elif field in self._text:
+            self._text[field][pos] = self._dicts[field].code(value)
+        else:
+            raise KeyError(field)
+
+    # ---- baca ----
+    def value(self, pos: int, field: str):
+        if field == "no":
+            return int(self._no[pos])
+        if field == "size":
+            return self.sizes[self._size[pos]]
+        if field == "accept":
+            return ACCEPT_VALUES[self._accept[pos]]
+        return self._dicts[field].values[self._text[field][pos]]
+
+    def rows(self, order_id: str) -> list:
+        lo, k = self._ranges.get(order_id, (0, 0))
+        return [ContainerView(self, p) for p in range(lo, lo + k)]
+
+    def counts(self) -> list:
+        """(order_id, size, accept, jumlah) — satu np.unique atas kunci gabungan."""
+        n = self._n
+        key = (self._order[:n].astype(np.int64) * 3 + self._size[:n]) * 3 + self._accept[:n]
+        uniq, cnt = np.unique(key, return_counts=True)
+        return [(self._order_ids[k // 9], self.sizes[(k // 3) % 3], ACCEPT_VALUES[k % 3], int(c))
+                for k, c in zip(uniq.tolist(), cnt.tolist()) if self._order_ids[k // 9] is not None]
+
+    def frame(self, order_id: str):
+        """DataFrame container satu order. Kolom numerik = view slice array (tanpa salin);
+        teks/status = Categorical. `accept` berupa kode (ACCEPT_CODES)."""
+        import pandas as pd
+
+        lo, k = self._ranges.get(order_id, (0, 0))
+        sl = slice(lo, lo + k)
+        cols = {
+            "no": self._no[sl],
+            "size": pd.Categorical.from_codes(self._size[sl], categories=list(self.sizes)),
+            "accept": self._accept[sl],
+        }
+        for f in self.text_fields:
+            # kamus bisa besar (mis. no_container unik); kategori dibatasi ke kode yang dipakai order ini
+            used, codes = np.unique(self._text[f][sl], return_inverse=True)
+            values = self._dicts[f].values
+            cols[f] = pd.Categorical.from_codes(codes, categories=[values[c] for c in used.tolist()])
+        return pd.DataFrame(cols, copy=False)
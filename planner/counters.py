@@ -0,0 +1,66 @@
+from planner.projection import Projection
+from planner.store import SIZES
+
+# =============================
+# Counter accept/reject per order
+# =============================
+# Per order: {size: {"total", "accept", "reject", "pending"}}.
+# Di-update O(1) per container yang `accept`-nya berubah (Accept, Reject,
+# partial "Others"), sehingga summary status & tabel rekap tidak perlu
+# menghitung ulang seluruh baris container.
+
+_STATE = {True: "accept", False: "reject", None: "pending"}
+
+
+def _empty() -> dict:
+    return {sz: {"total": 0, "accept": 0, "reject": 0, "pending": 0} for sz in SIZES}
+
+
+class OrderCounters(Projection):
+    def __init__(self):
+        super().__init__()
+        self._c = {}  # order_id -> {size: {...}}
+
+    def rebuild(self, store):
+        self._c = {}
+        for oid, size, accept, n in store.container_counts():
+            row = self._c.setdefault(oid, _empty()).setdefault(size, {"total": 0, "accept": 0, "reject": 0, "pending": 0})
+            row["total"] += n
+            row[_STATE[accept]] += n
+
+    # event Store
+    def on_order_added(self, order):
+        c = _empty()
+        c["20ft"]["total"] = c["20ft"]["pending"] = int(order["jml_20ft"])
+        c["40ft/HC"]["total"] = c["40ft/HC"]["pending"] = int(order["jml_40ft"])
+        self._c[order["order_id"]] = c
+
+    def on_containers_updated(self, order_id, changes, before):
+        c = self._c.get(order_id)
+        if c is None:
+            return
+        for ch in changes:
+            if "accept" not in ch:
+                continue
+            old = before[ch["no"]]
+            row = c[old["size"]]
+            row[_STATE[old["accept"]]] -= 1
+            row[_STATE[ch["accept"]]] += 1
+
+    # ---- query ----
+    def get(self, order_id: str) -> dict:
+        return self._c.get(order_id) or _empty()
+
+    def totals(self, order_id: str) -> dict:
+        """Jumlah semua ukuran: {"total", "accept", "reject", "pending"}."""
+        out = {"total": 0, "accept": 0, "reject": 0, "pending": 0}
+        for row in self.get(order_id).values():
+            for k in out:
+                out[k] += row[k]
+        return out
+
+    def counts(self) -> list:
+        """(order_id, size, accept, jumlah) seperti Store.container_counts(), dari memori."""
+        with self.lock:
+            return [(oid, sz, acc, row[state]) for oid, c in self._c.items() for sz, row in c.items()
+                    for acc, state in _STATE.items() if row[state]]
@@ -0,0 +1,36 @@
+# =============================
+# Delta st.data_editor detail container → perubahan store
+# =============================
+# Editor vendor menampilkan satu baris per container yang sudah di-ACCEPT
+# (kolom "No.", "Jenis", field detail, "OK"). Streamlit hanya mengirim sel
+# yang diedit (`edited_rows` = {posisi baris: {kolom: nilai baru}}), jadi
+# yang disimpan cukup sel yang nilainya benar-benar beda dari sumbernya.
+# Kolom di luar EDITOR_FIELDS (mis. "Jenis" = size) tidak pernah ikut.
+
+# kolom data_editor detail container → field store
+EDITOR_FIELDS = {
+    "No. Container": "no_container", "No. Seal": "no_seal", "No. Mobil": "no_mobil",
+    "Nama Supir": "nama_supir", "Contact": "contact", "Depo": "depo", "Status": "status",
+}
+
+
+def editor_changes(df_src, edited_rows: dict, statuses, only_ok: bool = False) -> dict:
+    """{no: {field: nilai}} dari delta editor; O(sel yang diedit).
+    Status di luar `statuses` diganti statuses[0]; `only_ok` = hanya baris yang dicentang OK."""
+    changes = {}
+    for pos, cells in edited_rows.items():
+        if only_ok and not cells.get("OK"):
+            continue
+        src = df_src.iloc[int(pos)]
+        fields = {}
+        for col, val in cells.items():
+            if col not in EDITOR_FIELDS:
+                continue
+            val = "" if val is None else str(val)
+            if col == "Status" and val not in statuses:
+                val = statuses[0]  # validasi Status agar tetap di list
+            if val != src[col]:
+                fields[EDITOR_FIELDS[col]] = val
+        if fields:
+            changes[int(src["No."])] = fields
+    return changes
@@ -0,0 +1,68 @@
+import csv
+import io
+import tempfile
+
+# =============================
+# Export order + detail container (xlsx / CSV)
+# =============================
+# Baris di-stream: store → generator → writer → file sementara di disk.
+# Tidak ada DataFrame / list besar di memori, jadi export multi-bulan dengan
+# ratusan ribu baris container memakai memori konstan.
+
+HEADER = [
+    "No DN", "Order ID", "Vendor", "Tgl Stuffing", "Closing Date", "Shipping Point", "Status Order",
+    "No.", "Jenis Container", "Accept", "No. Container", "No. Seal", "No. Mobil", "Nama Supir",
+    "Contact", "Depo", "Status",
+]
+_ACCEPT = {True: "Accept", False: "Reject", None: "Pending"}
+
+
+def iter_rows(orders: list, store):
+    by_id = {o["order_id"]: o for o in orders}
+    for oid, r in store.iter_containers(by_id):
+        o = by_id[oid]
+        yield (
+            o["no_dn"], oid, o["vendor"], o["tgl_stuffing"], o["closing_date"], o["shipping_point"],
+            o["summary_status"], r["no"], r["size"], _ACCEPT[r["accept"]], r["no_container"], r["no_seal"],
+            r["no_mobil"], r["nama_supir"], r["contact"], r["depo"], r["status"],
+        )
+
+
+def to_bytes(write, rows) -> bytes:
+    """Jalankan `write` (write_csv / write_xlsx) ke file sementara lalu return isinya.
+
+    File sementara ditutup (dan dihapus) di sini, jadi aman dipakai sebagai `data`
+    callable di st.download_button: Streamlit tetap butuh bytes utuh untuk dikirim.
+    """
+    with tempfile.TemporaryFile() as fh:
+        write(rows, fh)
+        return fh.read()
+
+
+def write_csv(rows, fh=None):
+    """Tulis CSV (UTF-8 BOM agar rapi di Excel) ke file biner; return file yang sudah di-seek ke awal.
+    Tanpa `fh` dibuat TemporaryFile yang harus ditutup pemanggil (lihat to_bytes)."""
+    fh = fh or tempfile.TemporaryFile()
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    w = csv.writer(text)
+    w.writerow(HEADER)
+    w.writerows(rows)
+    text.flush()
+    text.detach()
+    fh.seek(0)
+    return fh
+
+
+def write_xlsx(rows, fh=None):
+    """Tulis xlsx dengan openpyxl write-only (baris langsung di-flush, tidak disimpan di memori)."""
+    from openpyxl import Workbook
+
+    fh = fh or tempfile.TemporaryFile()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Orders")
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    wb.save(fh)
+    fh.seek(0)
+    return fh
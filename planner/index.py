@@ -0,0 +1,98 @@
+import bisect
+import itertools
+
+from planner.projection import Projection
+
+# =============================
+# OrderIndex
+# =============================
+# - hash  : order_id → order, no_dn → [order_id]
+# - sorted: (tgl_stuffing, seq, order_id) global & per vendor → range query O(log N + k)
+# Tanggal disimpan sebagai string "YYYY-MM-DD" sehingga urutan leksikografis
+# = urutan tanggal (tidak perlu parse `to_date` per order).
+# Order yang dikembalikan adalah dict internal index — perlakukan read-only.
+
+_MAX = float("inf")
+
+
+class OrderIndex(Projection):
+    def __init__(self, orders=()):
+        super().__init__()
+        self._seq = itertools.count()
+        self._clear()
+        for o in orders:
+            self.add(o)
+
+    def _clear(self):
+        self._by_id = {}      # order_id -> order
+        self._key = {}        # order_id -> sort key (tgl, seq, order_id)
+        self._by_dn = {}      # no_dn -> [order_id]
+        self._dates = []      # sorted keys (semua vendor)
+        self._by_vendor = {}  # vendor -> sorted keys
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # ---- maintenance ----
+    def rebuild(self, store):
+        self._clear()
+        for o in store.list_orders():
+            self.add(o)
+
+    def add(self, order: dict):
+        oid = order["order_id"]
+        if oid in self._by_id:
+            self._remove(oid)
+        o = dict(order)
+        key = (o["tgl_stuffing"], next(self._seq), oid)
+        self._by_id[oid] = o
+        self._key[oid] = key
+        self._by_dn.setdefault(o["no_dn"], []).append(oid)
+        bisect.insort(self._dates, key)
+        bisect.insort(self._by_vendor.setdefault(o["vendor"], []), key)
+
+    def _remove(self, oid: str):
+        o = self._by_id.pop(oid)
+        key = self._key.pop(oid)
+        self._by_dn[o["no_dn"]].remove(oid)
+        if not self._by_dn[o["no_dn"]]:
+            del self._by_dn[o["no_dn"]]
+        for keys in (self._dates, self._by_vendor[o["vendor"]]):
+            i = bisect.bisect_left(keys, key)
+            del keys[i]
+
+    def update(self, order_id: str, **fields):
+        o = self._by_id.get(order_id)
+        if o is None:
+            return
+        if any(k in fields for k in ("tgl_stuffing", "vendor", "no_dn")):
+            self.add({**o, **fields})
+        else:
+            o.update(fields)
+
+    # event Store
+    def on_order_added(self, order):
+        self.add(order)
+
+    def on_order_updated(self, order_id, fields):
+        self.update(order_id, **fields)
+
+    # ---- query ----
+    def get(self, order_id: str):
+        return self._by_id.get(order_id)
+
+    def by_dn(self, no_dn: str) -> list:
+        return [self._by_id[oid] for oid in self._by_dn.get(no_dn, ())]
+
+    def by_vendor(self, vendor: str) -> list:
+        return [self._by_id[k[2]] for k in self._by_vendor.get(vendor, ())]
+
+    def between(self, start: str, end: str, vendor: str = None) -> list:
+        """Order dengan start ≤ tgl_stuffing ≤ end (string DATE_FMT), urut tanggal."""
+        keys = self._dates if vendor is None else self._by_vendor.get(vendor, [])
+        lo = bisect.bisect_left(keys, (start,))
+        hi = bisect.bisect_right(keys, (end, _MAX))
+        return [self._by_id[k[2]] for k in keys[lo:hi]]
+
+    def all(self) -> list:
+        return [self._by_id[k[2]] for k in self._dates]
@@ -0,0 +1,66 @@
+import re
+
+import numpy as np
+
+# =============================
+# Nomor container ISO 6346
+# =============================
+# Format: 3 huruf owner + kategori (U/J/Z) + 6 angka serial + 1 check digit,
+# mis. MSKU1234565. Check digit = Σ nilai[i] · 2^i (i = 0..9) mod 11 mod 10,
+# nilai angka = angka itu, huruf A=10 … Z=38 tanpa kelipatan 11 (11, 22, 33).
+#
+# validate() memeriksa satu batch sekaligus: string dinormalisasi lalu
+# dijadikan matriks byte (n × 11) dan dihitung dengan numpy — tanpa loop
+# Python per karakter, sehingga simpan ribuan baris tetap murah.
+
+LENGTH = 11
+CATEGORIES = b"UJZ"
+
+_STRIP = re.compile(r"[^0-9A-Z]")
+_VALUE = np.full(256, -1, dtype=np.int64)
+_VALUE[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+_VALUE[np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)] = [
+    v for v in range(10, 39) if v % 11][:26]
+_WEIGHTS = 2 ** np.arange(LENGTH - 1)
+
+
+def normalize(value) -> str:
+    """Huruf besar, tanpa spasi / tanda baca ("mscu 123456-5" → "MSCU1234565")."""
+    return _STRIP.sub("", str(value or "").upper())
+
+
+def _matrix(values: list) -> tuple:
+    # (byte n × 11, mask panjang tepat 11); nilai sudah dinormalisasi (ASCII)
+    fixed = np.array([v if len(v) == LENGTH else "" for v in values], dtype=f"S{LENGTH}")
+    codes = np.frombuffer(fixed.tobytes(), dtype=np.uint8).reshape(len(values), LENGTH)  # "" → byte 0 semua
+    return codes, np.array([len(v) == LENGTH for v in values], dtype=bool)
+
+
+def _check(values: list) -> tuple:
+    # (check digit seharusnya, -1 bila format salah; digit terakhir yang tertulis)
+    codes, ok = _matrix(values)
+    v = _VALUE[codes]
+    ok &= (v[:, :3] >= 10).all(axis=1) & np.isin(codes[:, 3], np.frombuffer(CATEGORIES, dtype=np.uint8))
+    ok &= ((v[:, 4:] >= 0) & (v[:, 4:] <= 9)).all(axis=1)
+    digit = (v[:, :LENGTH - 1] * _WEIGHTS).sum(axis=1) % 11 % 10
+    return np.where(ok, digit, -1), v[:, -1]
+
+
+def check_digits(values: list) -> np.ndarray:
+    """Check digit yang benar (0-9) per nilai ternormalisasi; -1 bila format tidak valid."""
+    return _check(values)[0]
+
+
+def validate(values: list) -> np.ndarray:
+    """bool per nilai ternormalisasi: format & check digit benar."""
+    expected, actual = _check(values)
+    return (expected >= 0) & (expected == actual)
+
+
+def errors(values: list) -> list:
+    """Pesan error per nilai ternormalisasi ("" = valid)."""
+    expected, actual = _check(values)
+    return ["" if e >= 0 and e == a else
+            f"{v}: format harus 3 huruf + U/J/Z + 7 angka (mis. MSKU1234565)" if e < 0 else
+            f"{v}: check digit salah (seharusnya {v[:-1]}{e})"
+            for v, e, a in zip(values, expected.tolist(), actual.tolist())]
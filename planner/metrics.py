@@ -0,0 +1,146 @@
+import collections
+import functools
+import math
+import os
+import threading
+import time
+
+# =============================
+# Instrumentasi hot path
+# =============================
+# `@timed()` membungkus fungsi (main, halaman, fragment, helper tulis) dan mencatat per
+# panggilan: durasi (ms), baris yang disentuh (`rows(n)` dari dalam fungsi)
+# dan ukuran session state (opsional). Sampel disimpan di ring buffer per
+# fungsi (deque maxlen) — memori tetap, sampel lama terbuang sendiri.
+# Persentil dihitung saat dibaca (halaman Diagnostics / export Prometheus),
+# bukan saat mencatat, jadi overhead per panggilan cuma perf_counter + append.
+#
+# Registry per proses (modul diimport sekali, tidak ikut rerun script); pada
+# mode multi-worker tiap worker punya angka sendiri.
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile(sorted_vals: list, q: float) -> float:
+    # nearest-rank
+    return sorted_vals[max(0, math.ceil(q * len(sorted_vals)) - 1)]
+
+
+class Metrics:
+    def __init__(self, size: int = 2048):
+        self.size = size
+        self._lock = threading.Lock()
+        self._samples = {}   # fn -> deque[(ms, rows, state_bytes)]
+        self._totals = {}    # fn -> [calls, errors, total_ms, total_rows]
+        self._local = threading.local()
+        self._exported = 0.0
+
+    def timed(self, name: str = None, state=None):
+        """Decorator. `state` = callable → ukuran session state (byte) saat fungsi selesai."""
+        def deco(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                stack = self._stack()
+                stack.append(0)
+                failed = False
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:  # st.rerun / st.stop (BaseException) = alur normal, bukan error
+                    failed = True
+                    raise
+                finally:
+                    ms = (time.perf_counter() - t0) * 1000
+                    self.record(label, ms, stack.pop(), state() if state else None, not failed)
+            return wrapper
+        return deco
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def rows(self, n: int):
+        """Tambah jumlah baris yang disentuh ke fungsi ter-`timed` terdalam yang sedang jalan."""
+        stack = self._stack()
+        if stack:
+            stack[-1] += int(n)
+
+    def record(self, name: str, ms: float, rows: int = 0, state_bytes: int = None, ok: bool = True):
+        with self._lock:
+            buf = self._samples.get(name)
+            if buf is None:
+                buf = self._samples[name] = collections.deque(maxlen=self.size)
+                self._totals[name] = [0, 0, 0.0, 0]
+            buf.append((ms, rows, state_bytes))
+            t = self._totals[name]
+            t[0] += 1
+            t[1] += not ok
+            t[2] += ms
+            t[3] += rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def summary(self) -> list:
+        """Satu dict per fungsi: calls/errors/total (sejak start), persentil & rata-rata dari ring buffer."""
+        with self._lock:
+            snap = {k: (list(v), list(self._totals[k])) for k, v in self._samples.items()}
+        out = []
+        for name, (samples, (calls, errors, total_ms, total_rows)) in sorted(snap.items()):
+            ms = sorted(s[0] for s in samples)
+            states = [s[2] for s in samples if s[2] is not None]
+            row = {"fn": name, "calls": calls, "errors": errors, "total_ms": total_ms, "rows": total_rows,
+                   "window": len(samples)}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = _quantile(ms, q)
+            row["max_ms"] = ms[-1]
+            row["rows_per_call"] = sum(s[1] for s in samples) / len(samples)
+            row["state_bytes"] = states[-1] if states else None
+            out.append(row)
+        return out
+
+    def prometheus(self, prefix: str = "truckfinal") -> str:
+        """Text exposition format (summary + counter + gauge)."""
+        rows = self.summary()
+        lines = [f"# HELP {prefix}_call_seconds Durasi panggilan fungsi (ring buffer {self.size} sampel terakhir).",
+                 f"# TYPE {prefix}_call_seconds summary"]
+        for r in rows:
+            for q in QUANTILES:
+                lines.append(f'{prefix}_call_seconds{{fn="{r["fn"]}",quantile="{q}"}} {r[f"p{int(q * 100)}_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_call_seconds_sum{{fn="{r["fn"]}"}} {r["total_ms"] / 1000:.6f}')
+            lines.append(f'{prefix}_call_seconds_count{{fn="{r["fn"]}"}} {r["calls"]}')
+        for metric, key, kind, help_ in (
+            ("call_errors_total", "errors", "counter", "Panggilan yang berakhir dengan exception."),
+            ("rows_total", "rows", "counter", "Baris yang disentuh."),
+            ("session_state_bytes", "state_bytes", "gauge", "Ukuran session state pada panggilan terakhir."),
+        ):
+            vals = [r for r in rows if r[key] is not None]
+            if not vals:
+                continue
+            lines += [f"# HELP {prefix}_{metric} {help_}", f"# TYPE {prefix}_{metric} {kind}"]
+            lines += [f'{prefix}_{metric}{{fn="{r["fn"]}"}} {r[key]}' for r in vals]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, every: float = 15.0):
+        """Tulis prometheus() ke `path` (atomik; mis. direktori textfile node_exporter),
+        paling sering sekali per `every` detik. `{pid}` di path diganti pid worker."""
+        now = time.monotonic()
+        if now - self._exported < every:
+            return
+        self._exported = now
+        path = path.replace("{pid}", str(os.getpid()))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+timed = METRICS.timed
+rows = METRICS.rows
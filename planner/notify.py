@@ -0,0 +1,469 @@
+import json
+import logging
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from email.message import EmailMessage
+
+# =============================
+# Notifikasi keluar (email / WhatsApp webhook) lewat outbox
+# =============================
+# Tombol (buat order, update status) hanya menulis ke store seperti biasa.
+# Listener `Notifier` mengubah event satu tulis store (`notify_batch`, mis.
+# import 200 DN = satu batch) jadi baris outbox — satu transaksi lokal, tanpa
+# jaringan, daftar penerima dari cache (AccountRecipients) — lalu
+# membangunkan `DeliveryPool`:
+#
+#   order_added                      → vendor order tsb ("Order baru")
+#   containers_updated status = done → admin ("Container gate in port")
+#
+# DeliveryPool = beberapa thread background. Setelah dibangunkan, thread
+# menunggu `linger` detik dulu (event beruntun, mis. import 200 DN, jadi
+# satu batch), lalu meng-claim ≤ `batch` baris yang jatuh tempo (claim = geser next_at ke
+# depan selama LEASE detik, jadi worker / proses lain tidak mengambil baris
+# yang sama; worker mati → baris muncul lagi setelah lease habis), lalu
+# mengelompokkan per (channel, penerima) → satu email / satu pesan WA per
+# kelompok. Gagal → attempts + 1, dicoba lagi dengan backoff eksponensial
+# (+ jitter); setelah MAX_ATTEMPTS status "dead" (terlihat di Diagnostics).
+# Pengiriman at-least-once: proses mati di tengah kirim → bisa terkirim dua kali.
+#
+# Outbox:
+#   - MemoryOutbox : list di memori (TRUCK_STORE=memory / test)
+#   - SqliteOutbox : file SQLite (persist setelah restart; dipakai bersama
+#                    oleh semua worker deploy/run_workers.py)
+
+MAX_ATTEMPTS = 6
+BACKOFF = 5.0   # detik sebelum percobaan ke-2; x2 tiap gagal
+LEASE = 120.0   # detik baris yang sedang dikirim tidak di-claim ulang
+STATUSES = ("pending", "sent", "dead")
+
+log = logging.getLogger(__name__)
+
+
+def backoff(attempts: int) -> float:
+    return BACKOFF * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+
+
+class Outbox:
+    def put(self, rows: list):
+        """rows = dict channel, recipient, subject, body."""
+        raise NotImplementedError
+
+    def claim(self, limit: int, now: float = None) -> list:
+        """≤ limit baris pending yang jatuh tempo (dict id, channel, recipient, subject, body, attempts);
+        di-lease LEASE detik."""
+        raise NotImplementedError
+
+    def ack(self, ids: list):
+        raise NotImplementedError
+
+    def fail(self, rows: list, error: str):
+        """Percobaan gagal: jadwalkan ulang (backoff) atau tandai dead."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """{status: jumlah} + "due" (pending yang sudah jatuh tempo)."""
+        raise NotImplementedError
+
+    def failures(self, limit: int = 20) -> list:
+        """Baris dengan error terakhir (dead / sedang retry), terbaru dulu."""
+        raise NotImplementedError
+
+    def requeue_dead(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryOutbox(Outbox):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._ids = 0
+
+    def put(self, rows):
+        now = time.time()
+        with self._lock:
+            for r in rows:
+                self._ids += 1
+                self._rows[self._ids] = {**r, "id": self._ids, "status": "pending", "attempts": 0, "next_at": now,
+                                         "created_at": now, "error": ""}
+
+    def claim(self, limit, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [r for r in self._rows.values() if r["status"] == "pending" and r["next_at"] <= now][:limit]
+            for r in due:
+                r["next_at"] = now + LEASE
+            return [dict(r) for r in due]
+
+    def ack(self, ids):
+        with self._lock:
+            for i in ids:
+                self._rows[i]["status"] = "sent"
+
+    def fail(self, rows, error):
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                r = self._rows[row["id"]]
+                r["attempts"] += 1
+                r["error"] = error
+                if r["attempts"] >= MAX_ATTEMPTS:
+                    r["status"] = "dead"
+                else:
+                    r["next_at"] = now + backoff(r["attempts"])
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            out = dict.fromkeys(STATUSES, 0)
+            for r in self._rows.values():
+                out[r["status"]] += 1
+            out["due"] = sum(r["status"] == "pending" and r["next_at"] <= now for r in self._rows.values())
+        return out
+
+    def failures(self, limit=20):
+        with self._lock:
+            rows = [dict(r) for r in self._rows.values() if r["error"] and r["status"] != "sent"]
+        return sorted(rows, key=lambda r: -r["id"])[:limit]
+
+    def requeue_dead(self):
+        now = time.time()
+        with self._lock:
+            dead = [r for r in self._rows.values() if r["status"] == "dead"]
+            for r in dead:
+                r.update(status="pending", attempts=0, next_at=now)
+        return len(dead)
+
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel    TEXT NOT NULL,
+    recipient  TEXT NOT NULL,
+    subject    TEXT NOT NULL,
+    body       TEXT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'pending',
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    next_at    REAL NOT NULL,
+    created_at REAL NOT NULL,
+    error      TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_at);
+"""
+
+
+class SqliteOutbox(Outbox):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(OUTBOX_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _tx(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            out = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return out
+
+    def put(self, rows):
+        now = time.time()
+        self._tx(lambda conn: conn.executemany(
+            "INSERT INTO outbox (channel, recipient, subject, body, next_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(r["channel"], r["recipient"], r["subject"], r["body"], now, now) for r in rows]))
+
+    def claim(self, limit, now=None):
+        now = time.time() if now is None else now
+
+        def run(conn):
+            rows = [dict(r) for r in conn.execute(
+                "SELECT id, channel, recipient, subject, body, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_at <= ? ORDER BY id LIMIT ?", (now, limit))]
+            conn.executemany("UPDATE outbox SET next_at = ? WHERE id = ?", [(now + LEASE, r["id"]) for r in rows])
+            return rows
+        return self._tx(run)
+
+    def ack(self, ids):
+        self._tx(lambda conn: conn.executemany("UPDATE outbox SET status = 'sent' WHERE id = ?", [(i,) for i in ids]))
+
+    def fail(self, rows, error):
+        now = time.time()
+        params = []
+        for r in rows:
+            attempts = r["attempts"] + 1
+            params.append(("dead" if attempts >= MAX_ATTEMPTS else "pending", attempts, now + backoff(attempts),
+                           error, r["id"]))
+        self._tx(lambda conn: conn.executemany(
+            "UPDATE outbox SET status = ?, attempts = ?, next_at = ?, error = ? WHERE id = ?", params))
+
+    def stats(self):
+        conn = self._conn()
+        out = dict.fromkeys(STATUSES, 0)
+        out.update(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        out["due"] = conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND next_at <= ?",
+                                  (time.time(),)).fetchone()[0]
+        return out
+
+    def failures(self, limit=20):
+        return [dict(r) for r in self._conn().execute(
+            "SELECT * FROM outbox WHERE error != '' AND status != 'sent' ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def requeue_dead(self):
+        return self._tx(lambda conn: conn.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_at = ? WHERE status = 'dead'",
+            (time.time(),)).rowcount)
+
+
+def open_outbox(path: str = None) -> Outbox:
+    """None → MemoryOutbox, selain itu path file SQLite (boleh `sqlite:///path`)."""
+    if not path:
+        return MemoryOutbox()
+    if path.startswith("sqlite:///"):
+        path = path[len("sqlite:///"):]
+    return SqliteOutbox(path)
+
+
+# =============================
+# Sender: satu panggilan = satu kelompok (penerima yang sama)
+# =============================
+def _digest(items: list) -> tuple:
+    # (subject, body) gabungan beberapa notifikasi untuk penerima yang sama
+    if len(items) == 1:
+        return items[0]["subject"], items[0]["body"]
+    subject = f"{len(items)} notifikasi: {items[0]['subject']} …"
+    return subject, "\n\n".join(f"• {r['subject']}\n{r['body']}" for r in items)
+
+
+class SmtpSender:
+    """smtp://[user:pass@]host[:port][?from=alamat&starttls=1]"""
+
+    def __init__(self, url: str, timeout: float = 10):
+        u = urllib.parse.urlsplit(url)
+        q = dict(urllib.parse.parse_qsl(u.query))
+        self.host, self.port = u.hostname or "localhost", u.port or 25
+        self.user, self.password = urllib.parse.unquote(u.username or ""), urllib.parse.unquote(u.password or "")
+        self.sender = q.get("from", "truckfinal@localhost")
+        self.starttls = q.get("starttls") == "1"
+        self.timeout = timeout
+
+    def send(self, recipient: str, items: list):
+        subject, body = _digest(items)
+        msg = EmailMessage()
+        msg["From"], msg["To"], msg["Subject"] = self.sender, recipient, subject
+        msg.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+            smtp.send_message(msg)
+
+
+class WebhookSender:
+    """POST JSON {"to", "text"} ke gateway WhatsApp (atau webhook apa pun); non-2xx = gagal."""
+
+    def __init__(self, url: str, token: str = None, timeout: float = 10):
+        self.url, self.token, self.timeout = url, token, timeout
+
+    def send(self, recipient: str, items: list):
+        subject, body = _digest(items)
+        req = urllib.request.Request(self.url, data=json.dumps({"to": recipient, "text": f"*{subject}*\n{body}"}).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            r.read()
+
+
+# =============================
+# DeliveryPool: thread pengirim
+# =============================
+class DeliveryPool:
+    def __init__(self, outbox: Outbox, senders: dict, workers: int = 2, batch: int = 200, interval: float = 2.0,
+                 linger: float = 0.5):
+        self.outbox = outbox
+        self.senders = senders  # channel -> sender
+        self.workers = workers
+        self.batch = batch
+        self.interval = interval  # poll outbox (retry jatuh tempo / tulisan proses lain)
+        self.linger = linger
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"notify-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.run_once()
+            except Exception:  # outbox sementara tidak bisa dibuka (DB terkunci dsb.) → coba lagi nanti
+                sent = 0
+            if not sent:
+                if self._wake.wait(self.interval):
+                    self._stop.wait(self.linger)
+                self._wake.clear()
+
+    def run_once(self) -> int:
+        """Claim satu batch dan kirim per (channel, penerima). Return jumlah baris yang di-claim."""
+        rows = self.outbox.claim(self.batch)
+        groups = {}
+        for r in rows:
+            groups.setdefault((r["channel"], r["recipient"]), []).append(r)
+        for (channel, recipient), items in groups.items():
+            sender = self.senders.get(channel)
+            try:
+                if sender is None:
+                    raise LookupError(f"channel {channel!r} tidak dikonfigurasi")
+                sender.send(recipient, items)
+            except Exception as e:
+                self.outbox.fail(items, f"{type(e).__name__}: {e}"[:500])
+            else:
+                self.outbox.ack([r["id"] for r in items])
+        return len(rows)
+
+    def drain(self, timeout: float = 10) -> bool:
+        """Tunggu sampai semua baris terkirim atau dead (test / shutdown)."""
+        end = time.time() + timeout
+        while time.time() < end:
+            if not self.outbox.stats()["pending"]:
+                return True
+            self.wake()
+            time.sleep(0.05)
+        return False
+
+
+# =============================
+# Notifier: event store → outbox
+# =============================
+class Notifier:
+    """Listener Store. `recipients(channel, vendor)` → list alamat; vendor=None = admin."""
+
+    def __init__(self, outbox: Outbox, store, channels, recipients, done_status: str, pool: DeliveryPool = None):
+        self.outbox = outbox
+        self.store = store
+        self.channels = list(channels)
+        self.recipients = recipients
+        self.done_status = done_status
+        self.pool = pool
+
+    def _rows(self, vendor, subject: str, body: str) -> list:
+        return [{"channel": ch, "recipient": to, "subject": subject, "body": body}
+                for ch in self.channels for to in self.recipients(ch, vendor)]
+
+    def notify(self, version, event, payload):
+        self.notify_batch([(version, event, payload)])
+
+    def notify_batch(self, events):
+        # Dipanggil di thread penulis setelah commit store: error di sini (outbox terkunci,
+        # get_order gagal, payload aneh) tidak boleh sampai ke tombol atau melewati listener lain
+        try:
+            rows = []
+            for _, event, payload in events:
+                if event == "config_set" and hasattr(self.recipients, "invalidate"):
+                    self.recipients.invalidate()  # akun berubah di proses ini
+                rows += self._event_rows(event, payload)
+            if rows:
+                self.outbox.put(rows)
+                if self.pool is not None:
+                    self.pool.wake()
+        except Exception:
+            log.exception("notifikasi untuk %d event tidak masuk outbox", len(events))
+
+    def _event_rows(self, event: str, payload: dict) -> list:
+        rows = []
+        if event == "order_added":
+            o = payload["order"]
+            rows = self._rows(o["vendor"], f"Order baru {o['no_dn']} — {o['vendor']}", (
+                f"Order {o['order_id']} untuk {o['vendor']}\n"
+                f"No.DN: {o['no_dn']} | Tgl stuffing: {o['tgl_stuffing']} | Closing: {o['closing_date']}\n"
+                f"Shipping point: {o['shipping_point']} | 20ft: {o['jml_20ft']} | 40ft/HC: {o['jml_40ft']}\n"
+                "Silakan accept / reject di menu Orderan."))
+        elif event == "containers_updated":
+            before = payload["before"]
+            done = [ch for ch in payload["changes"]
+                    if ch.get("status") == self.done_status and before.get(ch["no"], {}).get("status") != self.done_status]
+            if done:
+                o = self.store.get_order(payload["order_id"]) or {"order_id": payload["order_id"], "no_dn": "-", "vendor": "-"}
+                cur = {r["no"]: r for r in self.store.get_containers(o["order_id"])}
+                lines = [f"- No. {ch['no']}: {cur.get(ch['no'], {}).get('no_container') or '(no. container kosong)'}"
+                         for ch in done]
+                rows = self._rows(None, f"{len(done)} container {self.done_status} — DN {o['no_dn']} ({o['vendor']})",
+                                  f"Order {o['order_id']} / DN {o['no_dn']} / vendor {o['vendor']}\n" + "\n".join(lines))
+        return rows
+
+
+class AccountRecipients:
+    """recipients() untuk Notifier: email = username akun (admin / vendor tsb) yang berbentuk alamat
+    email; whatsapp = nomor dari `wa_numbers` ({"admin" | nama vendor: "+62…,+62…"}).
+    Daftar akun di-cache `ttl` detik (akun dari worker lain terlihat paling lambat setelah itu)."""
+
+    def __init__(self, store, wa_numbers: dict, ttl: float = 60.0):
+        self.store = store
+        self.wa_numbers = wa_numbers
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._emails = None  # (waktu muat, {"admin" | vendor: [alamat]})
+
+    def invalidate(self):
+        self._emails = None
+
+    def _email_map(self) -> dict:
+        cached = self._emails
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        with self._lock:
+            emails = {}
+            for a in self.store.list_accounts():
+                if "@" in a["username"] and a["role"] in ("admin", "vendor"):
+                    emails.setdefault("admin" if a["role"] == "admin" else a["vendor"], []).append(a["username"])
+            self._emails = (time.monotonic(), emails)
+            return emails
+
+    def __call__(self, channel: str, vendor) -> list:
+        key = "admin" if vendor is None else vendor
+        if channel == "email":
+            return list(self._email_map().get(key, ()))
+        nums = self.wa_numbers.get(key, "")
+        return [n.strip() for n in nums.split(",") if n.strip()]
+
+
+def parse_numbers(spec: str) -> dict:
+    """"admin=+62811…;KAMBING=+62812…,+62813…" → {"admin": "+62811…", "KAMBING": "+62812…,+62813…"}."""
+    out = {}
+    for part in (spec or "").split(";"):
+        key, _, nums = part.partition("=")
+        if key.strip() and nums.strip():
+            out[key.strip()] = nums.strip()
+    return out
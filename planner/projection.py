@@ -0,0 +1,51 @@
+import threading
+
+# =============================
+# Projection: struktur turunan (index, counter, agregat) yang di-maintain
+# incremental dari event Store.
+# =============================
+# Aturan versi:
+#   - event dengan versi = self.version + 1  → di-apply (handler `on_<event>`)
+#   - event lama (≤ self.version)            → sudah termasuk, diabaikan
+#   - selain itu (ada event yang terlewat, mis. tulis dari proses lain)
+#     → diabaikan; `sync()` berikutnya mengambil event yang terlewat dari
+#     changelog store (`store.changes`) dan meng-apply-nya berurutan. Rebuild
+#     penuh hanya bila changelog tidak lengkap (store memory / sudah dipangkas).
+
+
+class Projection:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+
+    def rebuild(self, store):
+        raise NotImplementedError
+
+    def sync(self, store):
+        if store.version() == self.version:
+            return self
+        with self.lock:
+            with store.snapshot():
+                v = store.version()
+                if v == self.version:
+                    return self
+                events = store.changes(self.version) if self.version is not None else None
+                if events is None:
+                    self.rebuild(store)
+                else:
+                    for _, event, payload in events:
+                        self._apply(event, payload)
+                self.version = v
+        return self
+
+    def _apply(self, event: str, payload: dict):
+        handler = getattr(self, f"on_{event}", None)
+        if handler is not None:
+            handler(**payload)
+
+    def notify(self, version, event, payload):
+        with self.lock:
+            if self.version is None or version != self.version + 1:
+                return  # belum pernah sync / event lama / ada yang terlewat → sync()
+            self._apply(event, payload)
+            self.version = version
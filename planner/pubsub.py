@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+
+# =============================
+# Notifikasi perubahan (pub/sub per topik)
+# =============================
+# Setiap topik punya counter versi yang naik saat ada perubahan relevan:
+#   "orders"            : order baru / status / container berubah (semua vendor)
+#   "vendor:<VENDOR>"   : order milik vendor tsb berubah
+#   "order:<order_id>"  : status / detail container satu order berubah
+#   "availability"      : ketersediaan vendor disimpan
+#   "config"            : daftar vendor / akun berubah
+# Halaman yang terbuka (fragment live) membandingkan versi topiknya dengan
+# yang terakhir dilihat, dan view cache memakai versi topik sebagai kunci —
+# tulis ke vendor lain tidak membatalkan cache vendor ini.
+#
+# Backend:
+#   - LocalBroker  : dict in-process (satu server)
+#   - SqliteBroker : tabel di file SQLite bersama (beberapa proses / node
+#                    dengan file yang sama)
+
+
+class Broker:
+    def publish(self, topics):
+        raise NotImplementedError
+
+    def versions(self, topics) -> tuple:
+        """Versi tiap topik (0 = belum pernah berubah), urut sesuai `topics`."""
+        raise NotImplementedError
+
+    def version(self, topic: str) -> int:
+        return self.versions((topic,))[0]
+
+
+class LocalBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def publish(self, topics):
+        with self._lock:
+            for t in topics:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def versions(self, topics):
+        v = self._versions
+        return tuple(v.get(t, 0) for t in topics)
+
+
+class SqliteBroker(Broker):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS topics (topic TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, topics):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO topics (topic, version) VALUES (?, 1) "
+                "ON CONFLICT(topic) DO UPDATE SET version = version + 1",
+                [(t,) for t in topics],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def versions(self, topics):
+        topics = list(topics)
+        rows = dict(self._conn().execute(
+            f"SELECT topic, version FROM topics WHERE topic IN ({', '.join('?' * len(topics))})", topics
+        ).fetchall())
+        return tuple(rows.get(t, 0) for t in topics)
+
+
+class ChangeFeed:
+    """Listener Store → publish topik yang terdampak event."""
+
+    def __init__(self, broker: Broker, store):
+        self.broker = broker
+        self.store = store
+
+    def _vendor(self, order_id: str):
+        o = self.store.get_order(order_id)
+        return o["vendor"] if o else None
+
+    def notify(self, version, event, payload):
+        if event == "order_added":
+            topics = ["orders", f"vendor:{payload['order']['vendor']}"]
+        elif event in ("order_updated", "containers_updated"):
+            oid = payload["order_id"]
+            topics = ["orders", f"order:{oid}", f"vendor:{self._vendor(oid)}"]
+        elif event == "availability_set":
+            topics = ["availability"]
+        elif event == "config_set":
+            topics = ["config"]
+        else:
+            return
+        self.broker.publish(topics)
+
+
+def open_broker(url: str = None) -> Broker:
+    """`local` (default) → LocalBroker, `sqlite:///path.db` atau path file → SqliteBroker."""
+    if not url or url == "local":
+        return LocalBroker()
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteBroker(url)
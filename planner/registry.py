@@ -0,0 +1,121 @@
+from planner.iso6346 import normalize
+from planner.projection import Projection
+
+# =============================
+# ContainerRegistry — no. container & seal yang sedang dipakai
+# =============================
+# Hash index lintas semua order & vendor: (field, nomor ternormalisasi) →
+# {(order_id, no)}. Container "aktif" = tidak di-reject dan belum mencapai
+# status akhir (`done_status`, mis. gate in port); yang tidak aktif dicatat
+# di `_rejected` / `_done`, jadi nomornya boleh dipakai lagi di DN lain.
+#
+# conflicts() memeriksa satu batch simpan: O(1) per baris (lookup dict),
+# termasuk duplikat di dalam batch itu sendiri dan tukar nomor antar baris
+# satu order. Nilai lama diambil dari `before` event containers_updated,
+# sehingga index tidak perlu menyimpan salinan baris container.
+
+FIELDS = ("no_container", "no_seal")
+
+
+class ContainerRegistry(Projection):
+    def __init__(self, done_status: str):
+        super().__init__()
+        self.done_status = done_status
+        self._clear()
+
+    def _clear(self):
+        self._by_no = {f: {} for f in FIELDS}  # field -> nomor -> {(order_id, no)}
+        self._rejected = set()                 # (order_id, no) accept = False
+        self._done = set()                     # (order_id, no) status = done_status
+
+    # ---- maintenance ----
+    def rebuild(self, store):
+        self._clear()
+        orders = [o["order_id"] for o in store.list_orders()]
+        for oid, r in store.iter_containers(orders):
+            doc = (oid, r["no"])
+            self._flag(self._rejected, doc, r.get("accept") is False)
+            self._flag(self._done, doc, r.get("status") == self.done_status)
+            for f in FIELDS:
+                self._put(f, r.get(f), doc)
+
+    @staticmethod
+    def _flag(flags: set, doc, on: bool):
+        if on:
+            flags.add(doc)
+        else:
+            flags.discard(doc)
+
+    def _active(self, doc) -> bool:
+        return doc not in self._rejected and doc not in self._done
+
+    def _put(self, field: str, value, doc):
+        key = normalize(value)
+        if key:
+            self._by_no[field].setdefault(key, set()).add(doc)
+
+    def _drop(self, field: str, value, doc):
+        key = normalize(value)
+        docs = self._by_no[field].get(key)
+        if docs is not None:
+            docs.discard(doc)
+            if not docs:
+                del self._by_no[field][key]
+
+    # event Store
+    def on_containers_updated(self, order_id, changes, before):
+        for ch in changes:
+            doc = (order_id, ch["no"])
+            old = before.get(ch["no"], {})
+            for f in FIELDS:
+                if f in ch:
+                    self._drop(f, old.get(f), doc)
+                    self._put(f, ch[f], doc)
+            if "accept" in ch:
+                self._flag(self._rejected, doc, ch["accept"] is False)
+            if "status" in ch:
+                self._flag(self._done, doc, ch["status"] == self.done_status)
+
+    # ---- query ----
+    def holders(self, field: str, value) -> set:
+        """Container aktif yang memakai nomor ini."""
+        with self.lock:
+            return {d for d in self._by_no[field].get(normalize(value), ()) if self._active(d)}
+
+    def conflicts(self, order_id: str, changes: dict) -> dict:
+        """changes = {no: {field: nilai}} (format editor_changes). Return {no: [pesan]} untuk baris
+        yang memakai nomor container/seal yang sudah aktif di container lain atau dobel di batch.
+        Baris yang ditolak tidak disimpan, jadi nomor lamanya tetap terpakai → cek ulang sampai stabil."""
+        with self.lock:
+            out = {}
+            while True:
+                moving = {(f, order_id, no) for no, fields in changes.items() if no not in out
+                          for f in FIELDS if f in fields}
+                found = self._conflicts(order_id, changes, moving)
+                if found.keys() == out.keys():
+                    return found
+                out = found
+
+    def _conflicts(self, order_id: str, changes: dict, moving: set) -> dict:
+        out, seen = {}, {}
+        for no, fields in changes.items():
+            doc = (order_id, no)
+            status = fields.get("status")
+            if status == self.done_status or (status is None and not self._active(doc)):
+                continue  # container selesai / di-reject: nomornya tidak dikunci
+            for f in FIELDS:
+                key = normalize(fields.get(f))
+                if not key:
+                    continue
+                label = "No. Container" if f == "no_container" else "No. Seal"
+                if (f, key) in seen:
+                    out.setdefault(no, []).append(f"{label} {key} dobel dengan baris {seen[(f, key)]}.")
+                    continue
+                seen[(f, key)] = no
+                for oid, other in sorted(self._by_no[f].get(key, ())):
+                    if (oid, other) == doc or not self._active((oid, other)) or (f, oid, other) in moving:
+                        continue
+                    where = f"baris {other}" if oid == order_id else f"order {oid}"
+                    out.setdefault(no, []).append(f"{label} {key} sudah dipakai di {where}.")
+                    break
+        return out
@@ -0,0 +1,268 @@
+import bisect
+import heapq
+import re
+
+from planner.projection import Projection
+
+# =============================
+# SearchIndex — pencarian global DN / container / truk / supir
+# =============================
+# Dokumen = (order_id, no): no=0 untuk field order (order_id, no_dn), no≥1
+# untuk field container (no_container, no_seal, no_mobil, nama_supir, depo).
+# Nilai dinormalisasi (huruf kecil, tanda baca dibuang) jadi term: tiap kata
+# + gabungan tanpa spasi ("B 1234 XY" → b, 1234, xy, b1234xy).
+#
+#   - inverted : term → {dokumen: jumlah}            (exact)
+#   - prefix   : term urut per 2 huruf awal (bisect) (prefix, O(log n + k))
+#   - trigram  : trigram → [term]                    (fuzzy, salah ketik)
+#     list append-only (lebih hemat dari set); term yang sudah hilang dari
+#     inverted index dilewati saat query (hapus lazy; rebuild membersihkan)
+#
+# Query beberapa kata: kata dengan posting paling sedikit jadi "driver",
+# dokumennya diambil urut skor dan order-nya dicek ke kata lain lewat
+# field dokumen order itu (`_orders`), berhenti begitu `limit` hit terkumpul
+# — biaya query ikut jumlah hasil, bukan jumlah baris.
+#
+# Di-update dari event store (order baru, ganti no_dn, simpan detail
+# container), jadi query tidak pernah scan seluruh container. Container baru
+# selalu kosong saat order dibuat (build_order) — field terisi lewat
+# `containers_updated`.
+
+ORDER_FIELDS = ("order_id", "no_dn")
+CONTAINER_TEXT = ("no_container", "no_seal", "no_mobil", "nama_supir", "depo")
+FIELDS = ORDER_FIELDS + CONTAINER_TEXT
+
+_SPLIT = re.compile(r"[^0-9a-z]+")
+_EXACT, _PREFIX, _FUZZY = 1.0, 0.9, 0.75  # skor maks per jenis cocok
+MIN_FUZZY = 0.5          # koefisien Dice trigram minimum
+FUZZY_BUDGET = 20_000    # maks posting trigram yang dihitung per kata (trigram umum dilewati)
+FUZZY_CANDIDATES = 500   # kandidat term yang dinilai Dice penuh
+
+
+def terms(value) -> list:
+    words = [w for w in _SPLIT.split(str(value).casefold()) if w]
+    if len(words) > 1:
+        words.append("".join(words))
+    return words
+
+
+def _trigrams(term: str) -> set:
+    t = f" {term} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class SearchIndex(Projection):
+    def __init__(self):
+        super().__init__()
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}     # (order_id, no) -> {field: value}
+        self._orders = {}   # order_id -> {no}
+        self._post = {}     # term -> {(order_id, no): jumlah field}
+        self._buckets = {}  # term[:2] -> [term urut]
+        self._tri = {}      # trigram -> [term] (boleh berisi term yang sudah dihapus)
+        self._dead = set()  # term di _tri yang sudah tidak ada di _post
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ---- maintenance ----
+    def rebuild(self, store):
+        orders = store.list_orders()
+        docs = [(o["order_id"], 0, {f: o[f] for f in ORDER_FIELDS}) for o in orders]
+        self.load(docs + [(oid, r["no"], {f: r[f] for f in CONTAINER_TEXT if r.get(f)})
+                          for oid, r in store.iter_containers([o["order_id"] for o in orders])])
+
+    def load(self, docs):
+        """Isi ulang index dari (order_id, no, fields). Jalur bulk: posting diisi langsung,
+        bucket prefix & trigram dibangun sekali di akhir dari daftar term."""
+        with self.lock:
+            self._clear()
+            post = self._post
+            for order_id, no, fields in docs:
+                doc = (order_id, no)
+                if doc in self._docs:
+                    self.set_fields(order_id, no, fields)
+                    continue
+                fields = {f: v for f, v in fields.items() if v}
+                if not fields:
+                    continue
+                self._docs[doc] = fields
+                self._orders.setdefault(order_id, set()).add(no)
+                for value in fields.values():
+                    for t in terms(value):
+                        p = post.get(t)
+                        if p is None:
+                            p = post[t] = {}
+                        p[doc] = p.get(doc, 0) + 1
+            for t in post:
+                self._buckets.setdefault(t[:2], []).append(t)
+                for g in _trigrams(t):
+                    self._tri.setdefault(g, []).append(t)
+            for b in self._buckets.values():
+                b.sort()
+
+    def set_fields(self, order_id: str, no: int, fields: dict):
+        """Ganti nilai field (yang disebut saja) satu dokumen; nilai kosong = hapus dari index."""
+        doc = (order_id, no)
+        with self.lock:
+            cur = self._docs.get(doc)
+            for field, value in fields.items():
+                old = cur.get(field) if cur else None
+                if old == value:
+                    continue
+                if old:
+                    for t in terms(old):
+                        self._unpost(t, doc)
+                    del cur[field]
+                if value:
+                    if cur is None:
+                        cur = self._docs[doc] = {}
+                        self._orders.setdefault(order_id, set()).add(no)
+                    cur[field] = value
+                    for t in terms(value):
+                        self._post_term(t, doc)
+            if cur is not None and not cur:
+                del self._docs[doc]
+                nos = self._orders[order_id]
+                nos.discard(no)
+                if not nos:
+                    del self._orders[order_id]
+
+    def _post_term(self, t: str, doc):
+        p = self._post.get(t)
+        if p is None:
+            p = self._post[t] = {}
+            bisect.insort(self._buckets.setdefault(t[:2], []), t)
+            if t not in self._dead:
+                for g in _trigrams(t):
+                    self._tri.setdefault(g, []).append(t)
+            self._dead.discard(t)
+        p[doc] = p.get(doc, 0) + 1
+
+    def _unpost(self, t: str, doc):
+        p = self._post[t]
+        if p[doc] > 1:
+            p[doc] -= 1
+            return
+        del p[doc]
+        if p:
+            return
+        del self._post[t]
+        b = self._buckets[t[:2]]
+        del b[bisect.bisect_left(b, t)]
+        self._dead.add(t)  # masih tercatat di _tri; dipakai lagi bila term muncul kembali
+
+    # event Store
+    def on_order_added(self, order):
+        self.set_fields(order["order_id"], 0, {f: order[f] for f in ORDER_FIELDS})
+
+    def on_order_updated(self, order_id, fields):
+        if "no_dn" in fields:
+            self.set_fields(order_id, 0, {"no_dn": fields["no_dn"]})
+
+    def on_containers_updated(self, order_id, changes, before):
+        for ch in changes:
+            text = {f: ch[f] for f in CONTAINER_TEXT if f in ch}
+            if text:
+                self.set_fields(order_id, ch["no"], text)
+
+    # ---- query ----
+    def _prefix_terms(self, w: str, limit: int) -> list:
+        if len(w) >= 2:
+            buckets = [self._buckets.get(w[:2], [])]
+        else:
+            buckets = [b for k, b in sorted(self._buckets.items()) if k.startswith(w)]
+        out = []
+        for b in buckets:
+            i = bisect.bisect_left(b, w)
+            while i < len(b) and b[i].startswith(w) and len(out) < limit:
+                out.append((b[i], _EXACT if b[i] == w else _PREFIX - 0.1 * (1 - len(w) / len(b[i]))))
+                i += 1
+        return out
+
+    def _fuzzy_terms(self, w: str, limit: int) -> list:
+        grams = _trigrams(w)
+        # trigram paling jarang duluan; berhenti sebelum melewati budget (trigram umum ≈ tidak informatif)
+        postings = sorted((self._tri.get(g, ()) for g in grams), key=len)
+        hits, used = {}, 0
+        for i, p in enumerate(postings):
+            if i and used + len(p) > FUZZY_BUDGET:
+                break
+            used += len(p)
+            for t in p:
+                hits[t] = hits.get(t, 0) + 1
+        for t in self._dead.intersection(hits) if self._dead else ():
+            del hits[t]
+        cand = heapq.nlargest(FUZZY_CANDIDATES, hits, key=hits.get)
+        scored = []
+        for t in cand:
+            dice = 2 * len(grams & _trigrams(t)) / (len(grams) + len(t))
+            if dice >= MIN_FUZZY:
+                scored.append((_FUZZY * dice, t))
+        return [(t, s) for s, t in heapq.nlargest(limit, scored)]
+
+    def _match(self, w: str, limit: int, fuzzy: bool, max_terms: int) -> dict:
+        """term → skor untuk satu kata query (prefix; fuzzy bila tidak ada term yang sama persis
+        dan hasil prefix < limit dokumen — lookup DN / no. container lengkap tidak scan trigram)."""
+        matched = dict(self._prefix_terms(w, max_terms))
+        if (fuzzy and len(w) >= 3 and w not in self._post
+                and sum(len(self._post[t]) for t in matched) < limit):
+            for t, sc in self._fuzzy_terms(w, max_terms):
+                matched.setdefault(t, sc)
+        return matched
+
+    def _best_in_order(self, oid: str, matched: dict) -> float:
+        best = 0.0
+        for no in self._orders.get(oid, ()):
+            for value in self._docs[(oid, no)].values():
+                for t in terms(value):
+                    best = max(best, matched.get(t, 0.0))
+        return best
+
+    def search(self, query: str, limit: int = 50, fuzzy: bool = True, max_terms: int = 200, where=None) -> list:
+        """Hit urut skor: dict order_id, no, field, value, score (1 = sama persis).
+        Beberapa kata = semua kata harus cocok di order yang sama (boleh beda container);
+        skor = rata-rata skor tiap kata. `where(order_id)` → False = order dilewati (mis. vendor lain)."""
+        words = terms(query)
+        if len(words) > 1:
+            words = list(dict.fromkeys(words[:-1]))  # gabungan kata hanya untuk nilai yang di-index
+        if not words:
+            return []
+        with self.lock:
+            per_word = [self._match(w, limit, fuzzy, max_terms) for w in words]
+            per_word.sort(key=lambda m: sum(len(self._post[t]) for t in m))
+            driver, others = per_word[0], per_word[1:]
+            top, seen, checked = [], set(), {}  # top = min-heap (skor, -urutan, dokumen, term) ukuran limit
+            for t, sc in sorted(driver.items(), key=lambda kv: -kv[1]):
+                # batas atas skor dokumen term ini (kata lain cocok persis); tidak mungkin masuk top → selesai
+                bound = (sc + len(others) * _EXACT) / len(per_word)
+                if len(top) >= limit and bound <= top[0][0]:
+                    break
+                for doc in self._post[t]:
+                    if len(top) >= limit and bound <= top[0][0]:
+                        break
+                    if doc in seen:
+                        continue
+                    seen.add(doc)
+                    rest = checked.get(doc[0])
+                    if rest is None:
+                        ok = where is None or where(doc[0])
+                        rest = checked[doc[0]] = [self._best_in_order(doc[0], m) for m in others] if ok else [0.0]
+                    if all(rest):
+                        item = ((sc + sum(rest)) / len(per_word), -len(seen), doc, t)
+                        if len(top) < limit:
+                            heapq.heappush(top, item)
+                        elif item > top[0]:
+                            heapq.heapreplace(top, item)
+            out = []
+            for sc, _, (oid, no), t in sorted(top, reverse=True):
+                fields = self._docs[(oid, no)]
+                # field yang memuat term driver; bila lebih dari satu, yang paling banyak cocok dengan kata lain
+                cands = [f for f in FIELDS if f in fields and t in terms(fields[f])]
+                field = max(cands, key=lambda f: sum(max((m.get(x, 0.0) for x in terms(fields[f])), default=0.0)
+                                                     for m in others), default=None)
+                out.append({"order_id": oid, "no": no, "field": field, "value": fields.get(field, ""),
+                            "score": round(sc, 3)})
+            return out
@@ -0,0 +1,898 @@
+import contextlib
+import copy
+import datetime as dt
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+
+# =============================
+# Storage layer (shared antar session)
+# =============================
+# Semua order, baris container dan ketersediaan vendor disimpan di sini,
+# bukan di st.session_state, supaya Admin & Vendor melihat data yang sama.
+# Backend:
+#   - MemoryStore : dict in-process (untuk test / demo)
+#   - SqliteStore : file SQLite (WAL) — persist & aman untuk banyak session
+#
+# Setiap tulis menaikkan `version()` dan mengirim event ke listener (index,
+# counter, dsb.) yang di-subscribe, supaya struktur turunan bisa di-update
+# incremental tanpa scan ulang seluruh data.
+#
+# Ledger reservasi: per (tanggal, vendor) jumlah container 20ft/40ft yang
+# sudah terpakai order (accept None/True; baris Reject melepas kapasitas).
+# Cek "sisa = ketersediaan - terpakai" dan update ledger dilakukan di
+# transaksi/lock yang sama dengan tulis order/container/ketersediaan, jadi
+# dua submit bersamaan tidak bisa melebihi kapasitas → CapacityError.
+#
+# Konfigurasi (daftar vendor & akun login) juga disimpan di store, supaya
+# beberapa proses server yang memakai file SQLite yang sama melihat akun dan
+# vendor yang sama. Isi awal diambil dari konstanta app (`seed_config`).
+#
+# Changelog (SQLite): setiap event ditulis ke tabel `changelog` di transaksi
+# yang sama dengan tulisnya, berkunci versi. Worker lain yang ketinggalan
+# beberapa versi (tulis dari proses lain) mengambil event yang terlewat lewat
+# `changes(after)` dan meng-apply delta-nya, bukan rebuild penuh. Hanya
+# CHANGELOG_KEEP event terakhir yang disimpan; lebih jauh dari itu → rebuild.
+
+SIZES = ("20ft", "40ft/HC")
+ACCEPT_CODES = {None: 0, True: 1, False: 2}
+ACCEPT_VALUES = (None, True, False)
+CHANGELOG_KEEP = 100_000
+CONTAINER_FIELDS = ("no_container", "no_seal", "no_mobil", "nama_supir", "contact", "depo", "status")
+
+
+class CapacityError(ValueError):
+    """Tulis ditolak karena akan melebihi ketersediaan vendor (pesan siap ditampilkan)."""
+
+
+def _demand(items) -> dict:
+    # {(tgl_stuffing, vendor): [n20, n40]} container yang memakan kapasitas
+    need = {}
+    for order, containers in items:
+        n = need.setdefault((order["tgl_stuffing"], order["vendor"]), [0, 0])
+        for r in containers:
+            if r.get("accept") is not False:
+                n[SIZES.index(r["size"])] += 1
+    return need
+
+
+def _check_capacity(date: str, vendor: str, need, avail, reserved):
+    for i, size in enumerate(SIZES):
+        left = avail[i] - reserved[i]
+        if need[i] > 0 and need[i] > left:
+            raise CapacityError(
+                f"Jumlah {size} ({need[i]}) melebihi sisa ketersediaan {vendor} untuk {date} ({max(0, left)})."
+            )
+
+
+def _hash_password(password: str, salt: bytes = None) -> str:
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 100_000)
+    return f"{salt.hex()}${digest.hex()}"
+
+
+def _verify_password(password: str, stored: str) -> bool:
+    salt, _, _ = stored.partition("$")
+    return hmac.compare_digest(_hash_password(password, bytes.fromhex(salt)), stored)
+
+
+def _check_not_below(a20: int, a40: int, reserved):
+    for size, a, r in zip(SIZES, (a20, a40), reserved):
+        if a < r:
+            raise CapacityError(f"Ketersediaan {size} tidak boleh kurang dari yang sudah dipesan ({r}).")
+
+
+def _check_rows_not_below(rows: list, date: str, a20: int, a40: int, reserved):
+    # banyak tanggal sekaligus: sebut tanggal yang bermasalah di pesan error
+    try:
+        _check_not_below(a20, a40, reserved)
+    except CapacityError as e:
+        if len(rows) == 1:
+            raise
+        raise CapacityError(f"{date}: {e}") from None
+
+
+class Store:
+    """Interface yang dipakai aplikasi; lihat MemoryStore / SqliteStore."""
+
+    def __init__(self):
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """`listener.notify(version, event, payload)` dipanggil setelah setiap tulis. Listener yang
+        punya `notify_batch(events)` menerima semua event satu tulis sekaligus (mis. import 200 DN)."""
+        self._listeners.append(listener)
+        return listener
+
+    def _emit(self, version: int, event: str, **payload):
+        self._emit_events([(version, event, payload)])
+
+    def _emit_events(self, events):
+        # events = [(versi, event, payload)] dari satu tulis (transaksi / lock)
+        if not events:
+            return
+        for listener in list(self._listeners):
+            batch = getattr(listener, "notify_batch", None)
+            if batch is not None:
+                batch(events)
+                continue
+            for version, event, payload in events:
+                listener.notify(version, event, payload)
+
+    def version(self) -> int:
+        raise NotImplementedError
+
+    def changes(self, after: int):
+        """Event (versi, event, payload) dengan versi > `after`, urut versi — atau None bila
+        tidak lengkap tersedia (store tanpa changelog / sudah dipangkas) → pemanggil rebuild.
+        Panggil di dalam `snapshot()` supaya konsisten dengan `version()`."""
+        return None
+
+    def snapshot(self):
+        """Context manager: semua read di dalamnya konsisten dengan `version()`."""
+        raise NotImplementedError
+
+    def add_order(self, order: dict, containers: list):
+        self.add_orders([(order, containers)])
+
+    def add_orders(self, items: list):
+        """Simpan banyak (order, containers) dalam satu transaksi; satu event per order.
+        Kapasitas vendor dicek & direservasi atomik; CapacityError → tidak ada yang disimpan."""
+        raise NotImplementedError
+
+    def get_order(self, order_id: str):
+        raise NotImplementedError
+
+    def list_orders(self) -> list:
+        raise NotImplementedError
+
+    def update_order(self, order_id: str, **fields):
+        """Ubah field order (kolom ORDER_COLS selain order_id; field lain diabaikan). Event `order_updated`."""
+        raise NotImplementedError
+
+    def get_containers(self, order_id: str) -> list:
+        """List baris container (Mapping dict-like, urut `no`)."""
+        raise NotImplementedError
+
+    def containers_frame(self, order_id: str):
+        """DataFrame container satu order (kolom CONTAINER_COLS; `accept` = kode ACCEPT_CODES)."""
+        import pandas as pd
+
+        rows = self.get_containers(order_id)
+        df = pd.DataFrame(rows, columns=list(CONTAINER_COLS))
+        df["accept"] = [ACCEPT_CODES[r["accept"]] for r in rows]
+        return df
+
+    def iter_containers(self, order_ids):
+        """Yield (order_id, container) untuk banyak order tanpa memuat semuanya sekaligus."""
+        for oid in order_ids:
+            for r in self.get_containers(oid):
+                yield oid, r
+
+    def update_containers(self, order_id: str, changes: list, check=None) -> int:
+        """`changes` = list dict berisi "no" + field yang diubah. Return jumlah baris.
+        Event `containers_updated` membawa `before` = {no: nilai lama field tsb + "size"}.
+        Perubahan `accept` ke/dari False melepas/mengambil lagi kapasitas (bisa CapacityError).
+        Tidak ada baris yang berubah → versi tetap, tanpa event.
+        `check(changes) -> changes` dipanggil di dalam transaksi tulis, sebelum ada yang diubah
+        (writer lain — juga dari proses lain — menunggu): return baris yang boleh disimpan."""
+        raise NotImplementedError
+
+    def container_counts(self):
+        """Iterasi (order_id, size, accept, jumlah) — dipakai untuk rebuild counter."""
+        raise NotImplementedError
+
+    def get_availability(self, date: str) -> dict:
+        raise NotImplementedError
+
+    def set_availability(self, date: str, vendor: str, a20: int, a40: int):
+        """Event `availability_set` membawa `before` = (a20, a40) lama vendor tsb.
+        CapacityError bila nilai baru di bawah yang sudah dipesan."""
+        self.set_availability_many([(date, vendor, a20, a40)])
+
+    def set_availability_many(self, rows: list):
+        """Simpan banyak (date, vendor, a20, a40) dalam satu transaksi; satu event `availability_set`
+        per baris. CapacityError → tidak ada yang disimpan."""
+        raise NotImplementedError
+
+    def get_remaining(self, date: str) -> dict:
+        """Sisa kapasitas {vendor: {"20ft": n, "40ft/HC": n}}; hanya vendor yang mengisi ketersediaan > 0."""
+        raise NotImplementedError
+
+    def availability_totals(self):
+        """Iterasi (date, total 20ft, total 40ft/HC) semua vendor — untuk rebuild agregat."""
+        raise NotImplementedError
+
+    def availability_rows(self, start: str, end: str):
+        """Iterasi (date, vendor, a20, a40) untuk start <= date <= end."""
+        raise NotImplementedError
+
+    # ---- konfigurasi (vendor & akun) ----
+    def list_vendors(self) -> list:
+        """Nama vendor, urut sesuai urutan ditambahkan."""
+        raise NotImplementedError
+
+    def add_vendor(self, vendor: str):
+        """Tambah vendor (tidak apa-apa bila sudah ada). Event `config_set`."""
+        raise NotImplementedError
+
+    def set_account(self, username: str, password: str, role: str, vendor: str = None):
+        """Buat / ganti akun (password disimpan sebagai hash). Event `config_set`."""
+        raise NotImplementedError
+
+    def check_login(self, username: str, password: str):
+        """Akun {"username", "role", "vendor"} bila password cocok, selain itu None."""
+        raise NotImplementedError
+
+    def list_accounts(self) -> list:
+        """Semua akun {"username", "role", "vendor"} (tanpa hash password)."""
+        raise NotImplementedError
+
+    def seed_config(self, accounts: dict, vendors: list) -> bool:
+        """Isi vendor & akun awal bila store belum punya konfigurasi sama sekali.
+        Aman dipanggil bersamaan dari banyak proses; return True bila benar-benar mengisi."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# =============================
+# In-memory backend
+# =============================
+class MemoryStore(Store):
+    def __init__(self):
+        from planner.columnar import ContainerTable  # numpy hanya dimuat bila store memory dipakai
+
+        super().__init__()
+        self._lock = threading.RLock()
+        self._version = 0
+        self._orders = {}        # order_id -> order dict (urutan insert dipertahankan)
+        self._containers = ContainerTable(SIZES, CONTAINER_FIELDS)  # kolumnar, lihat planner/columnar.py
+        self._availability = {}  # date -> {vendor: {"20ft": n, "40ft/HC": n}}
+        self._reserved = {}      # (date, vendor) -> [terpakai 20ft, terpakai 40ft/HC]
+        self._vendors = []
+        self._accounts = {}      # username -> {"password_hash", "role", "vendor"}
+
+    def _avail(self, date, vendor) -> tuple:
+        r = self._availability.get(date, {}).get(vendor, {"20ft": 0, "40ft/HC": 0})
+        return r["20ft"], r["40ft/HC"]
+
+    def _bump(self) -> int:
+        self._version += 1
+        return self._version
+
+    def version(self):
+        return self._version
+
+    def snapshot(self):
+        return self._lock
+
+    def add_orders(self, items):
+        events = []
+        with self._lock:
+            need = _demand(items)
+            for (date, vendor), n in need.items():
+                _check_capacity(date, vendor, n, self._avail(date, vendor), self._reserved.get((date, vendor), (0, 0)))
+            for key, n in need.items():
+                r = self._reserved.setdefault(key, [0, 0])
+                r[0] += n[0]
+                r[1] += n[1]
+            for order, containers in items:
+                self._orders[order["order_id"]] = dict(order)
+                self._containers.append(order["order_id"], containers)
+                events.append((self._bump(), "order_added", {"order": dict(order)}))
+        self._emit_events(events)
+
+    def get_order(self, order_id):
+        with self._lock:
+            o = self._orders.get(order_id)
+            return dict(o) if o else None
+
+    def list_orders(self):
+        with self._lock:
+            return [dict(o) for o in self._orders.values()]
+
+    def update_order(self, order_id, **fields):
+        fields = {k: v for k, v in fields.items() if k in ORDER_COLS and k != "order_id"}
+        if not fields:
+            return
+        with self._lock:
+            if order_id not in self._orders:
+                return
+            self._orders[order_id].update(fields)
+            v = self._bump()
+        self._emit(v, "order_updated", order_id=order_id, fields=fields)
+
+    def get_containers(self, order_id):
+        # ContainerView: Mapping read-only, dibaca live dari tabel kolumnar
+        with self._lock:
+            return self._containers.rows(order_id)
+
+    def iter_containers(self, order_ids):
+        # satu kali lock untuk semua order (bukan get_containers per order)
+        with self._lock:
+            groups = [(oid, self._containers.rows(oid)) for oid in order_ids]
+        for oid, rows in groups:
+            for r in rows:
+                yield oid, r
+
+    def containers_frame(self, order_id):
+        with self._lock:
+            return self._containers.frame(order_id)
+
+    def update_containers(self, order_id, changes, check=None):
+        table = self._containers
+        with self._lock:
+            if check is not None:
+                changes = check(changes)
+            updates, delta = [], [0, 0]
+            for ch in changes:
+                pos = table.locate(order_id, ch["no"])
+                if pos is None:
+                    continue
+                fields = {k: v for k, v in ch.items() if k in CONTAINER_COLS and k not in ("no", "size")}
+                if "accept" in fields:
+                    delta[SIZES.index(table.value(pos, "size"))] += (
+                        (fields["accept"] is not False) - (table.value(pos, "accept") is not False))
+                updates.append((ch, pos, fields))
+            key = None
+            if delta != [0, 0]:
+                o = self._orders[order_id]
+                key = (o["tgl_stuffing"], o["vendor"])
+                _check_capacity(*key, delta, self._avail(*key), self._reserved.get(key, (0, 0)))
+            applied, before = [], {}
+            for ch, pos, fields in updates:
+                before[ch["no"]] = {k: table.value(pos, k) for k in ("size", *fields)}
+                for k, v in fields.items():
+                    table.set(pos, k, v)
+                applied.append(ch)
+            if key:
+                res = self._reserved.setdefault(key, [0, 0])
+                res[0] += delta[0]
+                res[1] += delta[1]
+            v = self._bump() if applied else None
+        if applied:
+            self._emit(v, "containers_updated", order_id=order_id, changes=applied, before=before)
+        return len(applied)
+
+    def container_counts(self):
+        with self._lock:
+            return self._containers.counts()
+
+    def get_availability(self, date):
+        with self._lock:
+            return copy.deepcopy(self._availability.get(date, {}))
+
+    def set_availability_many(self, rows):
+        rows = [(date, vendor, int(a20), int(a40)) for date, vendor, a20, a40 in rows]
+        events = []
+        with self._lock:
+            for date, vendor, a20, a40 in rows:
+                _check_rows_not_below(rows, date, a20, a40, self._reserved.get((date, vendor), (0, 0)))
+            for date, vendor, a20, a40 in rows:
+                day = self._availability.setdefault(date, {})
+                old = day.get(vendor, {"20ft": 0, "40ft/HC": 0})
+                day[vendor] = {"20ft": a20, "40ft/HC": a40}
+                events.append((self._bump(), "availability_set", {
+                    "date": date, "vendor": vendor, "a20": a20, "a40": a40, "before": (old["20ft"], old["40ft/HC"])}))
+        self._emit_events(events)
+
+    def get_remaining(self, date):
+        with self._lock:
+            out = {}
+            for vendor, r in self._availability.get(date, {}).items():
+                if r["20ft"] + r["40ft/HC"] > 0:
+                    used = self._reserved.get((date, vendor), (0, 0))
+                    out[vendor] = {"20ft": max(0, r["20ft"] - used[0]), "40ft/HC": max(0, r["40ft/HC"] - used[1])}
+            return out
+
+    def availability_totals(self):
+        with self._lock:
+            return [(d, sum(r["20ft"] for r in day.values()), sum(r["40ft/HC"] for r in day.values()))
+                    for d, day in self._availability.items()]
+
+    def availability_rows(self, start, end):
+        with self._lock:
+            return [(d, v, r["20ft"], r["40ft/HC"]) for d, day in self._availability.items() if start <= d <= end
+                    for v, r in day.items()]
+
+    def list_vendors(self):
+        with self._lock:
+            return list(self._vendors)
+
+    def add_vendor(self, vendor):
+        with self._lock:
+            if vendor in self._vendors:
+                return
+            self._vendors.append(vendor)
+            v = self._bump()
+        self._emit(v, "config_set")
+
+    def set_account(self, username, password, role, vendor=None):
+        with self._lock:
+            self._accounts[username] = {"password_hash": _hash_password(password), "role": role, "vendor": vendor}
+            v = self._bump()
+        self._emit(v, "config_set")
+
+    def check_login(self, username, password):
+        with self._lock:
+            a = self._accounts.get(username)
+        if a is None or not _verify_password(password, a["password_hash"]):
+            return None
+        return {"username": username, "role": a["role"], "vendor": a["vendor"]}
+
+    def list_accounts(self):
+        with self._lock:
+            return [{"username": u, "role": a["role"], "vendor": a["vendor"]} for u, a in self._accounts.items()]
+
+    def seed_config(self, accounts, vendors):
+        with self._lock:
+            if self._vendors or self._accounts:
+                return False
+            self._vendors = list(vendors)
+            for u, a in accounts.items():
+                self._accounts[u] = {"password_hash": _hash_password(a["password"]), "role": a["role"],
+                                     "vendor": a.get("vendor")}
+            v = self._bump()
+        self._emit(v, "config_set")
+        return True
+
+
+# =============================
+# SQLite backend
+# =============================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id       TEXT PRIMARY KEY,
+    vendor         TEXT NOT NULL,
+    tgl_stuffing   TEXT NOT NULL,
+    closing_date   TEXT NOT NULL,
+    no_dn          TEXT NOT NULL,
+    shipping_point TEXT NOT NULL DEFAULT '',
+    jml_20ft       INTEGER NOT NULL DEFAULT 0,
+    jml_40ft       INTEGER NOT NULL DEFAULT 0,
+    created_at     TEXT NOT NULL,
+    summary_status TEXT NOT NULL DEFAULT 'Pending'
+);
+CREATE INDEX IF NOT EXISTS ix_orders_vendor_tgl ON orders(vendor, tgl_stuffing);
+CREATE INDEX IF NOT EXISTS ix_orders_tgl ON orders(tgl_stuffing);
+CREATE INDEX IF NOT EXISTS ix_orders_dn ON orders(no_dn);
+
+CREATE TABLE IF NOT EXISTS containers (
+    order_id     TEXT NOT NULL,
+    no           INTEGER NOT NULL,
+    size         TEXT NOT NULL,
+    accept       INTEGER,
+    no_container TEXT NOT NULL DEFAULT '',
+    no_seal      TEXT NOT NULL DEFAULT '',
+    no_mobil     TEXT NOT NULL DEFAULT '',
+    nama_supir   TEXT NOT NULL DEFAULT '',
+    contact      TEXT NOT NULL DEFAULT '',
+    depo         TEXT NOT NULL DEFAULT '',
+    status       TEXT NOT NULL,
+    PRIMARY KEY (order_id, no)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS availability (
+    date   TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    a20    INTEGER NOT NULL DEFAULT 0,
+    a40    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, vendor)
+) WITHOUT ROWID;
+
+-- ledger: container terpakai per (tanggal, vendor); accept = 0 (Reject) tidak dihitung
+CREATE TABLE IF NOT EXISTS reservations (
+    date   TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    r20    INTEGER NOT NULL DEFAULT 0,
+    r40    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, vendor)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS vendors (
+    vendor TEXT PRIMARY KEY,
+    pos    INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    role          TEXT NOT NULL,
+    vendor        TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('ledger', 0);
+
+-- event per versi data (payload JSON), untuk sync delta antar proses; dipangkas ke CHANGELOG_KEEP
+CREATE TABLE IF NOT EXISTS changelog (
+    version INTEGER PRIMARY KEY,
+    event   TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+ORDER_COLS = ("order_id", "vendor", "tgl_stuffing", "closing_date", "no_dn", "shipping_point",
+              "jml_20ft", "jml_40ft", "created_at", "summary_status")
+CONTAINER_COLS = ("no", "size", "accept") + CONTAINER_FIELDS
+
+
+LEDGER_BACKFILL = """
+INSERT INTO reservations (date, vendor, r20, r40)
+SELECT o.tgl_stuffing, o.vendor, SUM(c.size = '20ft'), SUM(c.size = '40ft/HC')
+FROM containers c JOIN orders o ON o.order_id = c.order_id
+WHERE c.accept IS NOT 0
+GROUP BY o.tgl_stuffing, o.vendor
+"""
+RESERVE_SQL = (
+    "INSERT INTO reservations (date, vendor, r20, r40) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(date, vendor) DO UPDATE SET r20 = r20 + excluded.r20, r40 = r40 + excluded.r40"
+)
+
+
+def _json_default(v):
+    if isinstance(v, (dt.date, dt.datetime)):
+        return v.isoformat()
+    raise TypeError(f"{type(v).__name__} tidak bisa disimpan di changelog")
+
+
+def _encode_payload(payload: dict) -> str:
+    return json.dumps(payload, default=_json_default, separators=(",", ":"))
+
+
+def _decode_payload(event: str, text: str) -> dict:
+    # kebalikan _encode_payload: JSON tidak punya datetime, tuple, atau key int
+    p = json.loads(text)
+    if event == "order_added":
+        p["order"]["created_at"] = dt.datetime.fromisoformat(p["order"]["created_at"])
+    elif event == "containers_updated":
+        p["before"] = {int(no): old for no, old in p["before"].items()}
+    elif event == "availability_set":
+        p["before"] = tuple(p["before"])
+    return p
+
+
+def _accept_to_db(v):
+    return None if v is None else int(bool(v))
+
+
+def _accept_from_db(v):
+    return None if v is None else bool(v)
+
+
+class SqliteStore(Store):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        self._backfill_ledger()
+
+    # satu koneksi per thread (Streamlit menjalankan tiap session di thread sendiri)
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        return _Tx(self._conn())
+
+    def _backfill_ledger(self):
+        # DB lama (sebelum ada tabel reservations): isi ledger sekali dari container yang ada
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT value FROM meta WHERE key = 'ledger'").fetchone()[0] == 0:
+                conn.execute("DELETE FROM reservations")
+                conn.execute(LEDGER_BACKFILL)
+                conn.execute("UPDATE meta SET value = 1 WHERE key = 'ledger'")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _capacity(conn, date: str, vendor: str) -> tuple:
+        # (ketersediaan 20/40, terpakai 20/40) — dipanggil di dalam transaksi tulis
+        av = conn.execute("SELECT a20, a40 FROM availability WHERE date = ? AND vendor = ?", (date, vendor)).fetchone()
+        rs = conn.execute("SELECT r20, r40 FROM reservations WHERE date = ? AND vendor = ?", (date, vendor)).fetchone()
+        return tuple(av) if av else (0, 0), tuple(rs) if rs else (0, 0)
+
+    def version(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def changes(self, after):
+        missing = self.version() - after
+        if missing > CHANGELOG_KEEP:
+            return None
+        rows = self._conn().execute(
+            "SELECT version, event, payload FROM changelog WHERE version > ? ORDER BY version", (after,)
+        ).fetchall()
+        if len(rows) != missing:
+            return None  # sebagian sudah dipangkas / ditulis sebelum ada changelog
+        return [(v, event, _decode_payload(event, payload)) for v, event, payload in rows]
+
+    @contextlib.contextmanager
+    def snapshot(self):
+        conn = self._conn()
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _order_from_row(row) -> dict:
+        o = dict(row)
+        o["created_at"] = dt.datetime.fromisoformat(o["created_at"])
+        return o
+
+    @staticmethod
+    def _container_from_row(row) -> dict:
+        r = {k: row[k] for k in CONTAINER_COLS}
+        r["accept"] = _accept_from_db(r["accept"])
+        return r
+
+    def add_orders(self, items):
+        if not items:
+            return
+        need = _demand(items)
+        tx = self._write()
+        with tx as conn:
+            for (date, vendor), n in need.items():
+                _check_capacity(date, vendor, n, *self._capacity(conn, date, vendor))
+            conn.executemany(RESERVE_SQL, [(date, vendor, n[0], n[1]) for (date, vendor), n in need.items()])
+            conn.executemany(
+                f"INSERT INTO orders ({', '.join(ORDER_COLS)}) VALUES ({', '.join('?' * len(ORDER_COLS))})",
+                [[o["created_at"].isoformat() if k == "created_at" else o[k] for k in ORDER_COLS] for o, _ in items],
+            )
+            conn.executemany(
+                f"INSERT INTO containers (order_id, {', '.join(CONTAINER_COLS)}) "
+                f"VALUES (?, {', '.join('?' * len(CONTAINER_COLS))})",
+                [(o["order_id"], *[_accept_to_db(r[k]) if k == "accept" else r[k] for k in CONTAINER_COLS])
+                 for o, containers in items for r in containers],
+            )
+            for order, _ in items:
+                tx.log("order_added", order=dict(order))
+        self._emit_events(tx.events)
+
+    def get_order(self, order_id):
+        row = self._conn().execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        return self._order_from_row(row) if row else None
+
+    def list_orders(self):
+        rows = self._conn().execute("SELECT * FROM orders ORDER BY rowid").fetchall()
+        return [self._order_from_row(r) for r in rows]
+
+    def update_order(self, order_id, **fields):
+        cols = [k for k in fields if k in ORDER_COLS and k != "order_id"]
+        if not cols:
+            return
+        tx = self._write()
+        with tx as conn:
+            conn.execute(
+                f"UPDATE orders SET {', '.join(f'{k} = ?' for k in cols)} WHERE order_id = ?",
+                [fields[k] for k in cols] + [order_id],
+            )
+            tx.log("order_updated", order_id=order_id, fields={k: fields[k] for k in cols})
+        self._emit_events(tx.events)
+
+    def get_containers(self, order_id):
+        rows = self._conn().execute(
+            "SELECT * FROM containers WHERE order_id = ? ORDER BY no", (order_id,)
+        ).fetchall()
+        return [self._container_from_row(r) for r in rows]
+
+    def iter_containers(self, order_ids, batch: int = 500):
+        order_ids = list(order_ids)
+        for i in range(0, len(order_ids), batch):
+            ids = order_ids[i:i + batch]
+            cur = self._conn().execute(
+                f"SELECT * FROM containers WHERE order_id IN ({', '.join('?' * len(ids))}) ORDER BY order_id, no", ids
+            )
+            rows = {}
+            for row in cur:  # cursor di-iterasi, bukan fetchall
+                rows.setdefault(row["order_id"], []).append(self._container_from_row(row))
+            for oid in ids:  # pertahankan urutan order
+                for r in rows.pop(oid, ()):
+                    yield oid, r
+
+    def update_containers(self, order_id, changes, check=None):
+        applied, before = [], {}
+        delta = [0, 0]
+        tx = self._write()
+        with tx as conn:
+            if check is not None:
+                changes = check(changes)
+            for ch in changes:
+                cols = [k for k in ch if k in CONTAINER_COLS and k not in ("no", "size")]
+                if not cols:
+                    continue
+                old = conn.execute(
+                    f"SELECT size, {', '.join(cols)} FROM containers WHERE order_id = ? AND no = ?",
+                    (order_id, ch["no"]),
+                ).fetchone()
+                if old is None:
+                    continue
+                vals = [_accept_to_db(ch[k]) if k == "accept" else ch[k] for k in cols]
+                conn.execute(
+                    f"UPDATE containers SET {', '.join(f'{k} = ?' for k in cols)} WHERE order_id = ? AND no = ?",
+                    vals + [order_id, ch["no"]],
+                )
+                old = dict(old)
+                if "accept" in old:
+                    old["accept"] = _accept_from_db(old["accept"])
+                    delta[SIZES.index(old["size"])] += (ch["accept"] is not False) - (old["accept"] is not False)
+                before[ch["no"]] = old
+                applied.append(ch)
+            if delta != [0, 0]:
+                date, vendor = conn.execute(
+                    "SELECT tgl_stuffing, vendor FROM orders WHERE order_id = ?", (order_id,)
+                ).fetchone()
+                _check_capacity(date, vendor, delta, *self._capacity(conn, date, vendor))  # gagal → ROLLBACK
+                conn.execute(RESERVE_SQL, (date, vendor, delta[0], delta[1]))
+            if applied:
+                tx.log("containers_updated", order_id=order_id, changes=applied, before=before)
+        self._emit_events(tx.events)
+        return len(applied)
+
+    def container_counts(self):
+        rows = self._conn().execute(
+            "SELECT order_id, size, accept, COUNT(*) FROM containers GROUP BY order_id, size, accept"
+        ).fetchall()
+        return [(r[0], r[1], _accept_from_db(r[2]), r[3]) for r in rows]
+
+    def get_availability(self, date):
+        rows = self._conn().execute("SELECT vendor, a20, a40 FROM availability WHERE date = ?", (date,)).fetchall()
+        return {r["vendor"]: {"20ft": r["a20"], "40ft/HC": r["a40"]} for r in rows}
+
+    def set_availability_many(self, rows):
+        rows = [(date, vendor, int(a20), int(a40)) for date, vendor, a20, a40 in rows]
+        if not rows:
+            return
+        tx = self._write()
+        with tx as conn:
+            for date, vendor, a20, a40 in rows:
+                old, used = self._capacity(conn, date, vendor)
+                _check_rows_not_below(rows, date, a20, a40, used)
+                conn.execute(
+                    "INSERT INTO availability (date, vendor, a20, a40) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(date, vendor) DO UPDATE SET a20 = excluded.a20, a40 = excluded.a40",
+                    (date, vendor, a20, a40),
+                )
+                tx.log("availability_set", date=date, vendor=vendor, a20=a20, a40=a40, before=old)
+        self._emit_events(tx.events)
+
+    def get_remaining(self, date):
+        rows = self._conn().execute(
+            "SELECT a.vendor, a.a20 - COALESCE(r.r20, 0), a.a40 - COALESCE(r.r40, 0) FROM availability a "
+            "LEFT JOIN reservations r ON r.date = a.date AND r.vendor = a.vendor "
+            "WHERE a.date = ? AND a.a20 + a.a40 > 0",
+            (date,),
+        ).fetchall()
+        return {r[0]: {"20ft": max(0, r[1]), "40ft/HC": max(0, r[2])} for r in rows}
+
+    def availability_totals(self):
+        rows = self._conn().execute("SELECT date, SUM(a20), SUM(a40) FROM availability GROUP BY date").fetchall()
+        return [tuple(r) for r in rows]
+
+    def availability_rows(self, start, end):
+        rows = self._conn().execute(
+            "SELECT date, vendor, a20, a40 FROM availability WHERE date BETWEEN ? AND ?", (start, end)
+        ).fetchall()
+        return [tuple(r) for r in rows]
+
+    def list_vendors(self):
+        return [r[0] for r in self._conn().execute("SELECT vendor FROM vendors ORDER BY pos")]
+
+    def add_vendor(self, vendor):
+        tx = self._write()
+        with tx as conn:
+            conn.execute("INSERT OR IGNORE INTO vendors (vendor, pos) "
+                         "VALUES (?, (SELECT COALESCE(MAX(pos), 0) + 1 FROM vendors))", (vendor,))
+            tx.log("config_set")
+        self._emit_events(tx.events)
+
+    def set_account(self, username, password, role, vendor=None):
+        tx = self._write()
+        with tx as conn:
+            conn.execute("INSERT OR REPLACE INTO accounts (username, password_hash, role, vendor) VALUES (?, ?, ?, ?)",
+                         (username, _hash_password(password), role, vendor))
+            tx.log("config_set")
+        self._emit_events(tx.events)
+
+    def check_login(self, username, password):
+        row = self._conn().execute("SELECT * FROM accounts WHERE username = ?", (username,)).fetchone()
+        if row is None or not _verify_password(password, row["password_hash"]):
+            return None
+        return {"username": username, "role": row["role"], "vendor": row["vendor"]}
+
+    def list_accounts(self):
+        return [dict(r) for r in self._conn().execute("SELECT username, role, vendor FROM accounts ORDER BY username")]
+
+    def seed_config(self, accounts, vendors):
+        # BEGIN IMMEDIATE: worker lain yang start bersamaan menunggu, lalu melihat tabel sudah terisi
+        tx = self._write()
+        with tx as conn:
+            empty = not conn.execute("SELECT EXISTS (SELECT 1 FROM vendors) OR EXISTS (SELECT 1 FROM accounts)").fetchone()[0]
+            if empty:
+                conn.executemany("INSERT INTO vendors (vendor, pos) VALUES (?, ?)",
+                                 [(v, i) for i, v in enumerate(vendors, 1)])
+                conn.executemany(
+                    "INSERT INTO accounts (username, password_hash, role, vendor) VALUES (?, ?, ?, ?)",
+                    [(u, _hash_password(a["password"]), a["role"], a.get("vendor")) for u, a in accounts.items()],
+                )
+                tx.log("config_set")
+        self._emit_events(tx.events)
+        return empty
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Tx:
+    """Transaksi tulis: BEGIN IMMEDIATE supaya writer lain menunggu (busy timeout), bukan deadlock.
+    Tiap event `log()` menaikkan versi satu dan masuk changelog di transaksi yang sama; setelah
+    commit `tx.events` = [(versi, event, payload)] untuk di-emit."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.events = []
+
+    def log(self, event: str, **payload):
+        self.events.append((event, payload))
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.conn.execute("ROLLBACK")
+            self.events = []
+            return False
+        if self.events:
+            conn = self.conn
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'version'", (len(self.events),))
+            version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            first = version - len(self.events) + 1
+            self.events = [(first + i, event, payload) for i, (event, payload) in enumerate(self.events)]
+            conn.executemany("INSERT INTO changelog (version, event, payload) VALUES (?, ?, ?)",
+                             [(v, event, _encode_payload(payload)) for v, event, payload in self.events])
+            conn.execute("DELETE FROM changelog WHERE version <= ?", (version - CHANGELOG_KEEP,))
+        self.conn.execute("COMMIT")
+        return False
+
+
+# =============================
+# Factory
+# =============================
+def open_store(url: str = None) -> Store:
+    """`memory` → MemoryStore, `sqlite:///path.db` atau path file → SqliteStore."""
+    url = url or os.environ.get("TRUCK_STORE", "sqlite:///truckfinal.db")
+    if url in ("memory", "memory://", ":memory:"):
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteStore(url)
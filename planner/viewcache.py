@@ -0,0 +1,40 @@
+import threading
+from collections import OrderedDict
+
+# =============================
+# Cache view (DataFrame, list turunan) per versi data
+# =============================
+# Kunci = (nama view, filter, versi store). Versi naik di setiap tulis store
+# (order baru, accept/reject/partial, simpan detail, simpan ketersediaan),
+# jadi entri lama tidak pernah salah — cukup tersingkir oleh LRU.
+# Nilai dibagi ke semua session: perlakukan sebagai read-only.
+
+
+class ViewCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, view: str, key, version: int, build):
+        """Nilai cache untuk (view, key, version); `build()` dipanggil bila belum ada."""
+        k = (view, key, version)
+        with self._lock:
+            if k in self._items:
+                self._items.move_to_end(k)
+                self.hits += 1
+                return self._items[k]
+            self.misses += 1
+        value = build()  # di luar lock: build lambat tidak memblok view lain
+        with self._lock:
+            self._items[k] = value
+            self._items.move_to_end(k)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# =============================
+# Test unit modul planner (pytest, tanpa Streamlit)
+# =============================
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,81 @@
+import datetime as dt
+
+from planner.allocation import allocate
+from planner.store import MemoryStore
+
+DAY = "2026-10-19"
+
+
+def demand(no_dn: str, j20: int, j40: int = 0, day: str = DAY) -> dict:
+    return {"no_dn": no_dn, "tgl_stuffing": day, "closing_date": day, "shipping_point": "Cikarang", "j20": j20, "j40": j40}
+
+
+def store_with(availability: dict) -> MemoryStore:
+    s = MemoryStore()
+    for vendor, (a20, a40) in availability.items():
+        s.set_availability(DAY, vendor, a20, a40)
+    return s
+
+
+def left(store) -> dict:
+    return {v: (r["20ft"], r["40ft/HC"]) for v, r in store.get_remaining(DAY).items()}
+
+
+def persist(store, rows: list) -> list:
+    # seperti create_orders: satu order (order_id sendiri) per potongan vendor, satu transaksi
+    items = []
+    for i, r in enumerate(rows):
+        order = {"order_id": f"ORD-{i}", "vendor": r["vendor"], "tgl_stuffing": r["tgl_stuffing"],
+                 "closing_date": r["closing_date"], "no_dn": r["no_dn"], "shipping_point": r["shipping_point"],
+                 "jml_20ft": r["j20"], "jml_40ft": r["j40"], "created_at": dt.datetime(2026, 10, 1),
+                 "summary_status": "Pending"}
+        sizes = ["20ft"] * r["j20"] + ["40ft/HC"] * r["j40"]
+        items.append((order, [{"no": n + 1, "size": size, "accept": None, "no_container": "", "no_seal": "",
+                               "no_mobil": "", "nama_supir": "", "contact": "", "depo": "", "status": "Pending"}
+                              for n, size in enumerate(sizes)]))
+    store.add_orders(items)
+    return [o["order_id"] for o, _ in items]
+
+
+def test_capacity_exhausted_mid_list():
+    s = store_with({"KAMBING": (5, 0), "SAPI": (3, 0)})
+    rows, rejected = allocate([demand("DN-1", 2), demand("DN-2", 6), demand("DN-3", 1)], s.get_remaining)
+    # DN besar duluan: DN-2 (6) habiskan 6 dari 8, DN-1 (2) ambil sisanya, DN-3 tidak kebagian
+    # hasil tetap urut input
+    assert [(r["no_dn"], r["vendor"], r["j20"]) for r in rows] == [
+        ("DN-1", "SAPI", 2), ("DN-2", "KAMBING", 5), ("DN-2", "SAPI", 1)]
+    assert [(d["no_dn"], why) for d, why in rejected] == [
+        ("DN-3", "Sisa ketersediaan 2026-10-19 tidak cukup (20ft: 0, 40ft/HC: 0).")]
+    persist(s, rows)
+    assert left(s) == {"KAMBING": (0, 0), "SAPI": (0, 0)}
+
+
+def test_ties_between_vendors():
+    s = store_with({"SAPI": (4, 4), "KAMBING": (4, 4)})
+    # sisa sama persis → urut nama vendor (deterministik, tidak tergantung urutan dict)
+    rows, _ = allocate([demand("DN-1", 2, 1)], s.get_remaining)
+    assert [(r["vendor"], r["j20"], r["j40"]) for r in rows] == [("KAMBING", 2, 1)]
+    # skor lebih tinggi menang atas urutan nama
+    rows, _ = allocate([demand("DN-1", 2, 1)], s.get_remaining, {"SAPI": 0.9, "KAMBING": 0.5})
+    assert [r["vendor"] for r in rows] == ["SAPI"]
+    # dua DN sama besar: DN pertama di input dilayani dulu
+    rows, rejected = allocate([demand("DN-A", 4, 4), demand("DN-B", 4, 4), demand("DN-C", 1)],
+                              store_with({"SAPI": (4, 4), "KAMBING": (4, 4)}).get_remaining)
+    assert [(r["no_dn"], r["vendor"]) for r in rows] == [("DN-A", "KAMBING"), ("DN-B", "SAPI")]
+    assert [d["no_dn"] for d, _ in rejected] == ["DN-C"]
+
+
+def test_split_dn_shares_no_dn_keyed_by_order_id():
+    s = store_with({"KAMBING": (3, 1), "SAPI": (2, 2)})
+    rows, rejected = allocate([demand("DN-SPLIT", 5, 2)], s.get_remaining)
+    assert not rejected
+    assert {r["no_dn"] for r in rows} == {"DN-SPLIT"}
+    assert sorted((r["vendor"], r["j20"], r["j40"]) for r in rows) == [("KAMBING", 3, 0), ("SAPI", 2, 2)]
+
+    ids = persist(s, rows)
+    orders = [s.get_order(oid) for oid in ids]
+    assert len(set(ids)) == 2 and all(o["no_dn"] == "DN-SPLIT" for o in orders)
+    by_vendor = {o["vendor"]: o["order_id"] for o in orders}
+    assert [r["size"] for r in s.get_containers(by_vendor["KAMBING"])] == ["20ft"] * 3
+    assert [r["size"] for r in s.get_containers(by_vendor["SAPI"])] == ["20ft"] * 2 + ["40ft/HC"] * 2
+    assert left(s) == {"KAMBING": (0, 1), "SAPI": (0, 0)}
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from planner.editor import editor_changes
+
+STATUSES = ["Pending", "Confirm Order", "Gate in port"]
+
+
+def source():
+    return pd.DataFrame([
+        {"No.": no, "Jenis": size, "No. Container": "", "No. Seal": "", "No. Mobil": "", "Nama Supir": "",
+         "Contact": "", "Depo": "", "Status": "Pending", "OK": False}
+        for no, size in ((1, "20ft"), (2, "20ft"), (5, "40ft/HC"))
+    ])
+
+
+def test_no_op_edits_are_dropped():
+    # sel diedit lalu dikembalikan ke nilai semula / None pada kolom kosong → tidak ada yang disimpan
+    assert editor_changes(source(), {}, STATUSES) == {}
+    assert editor_changes(source(), {0: {"Status": "Pending", "No. Seal": None}, 1: {"OK": True}}, STATUSES) == {}
+
+
+def test_single_field_keyed_by_container_no():
+    # posisi baris editor ≠ No. container: baris ke-3 = container no 5
+    assert editor_changes(source(), {"2": {"No. Mobil": "B 1234 XY"}}, STATUSES) == {5: {"no_mobil": "B 1234 XY"}}
+
+
+def test_size_change_is_ignored():
+    # "Jenis" bukan kolom yang bisa diubah vendor: ukuran container tetap milik order
+    assert editor_changes(source(), {0: {"Jenis": "40ft/HC"}}, STATUSES) == {}
+    assert editor_changes(source(), {0: {"Jenis": "40ft/HC", "Depo": "Cakung"}}, STATUSES) == {1: {"depo": "Cakung"}}
+
+
+def test_unknown_status_falls_back_to_first():
+    assert editor_changes(source(), {1: {"Status": "bogus"}}, STATUSES) == {}
+    assert editor_changes(source(), {1: {"Status": "Gate in port"}}, STATUSES) == {2: {"status": "Gate in port"}}
+
+
+def test_only_ok_rows():
+    edited = {0: {"Depo": "A", "OK": True}, 1: {"Depo": "B"}}
+    assert editor_changes(source(), edited, STATUSES, only_ok=True) == {1: {"depo": "A"}}
+    assert editor_changes(source(), edited, STATUSES) == {1: {"depo": "A"}, 2: {"depo": "B"}}
@@ -0,0 +1,77 @@
+import contextlib
+import datetime as dt
+import io
+import logging
+import os
+
+import pytest
+
+from planner import iso6346
+
+VALID = ["CSQU3054383", "MSKU1234565"]
+# tiap nomor valid dengan satu digit serial / check digit digeser satu
+OFF_BY_ONE = ["CSQU3054384", "CSQU3054382", "CSQU3054483", "MSKU1234566", "MSKU1234564", "MSKU1234575"]
+BAD_FORMAT = ["", "MSKU123456", "MSKU12345655", "MSKX1234565", "M5KU1234565", "MSKU12345A5"]
+
+
+@pytest.mark.parametrize("value", VALID)
+def test_valid(value):
+    assert iso6346.validate([value]).tolist() == [True]
+    assert iso6346.errors([value]) == [""]
+
+
+@pytest.mark.parametrize("value", OFF_BY_ONE)
+def test_off_by_one_digit_is_invalid(value):
+    assert iso6346.validate([value]).tolist() == [False]
+    expected = iso6346.check_digits([value])[0]
+    assert iso6346.errors([value]) == [f"{value}: check digit salah (seharusnya {value[:-1]}{expected})"]
+
+
+@pytest.mark.parametrize("value", BAD_FORMAT)
+def test_bad_format(value):
+    assert iso6346.check_digits([value]).tolist() == [-1]
+    assert "format harus" in iso6346.errors([value])[0]
+
+
+@pytest.mark.parametrize("raw, normalized", [
+    ("msku 123456-5", "MSKU1234565"), (" csqu.305438.3 ", "CSQU3054383"), (None, ""),
+])
+def test_normalize(raw, normalized):
+    assert iso6346.normalize(raw) == normalized
+
+
+def test_batch_matches_single():
+    values = VALID + OFF_BY_ONE + BAD_FORMAT
+    assert iso6346.validate(values).tolist() == [iso6346.validate([v])[0] for v in values]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # TruckFinal.py dijalankan bare (tanpa server, seperti deploy/check_notify.py) di atas store baru
+    monkeypatch.setenv("TRUCK_STORE", f"sqlite:///{tmp_path / 'dup.db'}")
+    monkeypatch.delenv("TRUCK_NOTIFY_SMTP", raising=False)
+    monkeypatch.delenv("TRUCK_NOTIFY_WEBHOOK", raising=False)
+    import streamlit as st
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import TruckFinal as app
+    st.cache_resource.clear()
+    yield app
+    app.get_store().close()
+    st.cache_resource.clear()
+
+
+def test_duplicate_container_rejected_at_save(app):
+    day = dt.date.today().strftime(app.DATE_FMT)
+    app.get_store().set_availability(day, "KAMBING", 5, 5)
+    a = app.create_order("KAMBING", day, day, "DN-DUP-1", "Cikarang", 1, 0)
+    b = app.create_order("KAMBING", day, day, "DN-DUP-2", "Cikarang", 2, 0)
+    for oid, n in ((a, 1), (b, 2)):
+        app.get_store().update_containers(oid, [{"no": no, "accept": True} for no in range(1, n + 1)])
+
+    assert app.save_container_details(a, {1: {"no_container": "msku 123456-5"}}) == (1, {})
+    n, errors = app.save_container_details(b, {1: {"no_container": "MSKU1234565"}, 2: {"no_container": "CSQU3054383"}})
+    assert n == 1 and list(errors) == [1]
+    assert [r["no_container"] for r in app.get_store().get_containers(b)] == ["", "CSQU3054383"]
+    assert app.get_store().get_containers(a)[0]["no_container"] == "MSKU1234565"
@@ -0,0 +1,112 @@
+import datetime as dt
+import threading
+
+import pytest
+
+from planner.store import CapacityError, MemoryStore, SqliteStore
+
+DAY = "2026-10-19"
+VENDOR = "KAMBING"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    s = MemoryStore() if request.param == "memory" else SqliteStore(str(tmp_path / "ledger.db"))
+    s.set_availability(DAY, VENDOR, 4, 2)
+    yield s
+    s.close()
+
+
+def make_order(order_id: str, j20: int, j40: int = 0, vendor: str = VENDOR):
+    order = {
+        "order_id": order_id, "vendor": vendor, "tgl_stuffing": DAY, "closing_date": DAY, "no_dn": f"DN-{order_id}",
+        "shipping_point": "Cikarang", "jml_20ft": j20, "jml_40ft": j40, "created_at": dt.datetime(2026, 10, 1),
+        "summary_status": "Pending",
+    }
+    sizes = ["20ft"] * j20 + ["40ft/HC"] * j40
+    containers = [{"no": i + 1, "size": size, "accept": None, "no_container": "", "no_seal": "", "no_mobil": "",
+                   "nama_supir": "", "contact": "", "depo": "", "status": "Pending"} for i, size in enumerate(sizes)]
+    return order, containers
+
+
+def remaining(store) -> tuple:
+    r = store.get_remaining(DAY).get(VENDOR, {})
+    return r.get("20ft", 0), r.get("40ft/HC", 0)
+
+
+def test_overbooking_is_blocked(store):
+    store.add_order(*make_order("A", 3, 1))
+    assert remaining(store) == (1, 1)
+    with pytest.raises(CapacityError):
+        store.add_order(*make_order("B", 2))
+    # batch gagal → tidak ada order yang tersimpan, ledger tidak berubah
+    with pytest.raises(CapacityError):
+        store.add_orders([make_order("C", 1), make_order("D", 0, 2)])
+    assert store.get_order("B") is None and store.get_order("C") is None
+    assert remaining(store) == (1, 1)
+
+
+def test_reject_and_partial_accept_release_capacity(store):
+    store.add_order(*make_order("A", 4, 2))
+    assert remaining(store) == (0, 0)
+    # partial accept: 2 dari 4 container 20ft diterima, sisanya ditolak
+    store.update_containers("A", [{"no": 1, "accept": True}, {"no": 2, "accept": True},
+                                  {"no": 3, "accept": False}, {"no": 4, "accept": False}])
+    assert remaining(store) == (2, 0)
+    store.update_containers("A", [{"no": 5, "accept": False}, {"no": 6, "accept": False}])
+    assert remaining(store) == (2, 2)
+    store.add_order(*make_order("B", 2, 2))
+    assert remaining(store) == (0, 0)
+
+
+def test_reaccept_over_capacity_is_blocked(store):
+    store.add_order(*make_order("A", 4))
+    store.update_containers("A", [{"no": 4, "accept": False}])
+    store.add_order(*make_order("B", 1))  # kapasitas yang dilepas langsung dipakai order lain
+    v = store.version()
+    with pytest.raises(CapacityError):
+        store.update_containers("A", [{"no": 4, "accept": True}])
+    assert store.version() == v
+    assert [r["accept"] for r in store.get_containers("A")] == [None, None, None, False]
+    assert remaining(store) == (0, 2)
+
+
+def test_availability_below_reserved_is_blocked(store):
+    store.add_order(*make_order("A", 3, 1))
+    with pytest.raises(CapacityError):
+        store.set_availability(DAY, VENDOR, 2, 2)
+    with pytest.raises(CapacityError):
+        store.set_availability_many([("2026-10-20", VENDOR, 9, 9), (DAY, VENDOR, 4, 0)])
+    assert store.get_availability(DAY)[VENDOR] == {"20ft": 4, "40ft/HC": 2}
+    assert store.get_availability("2026-10-20") == {}
+    store.set_availability(DAY, VENDOR, 3, 1)  # tepat sama dengan yang dipesan = boleh
+    assert remaining(store) == (0, 0)
+
+
+def test_two_connection_race_sqlite(tmp_path):
+    # dua SqliteStore (koneksi terpisah, seperti dua worker) berebut sisa 4 container 20ft
+    path = str(tmp_path / "race.db")
+    stores = [SqliteStore(path), SqliteStore(path)]
+    for rnd in range(10):
+        stores[0].set_availability(DAY, VENDOR, 4 * (rnd + 1), 0)
+        barrier = threading.Barrier(2)
+        results = []
+
+        def submit(s, oid):
+            barrier.wait()
+            try:
+                s.add_order(*make_order(oid, 3))
+                results.append("ok")
+            except CapacityError:
+                results.append("full")
+
+        threads = [threading.Thread(target=submit, args=(s, f"R{rnd}-{i}")) for i, s in enumerate(stores)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(results) == ["full", "ok"]
+        stores[0].add_order(*make_order(f"F{rnd}", 1))  # isi sisa 1 → ronde berikutnya mulai dari 4 lagi
+    assert remaining(stores[1]) == (0, 0)
+    for s in stores:
+        s.close()
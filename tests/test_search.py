@@ -0,0 +1,52 @@
+import pytest
+
+from planner.search import SearchIndex
+
+
+@pytest.fixture
+def index(monkeypatch):
+    idx = SearchIndex()
+    idx.load([
+        ("ORD-1", 0, {"order_id": "ORD-1", "no_dn": "DN-1001"}),
+        ("ORD-1", 1, {"no_container": "MSKU1234565", "nama_supir": "Budi", "no_mobil": "B 12345 XY"}),
+        ("ORD-1", 2, {"no_container": "MSKU1234566", "nama_supir": "Budi"}),
+        ("ORD-2", 0, {"order_id": "ORD-2", "no_dn": "DN-1002"}),
+        ("ORD-2", 1, {"no_container": "CSQU3054383", "nama_supir": "Badu", "no_mobil": "B 1234 XY"}),
+    ])
+    calls = []
+    fuzzy = idx._fuzzy_terms
+    monkeypatch.setattr(idx, "_fuzzy_terms", lambda w, limit: calls.append(w) or fuzzy(w, limit))
+    idx.fuzzy_calls = calls
+    return idx
+
+
+def hits(results) -> list:
+    return [(r["order_id"], r["no"], r["score"]) for r in results]
+
+
+def test_exact_term_skips_fuzzy(index):
+    # no. container lengkap: hanya yang sama persis, tetangga 1 digit (MSKU1234566) sengaja TIDAK ikut
+    assert hits(index.search("MSKU1234565")) == [("ORD-1", 1, 1.0)]
+    assert hits(index.search("budi")) == [("ORD-1", 1, 1.0), ("ORD-1", 2, 1.0)]  # bukan "badu"
+    assert index.fuzzy_calls == []
+
+
+def test_exact_term_keeps_prefix_matches(index):
+    # term yang sama persis tetap membawa term lain berawalan sama (prefix), hanya fuzzy yang dilewati
+    res = index.search("1234")
+    assert hits(res)[0] == ("ORD-2", 1, 1.0)
+    assert [(r["order_id"], r["no"]) for r in res[1:]] == [("ORD-1", 1)] and res[1]["score"] < 1.0
+    assert index.fuzzy_calls == []
+
+
+def test_near_miss_goes_through_trigrams(index):
+    res = index.search("MSKU1234567")
+    assert index.fuzzy_calls == ["msku1234567"]
+    assert {(r["order_id"], r["no"]) for r in res} == {("ORD-1", 1), ("ORD-1", 2)}
+    assert all(r["score"] < 0.9 for r in res)  # skor fuzzy, di bawah exact / prefix
+    assert {r["order_id"] for r in index.search("budy")} == {"ORD-1"} and index.fuzzy_calls[-1] == "budy"
+
+
+def test_fuzzy_disabled(index):
+    assert index.search("MSKU1234567", fuzzy=False) == []
+    assert index.fuzzy_calls == []